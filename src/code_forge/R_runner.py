@@ -1,15 +1,44 @@
 import subprocess
 import os
 import json
+import queue
+import re
+import shutil
 import logging
-from typing import Dict, Any, Optional
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from code_forge.exchange import R_WRITER, SCHEMA_NAME, read_columns
+from code_forge.r_session import RSession
+from common.links import link_path
+from spss_engine.probe import ColumnarProbe, ProbeResult
 
 logger = logging.getLogger("RRunner")
 
+# Per-run workspaces inside the script's folder (see RRunner._workspace)
+WORKSPACE_PREFIX = ".statify_r_"
+# Quoted strings in loader code, some of which name data files
+_QUOTED = re.compile(r"""["']([^"'\n]+)["']""")
+
 class RRunner:
-    def __init__(self, script_path: str, state_machine=None):
+    """
+    Runs a generated R script against real data through a harness script.
+    With a session (code_forge.r_session.RSession) the harness runs in a
+    long-lived R worker instead of a fresh Rscript process per call.
+    `inputs` are the data files the script reads, relative to its folder
+    (e.g. SourceInspector's inputs for the original SPSS script).
+    """
+    def __init__(self, script_path: str, state_machine=None, session: Optional[RSession] = None,
+                 timeout: float = 30, inputs: Optional[Sequence[str]] = None):
         self.script_path = script_path
         self.work_dir = os.path.dirname(script_path)
+        self.session = session
+        self.timeout = timeout
+        self.inputs = list(inputs or [])
 
     def run_and_capture(self, data_file: Optional[str] = None, loader_code: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -21,49 +50,206 @@ class RRunner:
             logger.warning("RRunner skipped: No data file or loader code provided.")
             return {}
 
-        wrapper_path = os.path.join(self.work_dir, "wrapper.R")
-        output_json = os.path.join(self.work_dir, "r_output.json")
-        
+        with self._workspace(data_file, loader_code) as workspace:
+            output_json = os.path.join(workspace, "r_output.json")
+            if not self._run_wrapper(workspace, output_json, data_file, loader_code):
+                return {}
+
+            # 3. Read JSON Output
+            if os.path.exists(output_json):
+                with open(output_json, "r") as f:
+                    return json.load(f)
+            else:
+                logger.warning("R ran but produced no JSON output.")
+                return {}
+
+    def run_and_profile(self, data_file: Optional[str] = None, loader_code: Optional[str] = None,
+                        probe: Optional[ColumnarProbe] = None) -> Optional[ProbeResult]:
+        """
+        Executes the R script and streams its complete result table (not just
+        the first row) through a ColumnarProbe. Returns None when R fails.
+        """
+        probe = probe or ColumnarProbe()
+        return self._run_export(data_file, loader_code, probe.profile_frame, probe.profile)
+
+    def run_and_load(self, data_file: Optional[str] = None, loader_code: Optional[str] = None,
+                     probe: Optional[ColumnarProbe] = None) -> Optional[pd.DataFrame]:
+        """
+        Executes the R script and returns its complete result table as typed
+        columns (for the equivalence check). Returns None when R fails.
+        Numeric columns are memory-mapped from R's binary export.
+        """
+        read_csv = (probe or ColumnarProbe()).load
+        return self._run_export(data_file, loader_code, lambda frame: frame, read_csv)
+
+    @classmethod
+    def run_batch(cls, jobs: Sequence[Tuple[str, Optional[str]]], max_workers: int = 4,
+                  sessions: Optional[Sequence[RSession]] = None, mode: str = "load",
+                  timeout: float = 30) -> List[Any]:
+        """
+        Verifies many (script_path, loader_code) pairs concurrently over a
+        bounded thread pool; `mode` picks run_and_load, run_and_profile or
+        run_and_capture. With sessions each job borrows an idle R worker
+        (so at most len(sessions) run at once); without, each job starts
+        its own Rscript. Results are in input order; a job that raises
+        yields its exception.
+        """
+        methods = {
+            "load": cls.run_and_load,
+            "profile": cls.run_and_profile,
+            "capture": cls.run_and_capture,
+        }
+        if mode not in methods:
+            raise ValueError(f"Unknown batch mode: {mode}")
+
+        idle: Optional["queue.LifoQueue[RSession]"] = None
+        if sessions:
+            idle = queue.LifoQueue()
+            for session in sessions:
+                idle.put(session)
+            max_workers = min(max_workers, len(sessions))
+
+        def _one(job):
+            script_path, loader_code = job
+            session = idle.get() if idle is not None else None
+            try:
+                runner = cls(script_path, session=session, timeout=timeout)
+                return methods[mode](runner, loader_code=loader_code)
+            except Exception as e:
+                return e
+            finally:
+                if session is not None:
+                    idle.put(session)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            return list(executor.map(_one, jobs))
+
+    def _run_export(self, data_file: Optional[str], loader_code: Optional[str],
+                    read_frame, read_csv):
+        """
+        Runs the harness in full mode. R writes the columnar binary export
+        (see code_forge.exchange) and falls back to CSV if that fails.
+        """
+        if not data_file and not loader_code:
+            logger.warning("RRunner skipped: No data file or loader code provided.")
+            return None
+
+        # Mapped columns stay readable after the workspace is removed (POSIX)
+        with self._workspace(data_file, loader_code) as workspace:
+            export_base = os.path.join(workspace, "r_output")
+            exchange_dir = f"{export_base}.cols"
+            output_csv = f"{export_base}.csv"
+            if not self._run_wrapper(workspace, export_base, data_file, loader_code, full=True):
+                return None
+            if os.path.exists(os.path.join(exchange_dir, SCHEMA_NAME)):
+                return read_frame(read_columns(exchange_dir))
+            if os.path.exists(output_csv):
+                logger.info("R used the CSV fallback for its results.")
+                return read_csv(output_csv)
+            logger.warning("R ran but produced no output table.")
+            return None
+
+    @contextmanager
+    def _workspace(self, data_file: Optional[str] = None,
+                   loader_code: Optional[str] = None) -> Iterator[str]:
+        """
+        A private folder for one run, next to the script: the script and
+        the data it reads are linked in (so relative data paths resolve as
+        before) and the harness and its outputs stay inside. Concurrent
+        runs in the same folder therefore never collide.
+        """
+        base_dir = self.work_dir or "."
+        workspace = tempfile.mkdtemp(prefix=WORKSPACE_PREFIX, dir=base_dir)
+        try:
+            for name in self._workspace_entries(base_dir, data_file, loader_code):
+                link_path(os.path.join(base_dir, name), os.path.join(workspace, name))
+            yield workspace
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    def _workspace_entries(self, base_dir: str, data_file: Optional[str],
+                           loader_code: Optional[str]) -> List[str]:
+        """
+        Top-level names in the script's folder a run needs: the script, the
+        inputs, the data file and any existing relative path the loader
+        code quotes. Nested paths bring their top directory.
+        """
+        candidates = [os.path.basename(self.script_path), *self.inputs, data_file or ""]
+        candidates += _QUOTED.findall(loader_code or "")
+        names = set()
+        for path in candidates:
+            if not path or os.path.isabs(path):
+                continue
+            top = os.path.normpath(path).split(os.sep)[0]
+            if top in (os.curdir, os.pardir) or top.startswith(WORKSPACE_PREFIX):
+                continue
+            if os.path.lexists(os.path.join(base_dir, top)):
+                names.add(top)
+        return sorted(names)
+
+    def _run_wrapper(self, workspace: str, output_path: str, data_file: Optional[str],
+                     loader_code: Optional[str], full: bool = False) -> bool:
+        """Writes and runs the harness script in the workspace; True when R exits cleanly."""
+        wrapper_path = os.path.join(workspace, "wrapper.R")
+
         # 1. Generate the harness script
-        wrapper_code = self._generate_wrapper(output_json, data_file, loader_code)
+        wrapper_code = self._generate_wrapper(output_path, data_file, loader_code, full=full)
         with open(wrapper_path, "w") as f:
             f.write(wrapper_code)
 
         # 2. Execute R
         cmd = ["Rscript", "wrapper.R"]
         try:
+            if self.session is not None:
+                job = self.session.run("run", wrapper_path, cwd=workspace, timeout=self.timeout)
+                if not job.ok:
+                    logger.error("R Execution Failed:\n" + "\n".join(job.output + [job.error]))
+                return job.ok
+
             result = subprocess.run(
                 cmd, 
-                cwd=self.work_dir, 
+                cwd=workspace, 
                 capture_output=True, 
                 text=True, 
-                timeout=30
+                timeout=self.timeout
             )
             
             if result.returncode != 0:
                 logger.error(f"R Execution Failed:\n{result.stderr}")
-                return {}
-
-            # 3. Read JSON Output
-            if os.path.exists(output_json):
-                with open(output_json, "r") as f:
-                    return json.load(f)
-            else:
-                logger.warning("R ran but produced no JSON output.")
-                return {}
+                return False
+            return True
                 
         except Exception as e:
             logger.error(f"R Runner failed: {e}")
-            return {}
-        finally:
-            if os.path.exists(wrapper_path): os.remove(wrapper_path)
-            if os.path.exists(output_json): os.remove(output_json)
+            return False
 
-    def _generate_wrapper(self, output_path: str, data_file: str, loader_code: str) -> str:
+    def _generate_wrapper(self, output_path: str, data_file: str, loader_code: str,
+                          full: bool = False) -> str:
         """
         Generates dynamic R code to load the REAL data and run the pipeline.
+        With full=True the whole result is exported in the columnar binary
+        layout to '<output_path>.cols' (CSV at '<output_path>.csv' if that
+        fails) instead of the first row as JSON.
         """
         script_name = os.path.basename(self.script_path)
+
+        if full:
+            # 4. Serialize the Whole Result
+            serialize_cmd = (
+                f'tryCatch(write_statify_columns(result, "{output_path}.cols"), '
+                'error = function(e) {\n'
+                '                message("Binary export failed, writing CSV: ", '
+                'conditionMessage(e))\n'
+                f'                write_csv(result, "{output_path}.csv", na = "")\n'
+                "            })"
+            )
+        else:
+            # 4. Serialize First Row for Comparison
+            serialize_cmd = (
+                "output_list <- as.list(result[1, ])\n"
+                "            json_out <- toJSON(output_list, auto_unbox = TRUE)\n"
+                f'            write(json_out, "{output_path}")'
+            )
         
         # 🟢 INTELLIGENT LOADING LOGIC
         if loader_code:
@@ -85,8 +271,9 @@ class RRunner:
         library(haven)
         library(jsonlite)
 
-        # 1. Source the Logic
-        source("{script_name}")
+        # 1. Source the Logic (into this job's environment, not the global one)
+        source("{script_name}", local = TRUE)
+        {R_WRITER if full else ""}
 
         tryCatch({{
             # 2. Load Real Data
@@ -95,10 +282,7 @@ class RRunner:
             # 3. Run Pipeline
             result <- logic_pipeline(df)
 
-            # 4. Serialize First Row for Comparison
-            output_list <- as.list(result[1, ])
-            json_out <- toJSON(output_list, auto_unbox = TRUE)
-            write(json_out, "{output_path}")
+            {serialize_cmd}
 
         }}, error = function(e) {{
             message("CRITICAL R ERROR:")
@@ -0,0 +1,141 @@
+"""
+Columnar binary exchange between generated R code and Python.
+
+A result table is written as a directory:
+
+    schema.tsv     'rows<TAB>n', then one 'name<TAB>kind' line per column
+    <i>.f8         kind f8:   n little-endian float64 values (NA -> NaN)
+    <i>.utf8       kind utf8: (n + 1) int32 byte offsets, n missing flags
+                   (one byte each), then the concatenated UTF-8 text
+
+R writes it with base writeBin (no extra packages); Python memory-maps
+the numeric files, so large results are read without copying. schema.tsv
+is written last and marks a complete export.
+"""
+import logging
+import os
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("Exchange")
+
+SCHEMA_NAME = "schema.tsv"
+NUMERIC_KIND = "f8"
+TEXT_KIND = "utf8"
+
+# Defines write_statify_columns(df, dir) inside the R harness.
+R_WRITER = r"""
+write_statify_columns <- function(df, dir) {
+    dir.create(dir, showWarnings = FALSE)
+    schema <- paste("rows", nrow(df), sep = "\t")
+    for (i in seq_along(df)) {
+        col <- df[[i]]
+        if (is.numeric(col) || is.logical(col)) {
+            kind <- "f8"
+            con <- file(file.path(dir, paste0(i, ".f8")), "wb")
+            writeBin(as.double(col), con, size = 8, endian = "little")
+        } else {
+            kind <- "utf8"
+            text <- enc2utf8(as.character(col))
+            missing <- is.na(text)
+            text[missing] <- ""
+            sizes <- nchar(text, type = "bytes")
+            if (sum(as.double(sizes)) > .Machine$integer.max)
+                stop("text column too large for int32 offsets")
+            con <- file(file.path(dir, paste0(i, ".utf8")), "wb")
+            writeBin(as.integer(c(0, cumsum(sizes))), con, size = 4, endian = "little")
+            writeBin(as.raw(missing), con)
+            writeBin(charToRaw(paste(text, collapse = "")), con)
+        }
+        close(con)
+        schema <- c(schema, paste(names(df)[i], kind, sep = "\t"))
+    }
+    writeLines(enc2utf8(schema), file.path(dir, "schema.tsv"), useBytes = TRUE)
+}
+"""
+
+
+def write_columns(frame: pd.DataFrame, directory: str):
+    """Python counterpart of the R writer (same layout)."""
+    os.makedirs(directory, exist_ok=True)
+    schema = [f"rows\t{len(frame)}"]
+    for i, name in enumerate(frame.columns, start=1):
+        column = frame[name]
+        if column.dtype.kind in "fiub":
+            kind = NUMERIC_KIND
+            column.to_numpy(dtype="<f8", na_value=np.nan).tofile(os.path.join(directory, f"{i}.f8"))
+        else:
+            kind = TEXT_KIND
+            missing = column.isna().to_numpy()
+            encoded = [b"" if gone else str(v).encode("utf-8")
+                       for v, gone in zip(column.tolist(), missing)]
+            offsets = np.zeros(len(encoded) + 1, dtype="<i4")
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+            with open(os.path.join(directory, f"{i}.utf8"), "wb") as f:
+                f.write(offsets.tobytes())
+                f.write(missing.astype(np.uint8).tobytes())
+                f.write(b"".join(encoded))
+        schema.append(f"{name}\t{kind}")
+    with open(os.path.join(directory, SCHEMA_NAME), "w", encoding="utf-8") as f:
+        f.write("\n".join(schema) + "\n")
+
+
+def read_columns(directory: str) -> pd.DataFrame:
+    """
+    Reads an exported table with upper-cased column names. Numeric
+    columns stay backed by the memory-mapped files; text columns are
+    decoded into object arrays (NaN where missing).
+    """
+    with open(os.path.join(directory, SCHEMA_NAME), "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    label, rows = lines[0].split("\t")
+    if label != "rows":
+        raise ValueError(f"Not an exchange schema: {directory}")
+    n = int(rows)
+
+    columns: Dict[str, np.ndarray] = {}
+    for i, line in enumerate(lines[1:], start=1):
+        name, kind = line.rsplit("\t", 1)
+        path = os.path.join(directory, f"{i}.{kind}")
+        if kind == NUMERIC_KIND:
+            values = _map_numeric(path, n)
+        elif kind == TEXT_KIND:
+            values = _read_text(path, n)
+        else:
+            raise ValueError(f"Unknown column kind {kind!r} for {name}")
+        columns[name.strip().upper()] = values
+    return pd.DataFrame(columns, copy=False) if columns else pd.DataFrame(index=range(n))
+
+
+def _map_numeric(path: str, n: int) -> np.ndarray:
+    size = os.path.getsize(path)
+    if size != n * 8:
+        raise ValueError(f"{path}: expected {n * 8} bytes, found {size}")
+    if n == 0:
+        return np.empty(0, dtype=np.float64)
+    return np.memmap(path, dtype="<f8", mode="r", shape=(n,))
+
+
+def _read_text(path: str, n: int) -> np.ndarray:
+    with open(path, "rb") as f:
+        data = f.read()
+    head = (n + 1) * 4
+    offsets = np.frombuffer(data, dtype="<i4", count=n + 1)
+    missing = np.frombuffer(data, dtype=np.uint8, count=n, offset=head).astype(bool)
+    blob = data[head + n:]
+    if len(blob) != (offsets[-1] if n else 0):
+        raise ValueError(f"{path}: text blob does not match its offsets")
+
+    bounds = offsets.tolist()
+    if blob.isascii():
+        # Byte offsets are character offsets: slice one decoded string
+        text = blob.decode("ascii")
+        values = [text[bounds[i]:bounds[i + 1]] for i in range(n)]
+    else:
+        values = [blob[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(n)]
+    out = np.empty(n, dtype=object)
+    out[:] = values
+    out[missing] = np.nan
+    return out
@@ -1,8 +1,8 @@
 import logging
-import re
 from typing import List, Optional
 from spss_engine.state import StateMachine, VariableVersion
 from spss_engine.events import FileReadEvent, SemanticEvent
+from code_forge.rosetta import RosettaStone
 
 logger = logging.getLogger("RGenerator")
 
@@ -85,21 +85,17 @@ class RGenerator:
         
         expr = node.source.strip()
         target = node.name.lower()
-        
-        if expr.upper().startswith("COMPUTE"):
-            parts = expr.split("=", 1)
-            if len(parts) == 2:
-                rhs = parts[1].strip().rstrip(".").lower()
-                return f"mutate({target} = {rhs})"
 
-        elif expr.upper().startswith("IF"):
-            match = re.search(r"IF\s*\((.*?)\)\s*(\w+)\s*=\s*(.*)\.$", expr, re.IGNORECASE)
-            if match:
-                condition = match.group(1).lower()
-                value_true = match.group(3).lower()
-                return f"mutate({target} = if_else({condition}, {value_true}, {target}))"
+        # Walk the cached AST instead of re-scanning the source text
+        ast = node.get_ast() if hasattr(node, 'get_ast') else None
+        if ast is not None and ast.value is not None:
+            rhs = RosettaStone.to_r(ast.value, lower_names=True)
+            if ast.condition is None:
+                return f"mutate({target} = {rhs})"
+            condition = RosettaStone.to_r(ast.condition, lower_names=True)
+            return f"mutate({target} = if_else({condition}, {rhs}, {target}))"
 
-        elif "MATCH FILES" in expr.upper():
+        if "MATCH FILES" in expr.upper():
              return f"# Join logic detected: {expr}"
         
         return f"# Unhandled logic: {expr}"
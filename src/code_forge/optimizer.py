@@ -2,7 +2,9 @@ import os
 import shutil
 import subprocess
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+from code_forge.r_session import RSession
 
 # Setup Logging
 logger = logging.getLogger("Optimizer")
@@ -10,9 +12,12 @@ logger = logging.getLogger("Optimizer")
 class CodeOptimizer:
     """
     Manages R code quality: Linting and Refactoring.
+    With a session (RSession) lintr and styler run in a long-lived R worker
+    that has them loaded already, instead of one Rscript call each.
     """
-    def __init__(self, project_dir: str):
+    def __init__(self, project_dir: str, session: Optional[RSession] = None):
         self.project_dir = os.path.abspath(project_dir)
+        self.session = session
         self.snapshot_dir = os.path.join(self.project_dir, "snapshots")
         
         # Internal helper script for AST refactoring (Placeholder for now)
@@ -35,6 +40,8 @@ class CodeOptimizer:
 
     def check_dependencies(self) -> bool:
         """Verifies R and lintr are installed."""
+        if self.session is not None:
+            return True
         if not shutil.which("Rscript"):
             logger.warning("Rscript executable not found.")
             return False
@@ -60,6 +67,13 @@ class CodeOptimizer:
         ]
         
         try:
+            if self.session is not None:
+                job = self.session.run("lint", full_path, cwd=self.project_dir)
+                if not job.ok:
+                    logger.error(f"Linter crashed: {job.error}")
+                    return ["Linter Runtime Error"]
+                return job.output
+
             # Run R command
             result = subprocess.run(
                 cmd, 
@@ -95,11 +109,16 @@ class CodeOptimizer:
         # This uses the AST to safely fix indentation and spaces.
         if self.check_dependencies():
             try:
-                subprocess.run(
-                    ["Rscript", "-e", f"library(styler); style_file('{src}')"],
-                    capture_output=True,
-                    cwd=self.project_dir
-                )
+                if self.session is not None:
+                    job = self.session.run("style", src, cwd=self.project_dir)
+                    if not job.ok:
+                        logger.warning(f"styler failed: {job.error}")
+                else:
+                    subprocess.run(
+                        ["Rscript", "-e", f"library(styler); style_file('{src}')"],
+                        capture_output=True,
+                        cwd=self.project_dir
+                    )
             except Exception:
                 logger.warning("Could not run 'styler'. Is it installed in R?")
 
@@ -0,0 +1,156 @@
+import os
+import queue
+import signal
+import logging
+import threading
+import subprocess
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+logger = logging.getLogger("RSession")
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "scripts", "worker.R")
+# Loaded once per worker instead of once per Rscript call
+DEFAULT_LIBRARIES = ("dplyr", "readr", "lubridate", "haven", "jsonlite", "lintr", "styler")
+# Printed by the worker after each job (see scripts/worker.R)
+_TOKEN_PREFIX = "STATIFY_R_JOB"
+
+JOB_KINDS = ("run", "lint", "style")
+
+
+@dataclass
+class RJobResult:
+    ok: bool
+    output: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+class RSession:
+    """
+    One long-lived R worker (scripts/worker.R) fed jobs over stdin, so the
+    packages load once per session instead of once per Rscript call.
+
+    Jobs run one at a time. A job that exceeds its timeout gets the worker
+    killed (with its process group) and raises TimeoutError; a worker that
+    dies mid-job is restarted and the job retried up to `max_retries`
+    times before RuntimeError is raised. Errors raised by the R code itself
+    are returned as a failed RJobResult and leave the worker running.
+    """
+
+    def __init__(self, executable: str = "Rscript", worker_script: str = WORKER_SCRIPT,
+                 libraries: Sequence[str] = DEFAULT_LIBRARIES, timeout: Optional[float] = None,
+                 max_retries: int = 1):
+        self.executable = executable
+        self.worker_script = worker_script
+        self.libraries = list(libraries)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.proc: Optional[subprocess.Popen] = None
+        self.lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.starts = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.proc = subprocess.Popen(
+            [self.executable, self.worker_script, *self.libraries],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            start_new_session=True,
+        )
+        self.starts += 1
+        self.lines = queue.Queue()
+        threading.Thread(target=self._pump, args=(self.proc, self.lines), daemon=True).start()
+
+    @staticmethod
+    def _pump(proc: subprocess.Popen, lines: "queue.Queue"):
+        for line in proc.stdout:
+            lines.put(line.rstrip("\n"))
+        lines.put(None)  # EOF: the worker exited
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def run(self, kind: str, path: str, cwd: Optional[str] = None,
+            timeout: Optional[float] = None) -> RJobResult:
+        """Runs one job ('run' sources a script, 'lint', 'style') and returns its output."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown R job kind: {kind}")
+        timeout = self.timeout if timeout is None else timeout
+        job = (kind, os.path.abspath(path), os.path.abspath(cwd or os.path.dirname(path) or "."))
+        with self._lock:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return self._run_once(*job, timeout)
+                except RuntimeError as e:
+                    # Crashed worker: the next attempt starts a fresh one
+                    if attempt == self.max_retries:
+                        raise
+                    logger.warning(f"R worker crashed, retrying job: {e}")
+
+    def _run_once(self, kind: str, path: str, cwd: str, timeout: Optional[float]) -> RJobResult:
+        if not self.alive():
+            self.start()
+        token = f"{_TOKEN_PREFIX}_{uuid.uuid4().hex}"
+        try:
+            self.proc.stdin.write(f"{token}\t{kind}\t{cwd}\t{path}\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.kill()
+            raise RuntimeError(f"R worker died before accepting the job: {e}")
+
+        # The timeout covers the whole job, not each line: a script that
+        # keeps printing must not run forever
+        deadline = None if timeout is None else time.monotonic() + timeout
+        output = []
+        while True:
+            try:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                line = self.lines.get(timeout=remaining)
+            except queue.Empty:
+                self.kill()
+                raise TimeoutError(f"R job timed out after {timeout}s")
+            if line is None:
+                code = self.proc.wait()
+                self.proc = None
+                raise RuntimeError(f"R worker exited with code {code}:\n" + "\n".join(output))
+            if token in line:
+                # Output without a trailing newline (cat("done")) shares the line
+                before, _, rest = line.partition(token)
+                if before:
+                    output.append(before)
+                status = rest.split("\t")
+                if len(status) > 1 and status[1] == "OK":
+                    return RJobResult(True, output)
+                return RJobResult(False, output, status[2] if len(status) > 2 else "unknown error")
+            output.append(line)
+
+    def kill(self):
+        if self.proc is None:
+            return
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        self.proc.wait()
+        self.proc = None
+
+    def close(self):
+        """Stops the worker (end of input lets it exit on its own)."""
+        if self.alive():
+            try:
+                self.proc.stdin.close()
+                self.proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        self.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,5 +1,9 @@
 import re
 from typing import List
+from spss_engine.expression import (
+    Expr, ExpressionError, Number, String, Name, Group, Unary, Binary, Call,
+    parse_expression,
+)
 
 class RosettaStone:
     """
@@ -52,72 +56,90 @@ class RosettaStone:
             
         return args
 
+    # Operators: canonical SPSS (see spss_engine.expression) -> R
+    R_OPERATORS = {
+        "=": "==", "<>": "!=", "<": "<", ">": ">", "<=": "<=", ">=": ">=",
+        "AND": "&", "OR": "|", "+": "+", "-": "-", "*": "*", "/": "/", "**": "^",
+    }
+    # Rendered without surrounding spaces, e.g. trunc(x/100)
+    _TIGHT_OPERATORS = {"*", "/", "**"}
+
+    # Fallback for text the expression parser rejects: one linear pass.
+    _FALLBACK_NAMES = re.compile(
+        r"(?i)(?<![\w.$])(" + "|".join(re.escape(k) for k in TRANSLATIONS) + r")\b"
+    )
+
     @staticmethod
     def translate_expression(expression: str) -> str:
         if not expression:
             return "NA"
 
-        # 0. Basic Cleanup
-        expr = expression.replace("$SYSMIS", "NA")
-        
-        # 1. Handle Operators
-        # FIX: Use Regex to replace single '=' with '==' ONLY if not preceded/followed by other operators.
-        # This prevents >= becoming >==
-        # Lookbehind (?<!...) checks previous char is NOT <, >, !, or =
-        # Lookahead (?!=) checks next char is NOT =
-        expr = re.sub(r"(?<![<>!=])=(?!=)", "==", expr)
+        try:
+            ast = parse_expression(expression)
+        except ExpressionError:
+            return RosettaStone._translate_text(expression)
+        return RosettaStone.to_r(ast)
 
-        # 2. Handle DATE.MDY(m, d, y) -> make_date(y, m, d)
-        while "DATE.MDY" in expr.upper():
-            start_idx = expr.upper().find("DATE.MDY")
-            if start_idx == -1: break
-            
-            open_paren = expr.find("(", start_idx)
-            if open_paren == -1: break
-            
-            # Find balanced closing paren
-            count = 1
-            close_paren = -1
-            for i in range(open_paren + 1, len(expr)):
-                if expr[i] == '(': count += 1
-                elif expr[i] == ')': count -= 1
-                
-                if count == 0:
-                    close_paren = i
-                    break
-            
-            if close_paren == -1: break # Malformed
-            
-            # Extract content: "m, d, y"
-            full_match = expr[start_idx:close_paren+1]
-            content = expr[open_paren+1:close_paren]
-            
-            # Parse Args with nesting support
-            args = RosettaStone._split_args(content)
-            
-            if len(args) == 3:
-                m, d, y = args
-                # Recursively translate arguments
-                m = RosettaStone.translate_expression(m)
-                d = RosettaStone.translate_expression(d)
-                y = RosettaStone.translate_expression(y)
-                
-                # Reconstruct as R function: make_date(y, m, d)
-                replacement = f"make_date({y}, {m}, {d})"
-                expr = expr.replace(full_match, replacement)
-            else:
-                # Fallback
-                expr = expr.replace("DATE.MDY", "make_date")
-                break
+    @staticmethod
+    def _translate_text(expression: str) -> str:
+        expr = re.sub(r"(?<![<>!=~])=(?!=)", "==", expression)
+        return RosettaStone._FALLBACK_NAMES.sub(
+            lambda m: RosettaStone.TRANSLATIONS[m.group(1).upper()], expr
+        )
+
+    @staticmethod
+    def to_r(node: Expr, lower_names: bool = False) -> str:
+        """
+        Renders an SPSS expression AST as R code in a single walk.
+        lower_names converts variable names to the snake_case used by RGenerator.
+        """
+        def render(n: Expr) -> str:
+            if isinstance(n, Number):
+                return n.text
+            if isinstance(n, String):
+                return n.text
+            if isinstance(n, Name):
+                upper = n.name.upper()
+                if upper in RosettaStone.TRANSLATIONS and upper.startswith("$"):
+                    return RosettaStone.TRANSLATIONS[upper]
+                return n.name.lower() if lower_names else n.name
+            if isinstance(n, Group):
+                return f"({render(n.inner)})"
+            if isinstance(n, Unary):
+                operand = render(n.operand)
+                return f"!{operand}" if n.op == "NOT" else f"{n.op}{operand}"
+            if isinstance(n, Binary):
+                op = RosettaStone.R_OPERATORS[n.op]
+                left, right = render(n.left), render(n.right)
+                if n.op in RosettaStone._TIGHT_OPERATORS:
+                    return f"{left}{op}{right}"
+                return f"{left} {op} {right}"
+            if isinstance(n, Call):
+                return render_call(n)
+            raise TypeError(f"Unknown expression node: {n!r}")
+
+        def render_call(call: Call) -> str:
+            func = call.func.upper()
+            args = [render(a) for a in call.args]
+
+            # DATE.MDY(m, d, y) -> make_date(y, m, d)
+            if func == "DATE.MDY":
+                if len(args) == 3:
+                    m, d, y = args
+                    return f"make_date({y}, {m}, {d})"
+                return f"make_date({', '.join(args)})"
 
-        # 3. Handle NUMBER(x, fmt) -> as.numeric(x)
-        expr = re.sub(r"(?i)NUMBER\s*\(([^,]+)\s*,[^)]+\)", r"as.numeric(\1)", expr)
+            # NUMBER(x, fmt) -> as.numeric(x)
+            if func == "NUMBER" and args:
+                return f"as.numeric({args[0]})"
 
-        # 4. Handle MOD(a, b) -> (a %% b)
-        expr = re.sub(r"(?i)MOD\s*\((.+?),\s*(.+?)\)", r"(\1 %% \2)", expr)
+            # MOD(a, b) -> (a %% b)
+            if func == "MOD" and len(args) == 2:
+                return f"({args[0]} %% {args[1]})"
 
-        # 5. Generic Dictionary Replacements
-        for spss_name, r_name in RosettaStone.TRANSLATIONS.items():
-            expr = re.sub(rf"(?i)\b{spss_name}\b", r_name, expr)
+            name = RosettaStone.TRANSLATIONS.get(func)
+            if name is None:
+                name = call.func.lower() if lower_names else call.func
+            return f"{name}({', '.join(args)})"
 
-        return expr
\ No newline at end of file
+        return render(node)
@@ -0,0 +1,212 @@
+# src/common/data_store.py
+import json
+import logging
+import os
+import shutil
+import stat
+import time
+import uuid
+from typing import Dict, Optional, Sequence, Set
+
+from common.links import LINK_METHODS, link_path, reflink
+from common.manifest import _sha256_file
+
+logger = logging.getLogger("DataStore")
+
+STORE_NAME = ".statify-data"
+INDEX_NAME = "index.json"
+# Result of DataStore.stage when the target already holds the same content
+UNCHANGED = "unchanged"
+# Objects stored (or reused) this recently are never pruned: another
+# process may have ingested them without saving its index yet
+PRUNE_GRACE = 3600.0
+_READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+
+class DataStore:
+    """
+    Content-addressed store for the data files scripts depend on, kept
+    under the output root. Each distinct file is stored once (by SHA-256)
+    and placed in every output folder that needs it by hard link, reflink
+    or symlink, falling back to a copy.
+
+    Stored objects are read-only, so a write through one of the links
+    cannot change what the other folders see. Source hashes are memoised
+    on (size, mtime) in the store's index, so unchanged files are not
+    re-read on later runs. Several processes may share a store: each one
+    merges its changes into the index on disk when saving.
+
+    Objects stay until prune() finds that no indexed source holds their
+    content any more and they were not stored or reused within the grace
+    period.
+    """
+
+    def __init__(self, output_root: str, methods: Sequence[str] = LINK_METHODS):
+        self.root = os.path.join(output_root, STORE_NAME)
+        self.methods = tuple(methods)
+        self._digests: Optional[Dict[str, Dict]] = None  # abs path -> {size, mtime, sha256}
+        # Index entries this instance added, changed or dropped since the last save
+        self._changed: Set[str] = set()
+        self._removed: Set[str] = set()
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def digest(self, path: str) -> str:
+        """SHA-256 of a source file, reusing the indexed hash when size and mtime match."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        digests = self._index()
+        known = digests.get(path)
+        if known and known["size"] == st.st_size and known["mtime"] == st.st_mtime_ns:
+            return known["sha256"]
+        digest = _sha256_file(path)
+        digests[path] = {"size": st.st_size, "mtime": st.st_mtime_ns, "sha256": digest}
+        self._changed.add(path)
+        self._removed.discard(path)
+        return digest
+
+    def stage(self, src: str, dst: str) -> str:
+        """
+        Makes the content of `src` appear at `dst`. Returns the method used
+        ("hardlink", "reflink", "symlink", "copy") or UNCHANGED when `dst`
+        already holds it.
+        """
+        obj = self._ingest(src)
+        if _same_content(dst, obj):
+            return UNCHANGED
+
+        # Placed under a temporary name and renamed, so readers never see a partial file
+        tmp = f"{dst}.{uuid.uuid4().hex}.tmp"
+        try:
+            method = link_path(obj, tmp, self.methods)
+            if method in ("copy", "reflink"):
+                # An independent file: it may be writable like any other output
+                os.chmod(tmp, os.stat(tmp).st_mode | stat.S_IWUSR)
+            os.replace(tmp, dst)
+        except OSError:
+            if os.path.lexists(tmp):
+                os.unlink(tmp)
+            raise
+        return method
+
+    def save(self):
+        """
+        Writes the digest index (after staging new or changed files). Entries
+        other processes saved meanwhile are kept: only this instance's
+        changes are applied to the index as it is on disk now.
+        """
+        if not self._changed and not self._removed:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        merged = self._read_index()
+        for path in self._changed:
+            merged[path] = self._digests[path]
+        for path in self._removed:
+            merged.pop(path, None)
+
+        path = os.path.join(self.root, INDEX_NAME)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+        self._digests = merged
+        self._changed.clear()
+        self._removed.clear()
+
+    def prune(self, grace: float = PRUNE_GRACE) -> int:
+        """
+        Forgets sources that are gone or changed since they were indexed,
+        then deletes the objects no remaining source holds, except those
+        stored or reused in the last `grace` seconds (other processes may
+        not have saved their index yet). Returns the number of objects
+        removed. Output folders that symlinked a removed object held stale
+        data; their next build stages the current file.
+        """
+        digests = self._index()
+        for path, known in list(digests.items()):
+            try:
+                st = os.stat(path)
+                current = known["size"] == st.st_size and known["mtime"] == st.st_mtime_ns
+            except OSError:
+                current = False
+            if not current:
+                del digests[path]
+                self._changed.discard(path)
+                self._removed.add(path)
+        self.save()
+
+        live = {known["sha256"] for known in self._index().values()}
+        # ctime, not mtime: stored objects keep their source's mtime
+        cutoff = time.time() - grace
+        removed = 0
+        objects = os.path.join(self.root, "objects")
+        for shard in (os.scandir(objects) if os.path.isdir(objects) else ()):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name in live or entry.name.endswith(".tmp"):
+                    continue  # Still used, or being written by another process
+                try:
+                    if entry.stat().st_ctime > cutoff:
+                        continue  # Possibly staged by a process that has not saved yet
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError as e:
+                    logger.debug(f"Could not remove {entry.path}: {e}")
+        return removed
+
+    # --- Internals ---
+    def _index(self) -> Dict[str, Dict]:
+        if self._digests is None:
+            self._digests = self._read_index()
+        return self._digests
+
+    def _read_index(self) -> Dict[str, Dict]:
+        path = os.path.join(self.root, INDEX_NAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable data store index {path}: {e}")
+        return {}
+
+    def _ingest(self, src: str) -> str:
+        """The stored object for `src`, adding it on first sight."""
+        obj = self.object_path(self.digest(src))
+        if os.path.exists(obj):
+            try:
+                # Refreshes its ctime, so a concurrent prune keeps it
+                os.chmod(obj, _READ_ONLY)
+            except OSError:
+                pass
+            return obj
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        # Cloned or copied, never hard-linked: editing the source later
+        # must not change the stored object.
+        tmp = f"{obj}.{uuid.uuid4().hex}.tmp"
+        try:
+            reflink(src, tmp)
+        except OSError:
+            shutil.copy2(src, tmp)
+        os.chmod(tmp, _READ_ONLY)
+        os.replace(tmp, obj)  # Concurrent writers store identical bytes
+        logger.debug(f"Stored {src} as {os.path.basename(obj)[:12]}")
+        return obj
+
+
+def _same_content(dst: str, obj: str) -> bool:
+    """True when `dst` is (a link to) the object or a copy with the same size and mtime."""
+    try:
+        if os.path.islink(dst):
+            return os.readlink(dst) == os.path.abspath(obj)
+        if not os.path.exists(dst):
+            return False
+        if os.path.samefile(dst, obj):
+            return True
+        a, b = os.stat(dst), os.stat(obj)
+    except OSError:
+        return False
+    return a.st_size == b.st_size and a.st_mtime_ns == b.st_mtime_ns
@@ -0,0 +1,291 @@
+# src/common/equivalence.py
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("Equivalence")
+
+NUMERIC = "numeric"
+STRING = "string"
+
+# R writes logicals as TRUE/FALSE where SPSS has 1/0
+_LOGICALS = {"TRUE": 1.0, "FALSE": 0.0}
+
+
+@dataclass
+class Tolerance:
+    """When two values count as equal."""
+    abs_tol: float = 0.001        # The old single-row check used a fixed 0.001
+    rel_tol: float = 0.0          # Relative to the larger magnitude
+    strip: bool = True            # Ignore surrounding whitespace in strings
+    case_sensitive: bool = False
+    missing_equal: bool = True    # SYSMIS == NA == blank string
+
+
+@dataclass
+class ColumnDiff:
+    name: str
+    kind: str                     # NUMERIC or STRING
+    compared: int
+    mismatches: int
+    max_abs_diff: Optional[float] = None  # Numeric columns only
+
+
+@dataclass
+class EquivalenceReport:
+    """
+    Outcome of comparing two result tables. `examples` lists the first
+    differing rows, one line per differing value: row, column, left, right.
+    """
+    rows_left: int
+    rows_right: int
+    rows_compared: int
+    columns: Dict[str, ColumnDiff] = field(default_factory=dict)
+    only_left: List[str] = field(default_factory=list)   # Columns missing on the right
+    only_right: List[str] = field(default_factory=list)
+    unmatched_left: int = 0       # Rows without a partner (by key or position)
+    unmatched_right: int = 0
+    examples: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=["row", "column", "left", "right"]))
+
+    @property
+    def mismatches(self) -> int:
+        return sum(col.mismatches for col in self.columns.values())
+
+    @property
+    def equivalent(self) -> bool:
+        return bool(self.columns) and self.mismatches == 0 \
+            and self.unmatched_left == 0 and self.unmatched_right == 0
+
+    def mismatched_columns(self) -> Dict[str, int]:
+        return {name: col.mismatches for name, col in self.columns.items() if col.mismatches}
+
+
+class EquivalenceChecker:
+    """
+    Compares two result tables (e.g. PSPP's output against the generated
+    R code's) column by column with NumPy.
+
+    Rows are aligned by position, or by `key` columns when given. Shared
+    columns are compared numerically when both sides are numeric (or the
+    text side parses as numbers), otherwise as normalised strings.
+    `column_tolerances` overrides the default Tolerance per column.
+    """
+
+    def __init__(self, tolerance: Optional[Tolerance] = None,
+                 column_tolerances: Optional[Dict[str, Tolerance]] = None,
+                 max_examples: int = 10):
+        self.tolerance = tolerance or Tolerance()
+        self.column_tolerances = column_tolerances or {}
+        self.max_examples = max_examples
+
+    def compare(self, left: pd.DataFrame, right: pd.DataFrame,
+                key: Optional[Sequence[str]] = None) -> EquivalenceReport:
+        key = list(key or [])
+        for name in key:
+            if name not in left.columns or name not in right.columns:
+                raise ValueError(f"Key column {name} missing from one of the tables")
+
+        shared = [c for c in left.columns if c in right.columns and c not in key]
+        report = EquivalenceReport(
+            rows_left=len(left),
+            rows_right=len(right),
+            rows_compared=0,
+            only_left=[c for c in left.columns if c not in right.columns],
+            only_right=[c for c in right.columns if c not in left.columns],
+        )
+
+        left_rows, right_rows, labels = self._align(left, right, key)
+        n = len(labels)
+        report.rows_compared = n
+        report.unmatched_left = len(left) - n
+        report.unmatched_right = len(right) - n
+
+        masks: Dict[str, np.ndarray] = {}
+        values: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for name in shared:
+            a = _take(left[name], left_rows)
+            b = _take(right[name], right_rows)
+            tol = self.column_tolerances.get(name, self.tolerance)
+            kind, mismatch, max_diff = self._compare_column(a, b, tol)
+            report.columns[name] = ColumnDiff(name, kind, n, int(mismatch.sum()), max_diff)
+            if report.columns[name].mismatches:
+                masks[name] = mismatch
+                values[name] = (a, b)
+
+        if masks and self.max_examples > 0:
+            report.examples = self._examples(masks, values, labels)
+        return report
+
+    # --- Alignment ---
+    def _align(self, left: pd.DataFrame, right: pd.DataFrame, key: List[str]):
+        """
+        Returns (left rows, right rows, row labels): slices for a plain
+        prefix, else positions.
+        """
+        if not key:
+            n = min(len(left), len(right))
+            return slice(0, n), slice(0, n), left.index[:n]
+
+        left_keys = pd.DataFrame({k: _key_values(left[k], right[k]) for k in key})
+        right_keys = pd.DataFrame({k: _key_values(right[k], left[k]) for k in key})
+        if len(key) == 1 and left_keys[key[0]].dtype.kind == "f" \
+                and right_keys[key[0]].dtype.kind == "f":
+            left_pos, right_pos = _match_sorted(left_keys[key[0]].to_numpy(),
+                                                right_keys[key[0]].to_numpy())
+            return left_pos, right_pos, left_keys.iloc[left_pos]
+
+        for side, keys in (("left", left_keys), ("right", right_keys)):
+            if keys.duplicated().any():
+                raise ValueError(f"Duplicate key values in the {side} table")
+
+        if len(left_keys) == len(right_keys) and left_keys.equals(right_keys):
+            n = len(left_keys)
+            return slice(0, n), slice(0, n), left_keys
+
+        pairs = left_keys.assign(_left=np.arange(len(left_keys))).merge(
+            right_keys.assign(_right=np.arange(len(right_keys))), on=key, how="inner", sort=False
+        )
+        return pairs["_left"].to_numpy(), pairs["_right"].to_numpy(), pairs[key]
+
+    # --- Column comparison ---
+    def _compare_column(self, a: np.ndarray, b: np.ndarray, tol: Tolerance):
+        x, y = _numeric(a), _numeric(b)
+        # Text is only read as numbers when the other side is numeric
+        if x is not None and y is None:
+            y = _parse_numbers(b)
+        elif y is not None and x is None:
+            x = _parse_numbers(a)
+        if x is not None and y is not None:
+            return (NUMERIC,) + self._compare_numeric(x, y, tol)
+        return STRING, self._compare_strings(a, b, tol), None
+
+    @staticmethod
+    def _compare_numeric(x: np.ndarray, y: np.ndarray, tol: Tolerance):
+        missing_x, missing_y = np.isnan(x), np.isnan(y)
+        with np.errstate(invalid="ignore"):
+            diff = np.abs(x - y)
+            limit = np.maximum(tol.abs_tol, tol.rel_tol * np.maximum(np.abs(x), np.abs(y)))
+            close = (diff <= limit) | (x == y)  # x == y covers matching infinities
+        both_missing = missing_x & missing_y
+        mismatch = ~close & ~both_missing if tol.missing_equal else ~close
+
+        finite = np.isfinite(diff)
+        max_diff = float(diff[finite].max()) if finite.any() else None
+        return mismatch, max_diff
+
+    @staticmethod
+    def _compare_strings(a: np.ndarray, b: np.ndarray, tol: Tolerance) -> np.ndarray:
+        a, b = _as_text(a), _as_text(b)
+        mismatch = ~(a == b)  # Missing values never compare equal here
+
+        # Normalise only the values that differ verbatim
+        todo = np.flatnonzero(mismatch)
+        if len(todo):
+            na, nb = _normalize_text(a[todo], tol), _normalize_text(b[todo], tol)
+            both_missing = na.isna().to_numpy() & nb.isna().to_numpy()
+            same = (na == nb).fillna(False).to_numpy(dtype=bool)
+            mismatch[todo] = ~(same | (both_missing & tol.missing_equal))
+        return mismatch
+
+    def _examples(self, masks: Dict[str, np.ndarray], values, labels) -> pd.DataFrame:
+        any_row = np.logical_or.reduce(list(masks.values()))
+        records = []
+        for pos in np.flatnonzero(any_row)[: self.max_examples]:
+            for name, mask in masks.items():
+                if mask[pos]:
+                    a, b = values[name]
+                    records.append((_label(labels, pos), name, a[pos], b[pos]))
+        return pd.DataFrame(records, columns=["row", "column", "left", "right"])
+
+
+# --- Helpers ---
+def _take(series: pd.Series, rows) -> np.ndarray:
+    values = series.to_numpy(dtype=object) if series.dtype.kind not in "fiub" else series.to_numpy()
+    return values[rows]
+
+
+def _numeric(values: np.ndarray) -> Optional[np.ndarray]:
+    if values.dtype.kind in "fiub":
+        return values.astype(np.float64, copy=False)
+    return None
+
+
+def _parse_numbers(values: np.ndarray) -> Optional[np.ndarray]:
+    """Text column as float64 when every present value is a number (or TRUE/FALSE)."""
+    text = pd.Series(values, dtype=object)
+    present = text.notna()
+    text = text.where(~present, text.astype(str).str.strip())
+    text = text.replace(_LOGICALS).replace("", np.nan)
+    parsed = pd.to_numeric(text, errors="coerce")
+    if (parsed.isna() & text.notna()).any():
+        return None
+    return parsed.to_numpy(dtype=np.float64)
+
+
+def _as_text(values: np.ndarray) -> np.ndarray:
+    if values.dtype == object:
+        return values
+    # Numbers facing a text column: whole numbers print without '.0'
+    out = values.astype(object)
+    if values.dtype.kind == "f":
+        whole = np.isfinite(values) & (values == np.round(values))
+        out[whole] = values[whole].astype(np.int64).astype(str)
+        out[np.isnan(values)] = np.nan
+    return out
+
+
+def _normalize_text(values: np.ndarray, tol: Tolerance) -> pd.Series:
+    text = pd.Series(values, dtype=object)
+    present = text.notna()
+    text = text.where(~present, text.astype(str))
+    if tol.strip:
+        text = text.str.strip()
+    if not tol.case_sensitive:
+        text = text.str.upper()
+    if tol.missing_equal:
+        text = text.replace("", np.nan)
+    return text
+
+
+def _key_values(series: pd.Series, other: pd.Series) -> pd.Series:
+    """Key column in a form comparable with the other table's (numbers if either is numeric)."""
+    if series.dtype.kind in "fiub":
+        return series.astype(np.float64).reset_index(drop=True)
+    if other.dtype.kind in "fiub":
+        parsed = _parse_numbers(series.to_numpy(dtype=object))
+        if parsed is not None:
+            return pd.Series(parsed)
+    return pd.Series(series.to_numpy(dtype=object)).astype(str).str.strip()
+
+
+def _match_sorted(left: np.ndarray, right: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pairs rows of two numeric key arrays by sorting (much faster than hash
+    joins at this size). Returns matching positions in left-table order.
+    """
+    left_order = np.argsort(left, kind="stable")
+    right_order = np.argsort(right, kind="stable")
+    left_sorted, right_sorted = left[left_order], right[right_order]
+    for side, keys in (("left", left_sorted), ("right", right_sorted)):
+        if (keys[1:] == keys[:-1]).any():
+            raise ValueError(f"Duplicate key values in the {side} table")
+    if not len(right_sorted):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    slots = np.minimum(np.searchsorted(right_sorted, left_sorted), len(right_sorted) - 1)
+    hit = right_sorted[slots] == left_sorted  # NaN keys never match
+    left_pos, right_pos = left_order[hit], right_order[slots[hit]]
+    order = np.argsort(left_pos, kind="stable")
+    return left_pos[order], right_pos[order]
+
+
+def _label(labels, pos: int):
+    """Row label for examples: the file row, or the key value(s)."""
+    if isinstance(labels, pd.DataFrame):
+        row = labels.iloc[pos]
+        return row.iloc[0] if len(row) == 1 else tuple(row)
+    return labels[pos]
@@ -0,0 +1,65 @@
+# src/common/links.py
+import logging
+import os
+import shutil
+import sys
+from typing import Sequence
+
+logger = logging.getLogger("Links")
+
+# Tried in this order for files; directories can only be symlinked or copied
+LINK_METHODS = ("hardlink", "reflink", "symlink", "copy")
+# Linux ioctl that clones a file's extents (btrfs, XFS, bcachefs...)
+_FICLONE = 0x40049409
+
+
+def reflink(src: str, dst: str):
+    """
+    Creates `dst` as a copy-on-write clone of `src`: a separate file that
+    shares the data blocks until one of them is written. Raises OSError
+    where the platform or filesystem has no clones.
+    """
+    if not sys.platform.startswith("linux"):
+        raise OSError(f"reflinks are not supported on {sys.platform}")
+    import fcntl
+
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        try:
+            fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.unlink(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+def link_path(src: str, dst: str, methods: Sequence[str] = LINK_METHODS) -> str:
+    """
+    Makes `src` appear at `dst` without copying where the platform allows,
+    trying `methods` in order: a hard link, a copy-on-write clone, a
+    symlink (directories, other filesystems), and a copy as the last resort.
+    Returns the method used.
+    """
+    unknown = set(methods) - set(LINK_METHODS)
+    if unknown:
+        raise ValueError(f"Unknown link method(s): {', '.join(sorted(unknown))}")
+    is_dir = os.path.isdir(src)
+    for method in methods:
+        try:
+            if method == "hardlink" and not is_dir:
+                os.link(src, dst)
+            elif method == "reflink" and not is_dir:
+                reflink(src, dst)
+            elif method == "symlink":
+                os.symlink(os.path.abspath(src), dst, target_is_directory=is_dir)
+            elif method == "copy":
+                if is_dir:
+                    shutil.copytree(src, dst, symlinks=True)
+                else:
+                    shutil.copy2(src, dst)
+            else:
+                continue  # Hard links and clones are for files only
+            return method
+        except OSError as e:
+            logger.debug(f"Cannot {method} {src} ({e})")
+    raise OSError(f"Could not place {src} at {dst} with any of {', '.join(methods)}")
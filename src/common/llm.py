@@ -1,33 +1,203 @@
 # src/common/llm.py
 import requests
+import hashlib
+import json
 import logging
-from typing import Optional
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Union
 
 logger = logging.getLogger(__name__)
 
+# Cache location. Set to "off" (or "0", "false", "") to disable caching.
+CACHE_ENV_VAR = "STATIFY_LLM_CACHE"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "statify", "llm")
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+_DISABLED_VALUES = {"off", "0", "false", "no", ""}
+
+
+class LLMCache:
+    """
+    Disk-backed, content-addressed store of LLM responses.
+    Each entry is a small JSON file named by the SHA-256 of
+    (model, prompt, options). File mtimes double as LRU timestamps:
+    hits touch the file, and once the directory grows past max_bytes
+    the least recently used entries are evicted.
+    Safe to share between threads and between worker processes.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None  # Lazily measured on first write
+
+    @staticmethod
+    def make_key(model: str, prompt: str, options: Dict) -> str:
+        blob = json.dumps([model, prompt, options], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = json.load(f)["response"]
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError, KeyError, TypeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key: str, text: str):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"response": text}, f, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            try:
+                size -= os.path.getsize(path)  # Overwriting: only the difference is new
+            except OSError:
+                pass
+            os.replace(tmp_path, path)  # Atomic: readers never see partial files
+        except OSError as e:
+            logger.warning(f"LLM cache write failed: {e}")
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._measure()
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".json"):
+                    yield entry
+
+    def _measure(self) -> int:
+        try:
+            return sum(entry.stat().st_size for entry in self._entries())
+        except OSError:
+            return 0
+
+    def _evict(self):
+        """Drops least recently used entries until the cache is at 90% of its budget."""
+        try:
+            entries = sorted(
+                ((e.stat().st_mtime, e.stat().st_size, e.path) for e in self._entries())
+            )
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except OSError:
+                pass  # Already removed by another process
+            total -= size
+        self._size = total
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self):
+        """Removes every entry and resets the size and the counters."""
+        with self._lock:
+            try:
+                entries = list(self._entries())
+            except OSError:
+                entries = []
+            for entry in entries:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            self._size = 0
+            self.hits = self.misses = self.evictions = 0
+
+
+_default_caches: Dict[str, LLMCache] = {}
+_default_lock = threading.Lock()
+
+
+def default_cache() -> Optional[LLMCache]:
+    """
+    Process-wide cache shared by every client (so counters aggregate).
+    Location comes from STATIFY_LLM_CACHE; returns None when disabled.
+    """
+    setting = os.environ.get(CACHE_ENV_VAR, DEFAULT_CACHE_DIR)
+    if setting.strip().lower() in _DISABLED_VALUES:
+        return None
+    with _default_lock:
+        if setting not in _default_caches:
+            _default_caches[setting] = LLMCache(setting)
+        return _default_caches[setting]
+
+
 class OllamaClient:
     def __init__(
         self,
         model: str = "mistral:instruct",
         endpoint: str = "http://localhost:11434/api/generate",
-        timeout: int = 120  # Increased default timeout
+        timeout: int = 120,  # Increased default timeout
+        cache: Union[LLMCache, bool, None] = None,
+        num_ctx: Optional[int] = None,
     ):
         self.model = model
         self.endpoint = endpoint
         self.timeout = timeout
+        # Context window requested from Ollama (None = the model's configured one)
+        self.num_ctx = num_ctx
+        self._context_length: Optional[int] = None
+        # None -> shared default cache (unless disabled via env), False -> no cache
+        if cache is None or cache is True:
+            self.cache = default_cache()
+        else:
+            self.cache = cache or None
 
     def generate(self, prompt: str, max_tokens: int = 500) -> str:
         """
         Generates text from Ollama. Raises Exception on failure.
         """
         headers = {"Content-Type": "application/json"}
+        options = {"temperature": 0.1, "num_predict": max_tokens}
+        if self.num_ctx:
+            options["num_ctx"] = self.num_ctx
         payload = {
             "model": self.model,
             "prompt": prompt,
             "stream": False,
-            "options": {"temperature": 0.1, "num_predict": max_tokens},
+            "options": options,
         }
-        
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = LLMCache.make_key(self.model, prompt, options)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         try:
             response = requests.post(
                 self.endpoint, 
@@ -41,6 +211,9 @@ class OllamaClient:
             # Clean generic markdown quotes
             if text.startswith('"') and text.endswith('"'):
                 text = text[1:-1]
+
+            if cache_key is not None and text:
+                self.cache.put(cache_key, text)
             return text
             
         except requests.exceptions.ReadTimeout:
@@ -48,4 +221,64 @@ class OllamaClient:
             raise
         except Exception as e:
             logger.error(f"Ollama Error: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def context_length(self) -> Optional[int]:
+        """
+        Tokens the model sees per request: num_ctx when one was requested,
+        else the num_ctx the model is configured with (Ollama's /api/show).
+        None when the server doesn't say; the answer is remembered.
+        """
+        if self.num_ctx:
+            return self.num_ctx
+        if self._context_length is None:
+            show_endpoint = self.endpoint.rsplit("/api/", 1)[0] + "/api/show"
+            try:
+                response = requests.post(show_endpoint, json={"model": self.model},
+                                         timeout=self.timeout)
+                response.raise_for_status()
+                parameters = response.json().get("parameters") or ""
+            except Exception as e:
+                logger.debug(f"Could not read the context window of {self.model}: {e}")
+                return None
+            for line in parameters.splitlines():
+                name, _, value = line.strip().partition(" ")
+                if name == "num_ctx" and value.strip().isdigit():
+                    self._context_length = int(value.strip())
+            self._context_length = self._context_length or 0
+        return self._context_length or None
+
+
+def generate_concurrently(
+    client,
+    prompts: Sequence[str],
+    max_in_flight: int = 4,
+    max_tokens: Optional[Sequence[Optional[int]]] = None,
+) -> List[Optional[str]]:
+    """
+    Sends prompts through client.generate with at most max_in_flight
+    requests open at once. Results come back in prompt order; a prompt
+    whose request failed yields None so callers can apply their fallback.
+    `max_tokens` optionally gives each prompt its own answer budget
+    (None entries keep the client's default).
+    """
+    budgets = list(max_tokens) if max_tokens is not None else [None] * len(prompts)
+
+    def _call(job) -> Optional[str]:
+        prompt, budget = job
+        try:
+            if budget is None:
+                return client.generate(prompt)
+            return client.generate(prompt, max_tokens=budget)
+        except Exception:
+            logger.warning("LLM request failed; the caller falls back for this prompt.",
+                           exc_info=True)
+            return None
+
+    jobs = list(zip(prompts, budgets))
+    if max_in_flight <= 1 or len(jobs) <= 1:
+        return [_call(job) for job in jobs]
+
+    with ThreadPoolExecutor(max_workers=min(max_in_flight, len(jobs))) as pool:
+        # map() preserves submission order regardless of completion order
+        return list(pool.map(_call, jobs))
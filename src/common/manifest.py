@@ -0,0 +1,119 @@
+# src/common/manifest.py
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger("BuildManifest")
+
+MANIFEST_NAME = ".statify-manifest.json"
+# Bump when the generated artifacts change shape, to invalidate old builds.
+MANIFEST_VERSION = 1
+_READ_SIZE = 1 << 20
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    Records, per source file, the content hashes of everything that went
+    into its artifacts: the script itself, its data dependencies and the
+    tool configuration. A file is up to date when all of them match the
+    last successful build, much like a make rule.
+
+    File hashes are memoised on (size, mtime) so unchanged data files are
+    not re-read on every run.
+    """
+
+    def __init__(self, output_root: str):
+        self.path = os.path.join(output_root, MANIFEST_NAME)
+        self.entries: Dict[str, Dict] = {}
+        self._digests: Dict[str, Dict] = {}  # abs path -> {size, mtime, sha256}
+
+    @classmethod
+    def load(cls, output_root: str) -> "BuildManifest":
+        manifest = cls(output_root)
+        try:
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return manifest
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {manifest.path}: {e}")
+            return manifest
+
+        if data.get("version") != MANIFEST_VERSION:
+            logger.info("Manifest version changed; rebuilding everything.")
+            return manifest
+        manifest.entries = data.get("files", {})
+        manifest._digests = data.get("digests", {})
+        return manifest
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": MANIFEST_VERSION, "files": self.entries, "digests": self._digests},
+                f, indent=2, sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+
+    def file_digest(self, path: str) -> Optional[str]:
+        """SHA-256 of a file (None if missing), memoised on its size and mtime."""
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        known = self._digests.get(path)
+        if known and known["size"] == st.st_size and known["mtime"] == st.st_mtime_ns:
+            return known["sha256"]
+        digest = _sha256_file(path)
+        self._digests[path] = {"size": st.st_size, "mtime": st.st_mtime_ns, "sha256": digest}
+        return digest
+
+    def fingerprint(self, source_path: str, inputs: Iterable[str], config: Dict) -> Dict:
+        """
+        Describes the current inputs of one source file.
+        `inputs` are data files as referenced by the script (relative to it).
+        """
+        source_dir = os.path.dirname(source_path)
+        return {
+            "source": self.file_digest(source_path),
+            "inputs": {name: self.file_digest(os.path.join(source_dir, name))
+                       for name in sorted(inputs)},
+            "config": config,
+        }
+
+    def is_current(self, relative_path: str, fingerprint: Dict,
+                   outputs: Iterable[str] = ()) -> bool:
+        """True when the last successful build saw identical inputs and its outputs still exist."""
+        if self.entries.get(relative_path) != fingerprint:
+            return False
+        return all(os.path.exists(path) for path in outputs)
+
+    def is_unchanged(self, relative_path: str, source_path: str, config: Dict,
+                     outputs: Iterable[str] = ()) -> bool:
+        """
+        is_current without parsing the script: an unchanged script still
+        reads the inputs recorded for it, so only their hashes are checked.
+        """
+        entry = self.entries.get(relative_path)
+        if entry is None:
+            return False
+        fingerprint = self.fingerprint(source_path, entry.get("inputs", {}), config)
+        return self.is_current(relative_path, fingerprint, outputs)
+
+    def record(self, relative_path: str, fingerprint: Dict):
+        self.entries[relative_path] = fingerprint
+
+    def forget(self, relative_path: str):
+        self.entries.pop(relative_path, None)
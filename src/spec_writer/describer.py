@@ -1,60 +1,133 @@
 from typing import Dict, List, Optional
+import json
 import logging
-from common.llm import OllamaClient
+import re
+from common.llm import OllamaClient, generate_concurrently
 from spss_engine.state import StateMachine, VariableVersion
 from spec_writer.conductor import Conductor
 
 GENERATE_TITLE_PROMPT = "Generate a short, business-friendly title for this logic cluster. Context: {context}"
 DESCRIBE_NODE_PROMPT = "Explain the business logic of this SPSS command in plain English. Code: {code}"
+DESCRIBE_BATCH_PROMPT = (
+    "Explain the business logic of each numbered SPSS command below in plain English, "
+    "in one or two sentences each.\n"
+    "Answer with only a JSON object mapping each number to its explanation, "
+    "like {{\"1\": \"...\", \"2\": \"...\"}}.\n\n"
+    "{items}"
+)
+
+# Batch sizing: a rough 4 characters per token, and room for each answer.
+# Batched answers also spend tokens on JSON syntax (keys, quotes, braces,
+# a code fence). DEFAULT_CONTEXT_TOKENS applies when the model's is unknown.
+DEFAULT_CONTEXT_TOKENS = 4096
+CHARS_PER_TOKEN = 4
+ANSWER_TOKENS_PER_NODE = 80
+JSON_TOKENS_PER_NODE = 8
+JSON_TOKENS_PER_ANSWER = 16
+
+_NUMBERED_LINE = re.compile(r"^\s*[*#-]*\s*\**\s*(\d+)\s*[.):\]]\**\s*(.*)$")
+# One complete '"N": "..."' member of a (possibly truncated) JSON object
+_JSON_MEMBER = re.compile(r'"(\d+)"\s*:\s*"((?:[^"\\]|\\.)*)"')
 
 logger = logging.getLogger("SpecGenerator")
 
 class SpecGenerator:
-    def __init__(self, state_machine: StateMachine, llm_client: OllamaClient):
+    def __init__(self, state_machine: StateMachine, llm_client: OllamaClient,
+                 max_in_flight: int = 4, batch_size: int = 1,
+                 context_tokens: Optional[int] = None):
         self.state_machine = state_machine
         self.llm_client = llm_client
         self.conductor = Conductor(state_machine)
+        # Upper bound on concurrent LLM requests (1 = strictly sequential)
+        self.max_in_flight = max_in_flight
+        # Nodes described per prompt (1 = one prompt per node). Batches are
+        # also kept within the model's context window (asked of the client
+        # when not given).
+        self.batch_size = batch_size
+        self.context_tokens = context_tokens
 
     def generate_report(self, dead_ids: List[str] = None, runtime_values: Dict[str, str] = None) -> str:
         if dead_ids is None: dead_ids = []
         if runtime_values is None: runtime_values = {}
+        dead_ids = set(dead_ids)
 
-        clusters = self.conductor.identify_clusters()
-        report_parts = ["# Business Logic Specification", ""]
-
-        for i, cluster_node_ids in enumerate(clusters):
+        # 1. Plan every chapter first so all prompts are known up front
+        chapters = []  # (chapter_num, title_prompt, [nodes])
+        for i, cluster_node_ids in enumerate(self.conductor.identify_clusters()):
             if not cluster_node_ids:
                 continue
 
-            chapter_num = i + 1
-            
-            # 1. Generate Chapter Title
-            context_nodes = cluster_node_ids[:5] 
+            context_nodes = cluster_node_ids[:5]
             context_str = " ".join([self._get_node_source(nid) for nid in context_nodes])
-            
             title_prompt = GENERATE_TITLE_PROMPT.format(context=context_str)
-            try:
-                chapter_title = self.llm_client.generate(title_prompt).strip()
-            except Exception:
-                chapter_title = "Logic Cluster"
 
-            if not chapter_title or "Generated" in chapter_title: 
+            nodes = []
+            for node_id in self.conductor._topological_sort(cluster_node_ids):
+                if node_id in dead_ids: continue
+                node = self._find_node_by_id(node_id)
+                if node: nodes.append(node)
+
+            chapters.append((i + 1, title_prompt, nodes))
+
+        # 2. Send titles and node descriptions concurrently (bounded)
+        nodes = [node for _, _, chapter_nodes in chapters for node in chapter_nodes]
+        batches = self._plan_batches(nodes)
+        batch_at = {batch[0]: b for b, batch in enumerate(batches)}
+        prompts, budgets, slots = [], [], []  # slot: ("title", chapter) or ("batch", batch)
+        position = 0
+        for c, (_, title_prompt, chapter_nodes) in enumerate(chapters):
+            prompts.append(title_prompt)
+            budgets.append(None)
+            slots.append(("title", c))
+            for _ in chapter_nodes:
+                if position in batch_at:
+                    batch = batches[batch_at[position]]
+                    prompts.append(self._batch_prompt([nodes[i] for i in batch]))
+                    budgets.append(None if len(batch) == 1 else _answer_budget(len(batch)))
+                    slots.append(("batch", batch_at[position]))
+                position += 1
+        answers = generate_concurrently(self.llm_client, prompts, self.max_in_flight, budgets)
+
+        titles: List[Optional[str]] = [None] * len(chapters)
+        descriptions: List[Optional[str]] = [None] * len(nodes)
+        retry = []
+        for (kind, index), answer in zip(slots, answers):
+            if kind == "title":
+                titles[index] = answer
+                continue
+            batch = batches[index]
+            if len(batch) == 1:
+                descriptions[batch[0]] = answer.strip() if answer is not None else None
+                continue
+            parsed = _parse_batch_answer(answer or "", len(batch))
+            for number, i in enumerate(batch, 1):
+                if parsed.get(number):
+                    descriptions[i] = parsed[number]
+                else:
+                    retry.append(i)
+
+        # Items a batched answer missed are asked for one by one
+        if retry:
+            logger.info(f"{len(retry)} node description(s) missing from batched answers; "
+                        "asking per node.")
+            single = [DESCRIBE_NODE_PROMPT.format(code=nodes[i].source) for i in retry]
+            answers = generate_concurrently(self.llm_client, single, self.max_in_flight)
+            for i, answer in zip(retry, answers):
+                descriptions[i] = answer.strip() if answer is not None else None
+
+        # 3. Reassemble in report order
+        report_parts = ["# Business Logic Specification", ""]
+        described = iter(descriptions)
+        for (chapter_num, _, chapter_nodes), title in zip(chapters, titles):
+            chapter_title = (title or "").strip()
+            if not chapter_title or "Generated" in chapter_title:
                  chapter_title = "Logic Cluster"
 
             report_parts.append(f"## Chapter {chapter_num}: {chapter_title}")
-            
-            # 2. Describe Nodes
-            sorted_ids = self.conductor._topological_sort(cluster_node_ids)
-            
-            for node_id in sorted_ids:
-                if node_id in dead_ids: continue
-                
-                node = self._find_node_by_id(node_id)
-                if not node: continue
 
-                try:
-                    description = self._describe_node(node)
-                except Exception:
+            for node in chapter_nodes:
+                description = next(described)
+                if description is None:
                     description = "Logic description unavailable."
 
                 report_parts.append(f"* **{node.id}**: {description}")
@@ -65,16 +138,100 @@ class SpecGenerator:
 
         return "\n".join(report_parts)
 
+    def _plan_batches(self, nodes: List[VariableVersion]) -> List[List[int]]:
+        """
+        Groups node positions into prompts of at most batch_size nodes whose
+        estimated size (commands plus room for the answers) fits the context
+        window. A node too large to share a prompt is asked about alone.
+        """
+        if self.batch_size <= 1:
+            return [[i] for i in range(len(nodes))]
+        window = self._context_window()
+        header = _estimate_tokens(DESCRIBE_BATCH_PROMPT.format(items="")) + _answer_budget(0)
+        batches, current, used = [], [], header
+        for i, node in enumerate(nodes):
+            cost = _estimate_tokens(node.source) + ANSWER_TOKENS_PER_NODE + JSON_TOKENS_PER_NODE
+            if current and (len(current) >= self.batch_size or used + cost > window):
+                batches.append(current)
+                current, used = [], header
+            current.append(i)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _context_window(self) -> int:
+        if self.context_tokens is None:
+            tokens = getattr(self.llm_client, "context_length", lambda: None)()
+            known = isinstance(tokens, int) and tokens > 0
+            self.context_tokens = tokens if known else DEFAULT_CONTEXT_TOKENS
+        return self.context_tokens
+
+    @staticmethod
+    def _batch_prompt(nodes: List[VariableVersion]) -> str:
+        if len(nodes) == 1:
+            return DESCRIBE_NODE_PROMPT.format(code=nodes[0].source)
+        items = "\n".join(f"{n}. {node.source.strip()}" for n, node in enumerate(nodes, 1))
+        return DESCRIBE_BATCH_PROMPT.format(items=items)
+
     def _find_node_by_id(self, node_id: str) -> Optional[VariableVersion]:
-        for node in self.state_machine.nodes:
-            if node.id == node_id:
-                return node
-        return None
+        return self.state_machine.get_node(node_id)
 
     def _get_node_source(self, node_id: str) -> str:
         node = self._find_node_by_id(node_id)
         return node.source if node else ""
 
-    def _describe_node(self, node: VariableVersion) -> str:
-        prompt = DESCRIBE_NODE_PROMPT.format(code=node.source)
-        return self.llm_client.generate(prompt).strip()
\ No newline at end of file
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _answer_budget(count: int) -> int:
+    """Answer tokens for a batch of `count` nodes, JSON syntax included."""
+    return count * (ANSWER_TOKENS_PER_NODE + JSON_TOKENS_PER_NODE) + JSON_TOKENS_PER_ANSWER
+
+
+def _parse_batch_answer(text: str, count: int) -> Dict[int, str]:
+    """
+    Per-item descriptions (1-based) from a batched answer: a JSON object
+    keyed by number (possibly inside a code fence), a JSON list, the
+    complete '"N": "..."' members of a JSON object cut off mid-answer, or
+    numbered lines ("1. ...", "2) ..."). Items it cannot find are omitted,
+    including one whose text was cut off.
+    """
+    found: Dict[int, str] = {}
+    data = _json_in(text)
+    if isinstance(data, dict):
+        for key, value in data.items():
+            number = re.search(r"\d+", str(key))
+            if number and isinstance(value, str):
+                found[int(number.group())] = value.strip()
+    elif isinstance(data, list) and len(data) == count:
+        found = {n: value.strip() for n, value in enumerate(data, 1) if isinstance(value, str)}
+    elif _JSON_MEMBER.search(text):
+        for number, value in _JSON_MEMBER.findall(text):
+            try:
+                found[int(number)] = json.loads(f'"{value}"').strip()
+            except ValueError:
+                continue
+    else:
+        current = None
+        for line in text.splitlines():
+            match = _NUMBERED_LINE.match(line)
+            if match:
+                current = int(match.group(1))
+                found[current] = match.group(2).strip()
+            elif current is not None and line.strip():
+                found[current] = f"{found[current]} {line.strip()}".strip()
+    return {n: value for n, value in found.items() if 1 <= n <= count and value}
+
+
+def _json_in(text: str):
+    for opening, closing in (("{", "}"), ("[", "]")):
+        start, end = text.find(opening), text.rfind(closing)
+        if start != -1 and end > start:
+            try:
+                return json.loads(text[start:end + 1])
+            except ValueError:
+                continue
+    return None
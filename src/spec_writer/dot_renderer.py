@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import os
+import subprocess
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger("DotRenderer")
+
+# Characters of streamed DOT source encoded and hashed at a time
+_BLOCK_CHARS = 1 << 16
+
+
+@dataclass
+class RenderResult:
+    output_path: str              # As submitted (without extension)
+    output_file: Optional[str]    # The rendered image, if any
+    ok: bool
+    skipped: bool = False         # Image already matched the DOT source
+    error: Optional[str] = None
+
+
+class BatchRenderer:
+    """
+    Renders many DOT graphs with few 'dot' processes.
+
+    Submitted graphs are queued and rendered `batch_size` at a time by a
+    single 'dot -O' call, with at most `workers` calls running at once.
+    Each graph's DOT source is kept next to its image (<output>.dot); a
+    graph whose source hash matches the one already rendered is skipped.
+    When a batched call fails, the graphs it did not render are retried
+    one per process, so every graph gets its own result or error.
+    """
+
+    def __init__(self, executable: str = "dot", fmt: str = "png", workers: int = 2,
+                 batch_size: int = 16, timeout: Optional[float] = 120):
+        self.executable = executable
+        self.fmt = fmt
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.processes_started = 0
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._lock = threading.Lock()
+        self._queued: List[Tuple[str, str, Future]] = []  # (dot path, output path, future)
+        self._pending: List[Future] = []
+
+    def submit(self, dot_source: Union[str, Iterable[str]],
+               output_path: str) -> "Future[RenderResult]":
+        """
+        Queues one graph; `output_path` is the image path without extension.
+        The source may be a string or an iterable of text chunks (e.g.
+        GraphGenerator.iter_dot), which is streamed to disk as it is hashed.
+        """
+        future: "Future[RenderResult]" = Future()
+        with self._lock:
+            self._pending.append(future)
+
+        output_file = f"{output_path}.{self.fmt}"
+        dot_path = f"{output_path}.dot"
+        tmp_path = f"{dot_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            digest = _write_source(dot_source, tmp_path)
+            if os.path.exists(output_file) and _file_digest(dot_path) == digest:
+                os.remove(tmp_path)
+                future.set_result(RenderResult(output_path, output_file, True, skipped=True))
+                return future
+            os.replace(tmp_path, dot_path)
+            _remove(f"{dot_path}.{self.fmt}")  # Leftover of an interrupted run
+        except OSError as e:
+            _remove(tmp_path)
+            future.set_result(RenderResult(output_path, None, False, error=str(e)))
+            return future
+
+        with self._lock:
+            self._queued.append((dot_path, output_path, future))
+            if len(self._queued) >= self.batch_size:
+                self._dispatch()
+        return future
+
+    def flush(self) -> List[RenderResult]:
+        """Renders everything still queued and waits for all submitted graphs."""
+        with self._lock:
+            self._dispatch()
+            pending, self._pending = self._pending, []
+        return [future.result() for future in pending]
+
+    def render_batch(self, jobs: Iterable[Tuple[str, str]]) -> List[RenderResult]:
+        """Renders (dot_source, output_path) jobs; results come back in input order."""
+        futures = [self.submit(source, path) for source, path in jobs]
+        self.flush()
+        return [future.result() for future in futures]
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Internals ---
+    def _dispatch(self):
+        """Hands the queued graphs to the pool as one batch (caller holds the lock)."""
+        if self._queued:
+            batch, self._queued = self._queued, []
+            self._executor.submit(self._render, batch)
+
+    def _render(self, batch: List[Tuple[str, str, Future]]):
+        error = self._run_dot([dot_path for dot_path, _, _ in batch])
+        for dot_path, output_path, future in batch:
+            try:
+                rendered = self._collect(dot_path, output_path)
+                if not rendered and len(batch) > 1:
+                    # The batch stopped early; render this one alone for its own error
+                    error = self._run_dot([dot_path])
+                    rendered = self._collect(dot_path, output_path)
+                future.set_result(self._result(dot_path, output_path, rendered, error))
+            except Exception as e:
+                future.set_result(RenderResult(output_path, None, False, error=str(e)))
+
+    def _run_dot(self, dot_paths: List[str]) -> Optional[str]:
+        """Runs one 'dot' process over the files; returns its error, if any."""
+        with self._lock:
+            self.processes_started += 1
+        timeout = None if self.timeout is None else self.timeout * len(dot_paths)
+        try:
+            proc = subprocess.run(
+                [self.executable, f"-T{self.fmt}", "-O", *dot_paths],
+                capture_output=True, text=True, timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return f"dot timed out after {timeout}s"
+        except OSError as e:
+            return f"Cannot run {self.executable}: {e}"
+        if proc.returncode != 0:
+            return proc.stderr.strip() or f"dot exited with code {proc.returncode}"
+        return None
+
+    def _collect(self, dot_path: str, output_path: str) -> bool:
+        """Moves dot's <output>.dot.<fmt> to <output>.<fmt>; False if it was not rendered."""
+        produced = f"{dot_path}.{self.fmt}"
+        if not os.path.exists(produced):
+            return False
+        os.replace(produced, f"{output_path}.{self.fmt}")
+        return True
+
+    def _result(self, dot_path: str, output_path: str, rendered: bool,
+                error: Optional[str]) -> RenderResult:
+        if rendered:
+            output_file = f"{output_path}.{self.fmt}"
+            logger.info(f"Graph rendered to {output_file}")
+            return RenderResult(output_path, output_file, True)
+        # Without an image the source must not mark the graph as rendered
+        _remove(dot_path)
+        error = error or "dot produced no output"
+        logger.debug(f"Failed to render {output_path}: {error}")
+        return RenderResult(output_path, None, False, error=error)
+
+
+def _write_source(dot_source: Union[str, Iterable[str]], path: str) -> str:
+    """Writes the DOT text to `path` and returns its SHA-256."""
+    digest = hashlib.sha256()
+    chunks = [dot_source] if isinstance(dot_source, str) else dot_source
+    with open(path, "wb") as f:
+        def _flush(block: List[str]):
+            data = "".join(block).encode("utf-8")
+            digest.update(data)
+            f.write(data)
+
+        # Lines are gathered into larger blocks before encoding and hashing
+        block, size = [], 0
+        for chunk in chunks:
+            block.append(chunk)
+            size += len(chunk)
+            if size >= _BLOCK_CHARS:
+                _flush(block)
+                block, size = [], 0
+        _flush(block)
+    return digest.hexdigest()
+
+
+def _file_digest(path: str) -> Optional[str]:
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
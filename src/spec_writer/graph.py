@@ -1,70 +1,444 @@
 from spss_engine.state import StateMachine, VariableVersion
-from typing import List, Optional
+from spec_writer.dot_renderer import BatchRenderer, RenderResult
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
 import graphviz
+import json
 import os
+import re
+import subprocess
+import tempfile
 import logging
 
 logger = logging.getLogger("GraphGenerator")
 
+# Above this many nodes a full Graphviz layout takes minutes; statify
+# switches to the summarised view plus the layout-free JSON/SVG export.
+LARGE_GRAPH_NODES = 2000
+
+# Characters buffered before each write when streaming DOT
+_WRITE_BUFFER = 1 << 16
+
+_PLAIN_ID = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Layout-free SVG geometry (pixels)
+_SVG_COL = 260
+_SVG_ROW = 56
+_SVG_BOX_W = 220
+_SVG_BOX_H = 40
+
+
+@dataclass
+class GraphNode:
+    """One box of the drawn graph: a version, a collapsed chain or an 'N more' summary."""
+    key: str
+    label: str
+    cluster: int = 0
+    dead: bool = False
+    members: List[str] = field(default_factory=list)  # Version ids shown by this box
+    summary: bool = False
+
+
+@dataclass
+class GraphView:
+    nodes: List[GraphNode] = field(default_factory=list)
+    edges: List[Tuple[str, str]] = field(default_factory=list)  # (source key, target key)
+
+
 class GraphGenerator:
-    def __init__(self, state_machine: StateMachine):
+    """
+    Draws a StateMachine. By default every version is one node labelled
+    with its full source, in one flat digraph. For large machines:
+
+      clustered  - one subgraph per ClusterMetadata (dataset scope)
+      collapse   - one node per variable and cluster instead of per version
+      max_label  - truncate source text in labels to this many characters
+      max_nodes  - keep at most this many nodes per cluster (or overall when
+                   not clustered); the rest become one "N more" node
+
+    export_json / export_svg write the same view without running Graphviz.
+    """
+
+    def __init__(self, state_machine: StateMachine, clustered: bool = False, collapse: bool = False,
+                 max_label: Optional[int] = None, max_nodes: Optional[int] = None):
         self.state_machine = state_machine
+        self.clustered = clustered
+        self.collapse = collapse
+        self.max_label = max_label
+        self.max_nodes = max_nodes
 
-    def _sanitize_label(self, label: str) -> str:
-        return label.replace('"', '\\"').replace('\n', '\\n')
+    @classmethod
+    def summarised(cls, state_machine: StateMachine) -> "GraphGenerator":
+        """Settings that keep very large machines readable (and quick to lay out)."""
+        return cls(state_machine, clustered=True, collapse=True, max_label=60, max_nodes=40)
 
+    def _truncate(self, text: str) -> str:
+        if self.max_label is not None and len(text) > self.max_label:
+            return text[: max(0, self.max_label - 3)] + "..."
+        return text
+
+    # --- View ---
+    def build_view(self, highlight_dead: List[str] = None) -> GraphView:
+        """Nodes and edges as drawn, after clustering, collapsing and capping."""
+        dead = set(highlight_dead or [])
+        view = GraphView()
+        groups: Dict[str, GraphNode] = {}
+        node_keys: Dict[int, str] = {}  # Node index -> drawn key
+
+        for node in self.state_machine.nodes:
+            key = self._group_key(node)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = GraphNode(key, "", node.cluster_index)
+                view.nodes.append(group)
+            group.members.append(node.id)
+            # Outside collapse mode a repeated id is the same DOT node;
+            # the last definition labels it
+            group.label = self._label(node, len(group.members) if self.collapse else 1)
+            node_keys[node.index] = key
+
+        for group in view.nodes:
+            group.dead = all(member in dead for member in group.members)
+
+        # Cap the number of boxes per cluster (or overall)
+        redirect: Dict[str, str] = {}
+        if self.max_nodes is not None:
+            view.nodes = self._cap(view.nodes, redirect)
+
+        seen = set()
+        for node in self.state_machine.nodes:
+            target = redirect.get(node_keys[node.index], node_keys[node.index])
+            for dep in self.state_machine.get_dependencies(node):
+                if not isinstance(dep, VariableVersion):
+                    # Handle Case Sensitivity and Object vs String
+                    dep = self.state_machine.get_node(str(dep).upper()) or str(dep).upper()
+                if isinstance(dep, VariableVersion) and dep.index in node_keys \
+                        and self.state_machine.nodes[dep.index] is dep:
+                    source = node_keys[dep.index]
+                else:
+                    source = str(dep)
+                source = redirect.get(source, source)
+                edge = (source, target)
+                if source != target and edge not in seen:
+                    seen.add(edge)
+                    view.edges.append(edge)
+        return view
+
+    def _group_key(self, node: VariableVersion) -> str:
+        if self.collapse:
+            return f"C{node.cluster_index}_{node.name}"
+        if self.clustered:
+            return f"C{node.cluster_index}_{node.id}"
+        return node.id
+
+    def _label(self, node: VariableVersion, versions: int) -> str:
+        source = self._truncate(node.source)
+        if versions > 1:
+            # Collapsed chain: the variable, how often it changes, its last definition
+            return f"{node.name} ({versions} versions)\n{source}"
+        return f"{node.id}\n{source}"
+
+    def _cap(self, nodes: List[GraphNode], redirect: Dict[str, str]) -> List[GraphNode]:
+        kept: List[GraphNode] = []
+        counts: Dict[int, int] = {}
+        summaries: Dict[int, GraphNode] = {}
+        for group in nodes:
+            scope = group.cluster if self.clustered else 0
+            counts[scope] = counts.get(scope, 0) + 1
+            if counts[scope] <= self.max_nodes:
+                kept.append(group)
+                continue
+            summary = summaries.get(scope)
+            if summary is None:
+                key = f"C{scope}_MORE" if self.clustered else "MORE"
+                summary = summaries[scope] = GraphNode(key, "", scope, summary=True)
+                kept.append(summary)
+            summary.members.extend(group.members)
+            redirect[group.key] = summary.key
+        for scope, summary in summaries.items():
+            hidden = counts[scope] - self.max_nodes
+            summary.label = f"... {hidden} more node{'s' if hidden != 1 else ''}"
+        return kept
+
+    # --- DOT ---
     def generate_dot(self, highlight_dead: List[str] = None) -> str:
         """
         Generates the DOT source code for the state machine.
         """
-        if highlight_dead is None: highlight_dead = []
-        
-        dot = ["digraph StateMachine {"]
-        dot.append('    rankdir=LR;')
-        dot.append('    node [shape=box fontname="Courier"];')
+        return "".join(self.iter_dot(highlight_dead)).rstrip("\n")
+
+    def iter_dot(self, highlight_dead: List[str] = None) -> Iterator[str]:
+        """
+        Yields the DOT source one line at a time (newline included), so
+        callers can write it out without holding the whole text.
+        """
+        yield "digraph StateMachine {\n"
+        yield "    rankdir=LR;\n"
+        yield '    node [shape=box fontname="Courier"];\n'
+        if self.clustered or self.collapse or self.max_nodes is not None:
+            yield from self._iter_view_dot(self.build_view(highlight_dead))
+        else:
+            yield from self._iter_flat_dot(set(highlight_dead or []))
+        yield "}\n"
+
+    def write_dot(self, out: TextIO, highlight_dead: List[str] = None,
+                  buffer_size: int = _WRITE_BUFFER) -> int:
+        """
+        Streams the DOT source to a text stream (a file, a pipe, or a socket's
+        makefile("w")) in blocks of about `buffer_size` characters.
+        Returns the number of characters written.
+        """
+        written, size, block = 0, 0, []
+        for line in self.iter_dot(highlight_dead):
+            block.append(line)
+            size += len(line)
+            if size >= buffer_size:
+                out.write("".join(block))
+                written, size, block = written + size, 0, []
+        out.write("".join(block))
+        out.flush()
+        return written + size
 
+    def _iter_flat_dot(self, dead: set) -> Iterator[str]:
+        """Default mode, straight from the state machine (no intermediate view)."""
         # 1. Define Nodes
         for node in self.state_machine.nodes:
-            label = f"{node.id}\\n{self._sanitize_label(node.source)}"
-            
             style_attrs = ""
-            if node.id in highlight_dead:
+            if node.id in dead:
                 style_attrs = ' color="red" fontcolor="red" style="dashed"'
-            
-            dot.append(f'    {node.id} [label="{label}"{style_attrs}];')
+            label = f"{node.id}\\n{_escape(self._truncate(node.source))}"
+            yield f'    {_dot_id(node.id)} [label="{label}"{style_attrs}];\n'
 
         # 2. Define Edges
         for node in self.state_machine.nodes:
-            for dep in node.dependencies:
-                # Handle Case Sensitivity and Object vs String
-                if isinstance(dep, VariableVersion):
-                    dep_id = dep.id
-                else:
-                    dep_id = str(dep).upper()
-                
+            seen = set()
+            for dep in self.state_machine.get_dependencies(node):
+                dep_id = self._dependency_id(dep)
+                if dep_id in seen or dep_id == node.id:
+                    continue
+                seen.add(dep_id)
                 edge_style = "dashed constraint=false color=blue"
-                if node.id in highlight_dead or dep_id in highlight_dead:
+                if node.id in dead or dep_id in dead:
                     edge_style = "dotted constraint=false color=red"
+                yield f'    {_dot_id(dep_id)} -> {_dot_id(node.id)} [style={edge_style}];\n'
+
+    def _dependency_id(self, dep) -> str:
+        if isinstance(dep, VariableVersion):
+            return dep.id
+        # Handle Case Sensitivity and Object vs String
+        return str(dep).upper()
+
+    def _iter_view_dot(self, view: GraphView) -> Iterator[str]:
+        dead = {group.key for group in view.nodes if group.dead}
+
+        # 1. Define Nodes (one subgraph per cluster when clustered)
+        if self.clustered:
+            metadata = {c.index: c for c in self.state_machine.clusters}
+            by_cluster: Dict[int, List[GraphNode]] = {}
+            for group in view.nodes:
+                by_cluster.setdefault(group.cluster, []).append(group)
+            for index, groups in by_cluster.items():
+                yield f'    subgraph cluster_{index} {{\n'
+                label = _escape(self._cluster_label(metadata.get(index), index))
+                yield f'        label="{label}";\n'
+                for group in groups:
+                    yield "    " + self._node_line(group)
+                yield '    }\n'
+        else:
+            for group in view.nodes:
+                yield self._node_line(group)
+
+        # 2. Define Edges
+        for source, target in view.edges:
+            edge_style = "dashed constraint=false color=blue"
+            if source in dead or target in dead:
+                edge_style = "dotted constraint=false color=red"
+            yield f'    {_dot_id(source)} -> {_dot_id(target)} [style={edge_style}];\n'
+
+    def _node_line(self, group: GraphNode) -> str:
+        style_attrs = ""
+        if group.dead:
+            style_attrs = ' color="red" fontcolor="red" style="dashed"'
+        elif group.summary:
+            style_attrs = ' style="dotted" color="gray40"'
+        return f'    {_dot_id(group.key)} [label="{_escape(group.label)}"{style_attrs}];\n'
+
+    @staticmethod
+    def _cluster_label(metadata, index: int) -> str:
+        lines = [f"Cluster {index}"]
+        if metadata is not None:
+            if metadata.inputs:
+                lines.append("in: " + ", ".join(sorted(metadata.inputs)))
+            if metadata.outputs:
+                lines.append("out: " + ", ".join(sorted(metadata.outputs)))
+        return "\n".join(lines)
+
+    # --- Layout-free exports ---
+    def export_json(self, output_path: str, highlight_dead: List[str] = None) -> str:
+        """Writes the view as {output_path}.json (nodes, edges, clusters) and returns the path."""
+        view = self.build_view(highlight_dead)
+        output_file = f"{output_path}.json"
+        data = {
+            "nodes": [
+                {"id": g.key, "label": g.label, "cluster": g.cluster, "dead": g.dead,
+                 "summary": g.summary, "versions": g.members}
+                for g in view.nodes
+            ],
+            "edges": [{"source": s, "target": t} for s, t in view.edges],
+            "clusters": [
+                {"index": c.index, "inputs": sorted(c.inputs), "outputs": sorted(c.outputs)}
+                for c in self.state_machine.clusters
+            ],
+        }
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        logger.info(f"Graph exported to {output_file}")
+        return output_file
+
+    def export_svg(self, output_path: str, highlight_dead: List[str] = None) -> str:
+        """
+        Writes {output_path}.svg with a simple layered placement instead of a
+        Graphviz layout: each node one column right of its deepest input,
+        clusters side by side. Linear in the size of the graph.
+        """
+        view = self.build_view(highlight_dead)
+        output_file = f"{output_path}.svg"
+        positions = self._layers(view)
+        width = (max((x for x, _ in positions.values()), default=0) + 1) * _SVG_COL
+        height = (max((y for _, y in positions.values()), default=0) + 1) * _SVG_ROW
+        dead = {g.key for g in view.nodes if g.dead}
+
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+                    f'font-family="Courier" font-size="11">\n')
+            for source, target in view.edges:
+                if source in positions and target in positions:
+                    (sx, sy), (tx, ty) = positions[source], positions[target]
+                    if source in dead or target in dead:
+                        stroke = 'stroke="red" stroke-dasharray="2,2"'
+                    else:
+                        stroke = 'stroke="blue" stroke-dasharray="5,3"'
+                    f.write(f'<line x1="{sx * _SVG_COL + _SVG_BOX_W}" '
+                            f'y1="{sy * _SVG_ROW + _SVG_BOX_H // 2}" x2="{tx * _SVG_COL}" '
+                            f'y2="{ty * _SVG_ROW + _SVG_BOX_H // 2}" {stroke}/>\n')
+            for group in view.nodes:
+                x, y = positions[group.key]
+                colour = "red" if group.dead else ("gray" if group.summary else "black")
+                f.write(f'<g><title>{_xml(group.label)}</title>'
+                        f'<rect x="{x * _SVG_COL}" y="{y * _SVG_ROW}" '
+                        f'width="{_SVG_BOX_W}" height="{_SVG_BOX_H}" '
+                        f'fill="white" stroke="{colour}"/>')
+                for line_no, line in enumerate(group.label.split("\n")[:2]):
+                    f.write(f'<text x="{x * _SVG_COL + 4}" y="{y * _SVG_ROW + 15 + 14 * line_no}" '
+                            f'fill="{colour}">{_xml(line[:34])}</text>')
+                f.write("</g>\n")
+            f.write("</svg>\n")
+        logger.info(f"Graph exported to {output_file}")
+        return output_file
+
+    def _layers(self, view: GraphView) -> Dict[str, Tuple[int, int]]:
+        """(column, row) per node key: column = longest chain of earlier inputs."""
+        order = {g.key: i for i, g in enumerate(view.nodes)}
+        inputs: Dict[str, List[str]] = {}
+        for source, target in view.edges:
+            # Edges back to later nodes (possible after collapsing) are ignored
+            if source in order and target in order and order[source] < order[target]:
+                inputs.setdefault(target, []).append(source)
 
-                dot.append(f'    {dep_id} -> {node.id} [style={edge_style}];')
+        depth: Dict[str, int] = {}
+        for group in view.nodes:
+            depth[group.key] = 1 + max((depth[s] for s in inputs.get(group.key, [])), default=-1)
 
-        dot.append("}")
-        return "\n".join(dot)
+        # Clusters sit side by side when clustered
+        offset: Dict[int, int] = {}
+        if self.clustered:
+            widths: Dict[int, int] = {}
+            for group in view.nodes:
+                widths[group.cluster] = max(widths.get(group.cluster, 0), depth[group.key] + 1)
+            start = 0
+            for cluster in sorted(widths):
+                offset[cluster] = start
+                start += widths[cluster]
 
+        rows: Dict[int, int] = {}
+        positions = {}
+        for group in view.nodes:
+            column = offset.get(group.cluster, 0) + depth[group.key]
+            positions[group.key] = (column, rows.get(column, 0))
+            rows[column] = rows.get(column, 0) + 1
+        return positions
+
+    # --- Rendering ---
     def render(self, output_path: str):
         """
         Renders the graph to a PNG file.
         Arguments:
             output_path: The full path (without extension) or base filename.
         """
+        dot_source = self.generate_dot()
         try:
-            dot_source = self.generate_dot()
             src = graphviz.Source(dot_source, format='png')
-            
+
             # Renders to {output_path}.png
             output_file = src.render(filename=output_path, cleanup=True)
             logger.info(f"Graph rendered to {output_file}")
             return output_file
         except Exception as e:
-            logger.debug(f"Failed DOT Source:\n{self.generate_dot()}")
-            raise e
\ No newline at end of file
+            logger.debug(f"Failed DOT Source:\n{dot_source}")
+            raise e
+
+    def render_stream(self, output_path: str, fmt: str = "png", executable: str = "dot",
+                      timeout: Optional[float] = None) -> str:
+        """
+        Renders to {output_path}.{fmt} by streaming the DOT source into
+        dot's stdin, without building the whole text first.
+        """
+        output_file = f"{output_path}.{fmt}"
+        with tempfile.TemporaryFile() as errors:
+            proc = subprocess.Popen([executable, f"-T{fmt}", "-o", output_file],
+                                    stdin=subprocess.PIPE, stderr=errors,
+                                    text=True, encoding="utf-8")
+            try:
+                self.write_dot(proc.stdin)
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass  # dot gave up early; its exit status says why
+            try:
+                code = proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+                raise RuntimeError(f"dot timed out after {timeout}s rendering {output_file}")
+            if code != 0:
+                errors.seek(0)
+                message = errors.read().decode("utf-8", "replace").strip()
+                raise RuntimeError(message or f"dot exited with code {code}")
+        logger.info(f"Graph rendered to {output_file}")
+        return output_file
+
+    def submit(self, renderer: BatchRenderer, output_path: str) -> "Future[RenderResult]":
+        """
+        Queues the graph on a shared BatchRenderer instead of starting
+        'dot' for it alone. The future resolves once it has been rendered.
+        """
+        return renderer.submit(self.iter_dot(), output_path)
+
+
+def _escape(text: str) -> str:
+    """Text for a quoted DOT string. Most labels need no escaping, so check before replacing."""
+    if "\\" not in text and '"' not in text and "\n" not in text:
+        return text
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _dot_id(key: str) -> str:
+    # Plain identifiers stay bare; anything else (e.g. ###SYS_ nodes) is quoted
+    if _PLAIN_ID.match(key):
+        return key
+    return '"' + key.replace('"', '\\"') + '"'
+
+
+def _xml(text: str) -> str:
+    return (text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            .replace('"', "&quot;"))
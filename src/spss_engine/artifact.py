@@ -0,0 +1,166 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from spss_engine.events import SemanticEvent
+from spss_engine.lexer import SourceLike, SpssLexer
+from spss_engine.parser import ParsedCommand, SpssParser
+from spss_engine.transformer import CommandTransformer
+
+
+@dataclass
+class ParseArtifact:
+    """
+    Everything the front end derives from one script, computed once:
+    the raw commands, their classification (on the normalized text) and
+    the semantic events. Consumers (CompilerPipeline, SourceInspector,
+    copy_dependencies) read from it instead of re-lexing the source.
+    """
+    digest: str
+    commands: List[str] = field(default_factory=list)        # Raw lexer output
+    parsed: List[ParsedCommand] = field(default_factory=list)  # Aligned with commands
+    events: List[SemanticEvent] = field(default_factory=list)
+    size: int = 0  # Bytes of script text (UTF-8); the artifact holds a few times this
+
+    @classmethod
+    def build(cls, source: SourceLike, digest: Optional[str] = None) -> "ParseArtifact":
+        """
+        Parses a full text, a text file handle or an iterable of chunks.
+        Streams are hashed as they are lexed, so a file is read only once
+        and never held whole as a string.
+        """
+        lexer = SpssLexer()
+        parser = SpssParser()
+        transformer = CommandTransformer()
+
+        hasher = _HashingSource(source)
+        artifact = cls(digest or "")
+        for raw_cmd in lexer.iter_commands(hasher):
+            parsed = parser.parse_command(lexer.normalize_command(raw_cmd))
+            artifact.commands.append(raw_cmd)
+            artifact.parsed.append(parsed)
+            artifact.events.extend(transformer.transform(parsed))
+        artifact.digest = digest or hasher.hexdigest()
+        artifact.size = hasher.size
+        return artifact
+
+
+def content_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class _HashingSource:
+    """Passes a script's chunks to the lexer, hashing them on the way (as content_digest)."""
+
+    def __init__(self, source: SourceLike):
+        self.source = source
+        self.size = 0
+        self._digest = hashlib.sha256()
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in SpssLexer()._iter_chunks(self.source):
+            data = chunk.encode("utf-8", "surrogatepass")
+            self._digest.update(data)
+            self.size += len(data)
+            yield chunk
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+class ArtifactCache:
+    """
+    LRU of ParseArtifacts keyed by content hash (thread-safe), bounded by
+    entry count and by the total size of the cached scripts. A script
+    larger than `max_bytes` is parsed but not kept.
+
+    Files are looked up by (path, size, mtime) first, so a repeated load of
+    an unchanged file neither reads nor parses it again.
+    """
+
+    def __init__(self, max_entries: int = 32, max_bytes: int = 64 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, ParseArtifact]" = OrderedDict()
+        self._files: Dict[str, Tuple[int, int, str]] = {}  # abs path -> (size, mtime, digest)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, text: str) -> ParseArtifact:
+        digest = content_digest(text)
+        artifact = self._lookup(digest)
+        if artifact is None:
+            artifact = self._store(ParseArtifact.build(text, digest))
+        return artifact
+
+    def load(self, path: str, encoding: str = "utf-8") -> ParseArtifact:
+        """Artifact of a script on disk, parsed (and hashed) in one streaming pass on a miss."""
+        key, stamp = os.path.abspath(path), None
+        try:
+            st = os.stat(key)
+            stamp = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            pass
+        with self._lock:
+            known = self._files.get(key)
+        if stamp is not None and known is not None and known[:2] == stamp:
+            artifact = self._lookup(known[2])
+            if artifact is not None:
+                return artifact
+
+        with open(path, "r", encoding=encoding) as f:
+            artifact = self._store(ParseArtifact.build(f))
+        if stamp is not None:
+            with self._lock:
+                if artifact.digest in self._entries:
+                    self._files[key] = (*stamp, artifact.digest)
+        return artifact
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._files.clear()
+            self._bytes = 0
+
+    # --- Internals ---
+    def _lookup(self, digest: str) -> Optional[ParseArtifact]:
+        with self._lock:
+            artifact = self._entries.get(digest)
+            if artifact is not None:
+                self._entries.move_to_end(digest)
+            return artifact
+
+    def _store(self, artifact: ParseArtifact) -> ParseArtifact:
+        """Caches a fresh artifact (an equal one cached meanwhile wins) and evicts to fit."""
+        with self._lock:
+            cached = self._entries.get(artifact.digest)
+            if cached is not None:
+                return cached
+            if artifact.size > self.max_bytes:
+                return artifact
+            self._entries[artifact.digest] = artifact
+            self._bytes += artifact.size
+            evicted = set()
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                digest, old = self._entries.popitem(last=False)
+                self._bytes -= old.size
+                evicted.add(digest)
+            if evicted:
+                self._files = {k: v for k, v in self._files.items() if v[2] not in evicted}
+        return artifact
+
+
+_shared_cache = ArtifactCache()
+
+
+def get_artifact(text: str) -> ParseArtifact:
+    """Parse artifact for a script, shared by every consumer in this process."""
+    return _shared_cache.get(text)
+
+
+def load_artifact(path: str, encoding: str = "utf-8") -> ParseArtifact:
+    """Streams a script from disk into its (possibly cached) parse artifact."""
+    return _shared_cache.load(path, encoding)
@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 from typing import List, Optional, Tuple
+from spss_engine.expression import AssignmentAst
 
 @dataclass
 class SemanticEvent:
@@ -43,6 +44,7 @@ class AssignmentEvent(SemanticEvent):
     target: str
     dependencies: List[str]
     expression: str
+    ast: Optional[AssignmentAst] = None  # Parsed once by the transformer
 
 @dataclass
 class ScopeResetEvent(SemanticEvent):
@@ -0,0 +1,357 @@
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+
+class ExpressionError(ValueError):
+    """Raised when a command or expression cannot be tokenized or parsed."""
+
+
+# --- Tokens ---
+# A token is a (kind, text) pair. Kinds: NUM, STR, NAME, OP, LP, RP, COMMA.
+Token = Tuple[str, str]
+
+_TOKEN_PATTERN = re.compile(
+    r"""(?P<WS>\s+)
+      |(?P<STR>'(?:[^']|'')*'|"(?:[^"]|"")*")
+      |(?P<NUM>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      |(?P<NAME>[A-Za-z@#$][A-Za-z0-9@#$_.]*)
+      |(?P<OP>\*\*|<=|>=|<>|~=|[-+*/=<>&|~])
+      |(?P<LP>\()
+      |(?P<RP>\))
+      |(?P<COMMA>,)""",
+    re.VERBOSE,
+)
+
+
+def tokenize(text: str) -> List[Token]:
+    """
+    Splits SPSS expression / command text into tokens in one pass.
+    A trailing command terminator is dropped from names ('x.' -> 'x').
+    """
+    tokens = []
+    pos = 0
+    end = len(text)
+    while pos < end:
+        match = _TOKEN_PATTERN.match(text, pos)
+        if not match:
+            raise ExpressionError(f"Unexpected character {text[pos]!r} at {pos}")
+        kind = match.lastgroup
+        pos = match.end()
+        if kind == "WS":
+            continue
+        value = match.group()
+        if kind == "NAME":
+            value = value.rstrip(".")
+        tokens.append((kind, value))
+    return tokens
+
+
+# --- AST ---
+@dataclass(frozen=True)
+class Expr:
+    pass
+
+@dataclass(frozen=True)
+class Number(Expr):
+    text: str
+
+@dataclass(frozen=True)
+class String(Expr):
+    text: str  # Including the original quotes
+
+@dataclass(frozen=True)
+class Name(Expr):
+    name: str  # Original spelling
+
+@dataclass(frozen=True)
+class Call(Expr):
+    func: str  # Original spelling, e.g. 'DATE.MDY'
+    args: Tuple[Expr, ...]
+
+@dataclass(frozen=True)
+class Unary(Expr):
+    op: str  # Canonical: '-', '+', 'NOT'
+    operand: Expr
+
+@dataclass(frozen=True)
+class Binary(Expr):
+    op: str  # Canonical: '+', '-', '*', '/', '**', '=', '<>', '<', '>', '<=', '>=', 'AND', 'OR'
+    left: Expr
+    right: Expr
+
+@dataclass(frozen=True)
+class Group(Expr):
+    """Explicit parentheses from the source, kept so rendering stays faithful."""
+    inner: Expr
+
+
+# Spelled-out operators map onto their symbolic canonical form
+_WORD_OPS = {
+    "AND": "AND", "OR": "OR", "NOT": "NOT",
+    "EQ": "=", "NE": "<>", "LT": "<", "GT": ">", "LE": "<=", "GE": ">=",
+}
+_SYMBOL_OPS = {"&": "AND", "|": "OR", "~": "NOT", "~=": "<>"}
+_COMPARISONS = {"=", "<>", "<", ">", "<=", ">="}
+
+# Functions whose trailing argument is a format spec (F8.0), not a variable
+FORMAT_ARG_FUNCTIONS = {"NUMBER", "STRING"}
+
+
+class _ExpressionParser:
+    """Recursive-descent parser over a token list, following SPSS precedence."""
+
+    def __init__(self, tokens: List[Token], pos: int = 0):
+        self.tokens = tokens
+        self.pos = pos
+
+    def _peek(self) -> Optional[Token]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _op(self) -> Optional[str]:
+        """Canonical operator at the cursor (symbolic or spelled out), if any."""
+        tok = self._peek()
+        if tok is None:
+            return None
+        kind, value = tok
+        if kind == "OP":
+            return _SYMBOL_OPS.get(value, value)
+        if kind == "NAME":
+            return _WORD_OPS.get(value.upper())
+        return None
+
+    def _expect(self, kind: str) -> str:
+        tok = self._peek()
+        if tok is None or tok[0] != kind:
+            raise ExpressionError(f"Expected {kind}, got {tok}")
+        self.pos += 1
+        return tok[1]
+
+    def parse(self) -> Expr:
+        return self._or()
+
+    def _binary_level(self, ops, operand) -> Expr:
+        left = operand()
+        while self._op() in ops:
+            op = self._op()
+            self.pos += 1
+            left = Binary(op, left, operand())
+        return left
+
+    def _or(self) -> Expr:
+        return self._binary_level({"OR"}, self._and)
+
+    def _and(self) -> Expr:
+        return self._binary_level({"AND"}, self._not)
+
+    def _not(self) -> Expr:
+        if self._op() == "NOT":
+            self.pos += 1
+            return Unary("NOT", self._not())
+        return self._comparison()
+
+    def _comparison(self) -> Expr:
+        return self._binary_level(_COMPARISONS, self._additive)
+
+    def _additive(self) -> Expr:
+        return self._binary_level({"+", "-"}, self._multiplicative)
+
+    def _multiplicative(self) -> Expr:
+        return self._binary_level({"*", "/"}, self._unary)
+
+    def _unary(self) -> Expr:
+        if self._op() in ("-", "+"):
+            op = self._op()
+            self.pos += 1
+            return Unary(op, self._unary())
+        return self._power()
+
+    def _power(self) -> Expr:
+        base = self._primary()
+        if self._op() == "**":
+            self.pos += 1
+            return Binary("**", base, self._unary())
+        return base
+
+    def _primary(self) -> Expr:
+        tok = self._peek()
+        if tok is None:
+            raise ExpressionError("Unexpected end of expression")
+        kind, value = tok
+        self.pos += 1
+        if kind == "NUM":
+            return Number(value)
+        if kind == "STR":
+            return String(value)
+        if kind == "LP":
+            inner = self.parse()
+            self._expect("RP")
+            return Group(inner)
+        if kind == "NAME" and value.upper() not in _WORD_OPS:
+            nxt = self._peek()
+            if nxt is not None and nxt[0] == "LP":
+                self.pos += 1
+                return Call(value, self._arguments())
+            return Name(value)
+        raise ExpressionError(f"Unexpected token {tok}")
+
+    def _arguments(self) -> Tuple[Expr, ...]:
+        args = []
+        if self._peek() is not None and self._peek()[0] == "RP":
+            self.pos += 1
+            return ()
+        while True:
+            args.append(self.parse())
+            if self._peek() is not None and self._peek()[0] == "COMMA":
+                self.pos += 1
+                continue
+            self._expect("RP")
+            return tuple(args)
+
+
+def parse_expression(text: str) -> Expr:
+    """Parses a standalone SPSS expression (e.g. a COMPUTE right-hand side)."""
+    parser = _ExpressionParser(tokenize(text))
+    expr = parser.parse()
+    if parser.pos != len(parser.tokens):
+        raise ExpressionError(f"Trailing tokens after expression: {parser.tokens[parser.pos:]}")
+    return expr
+
+
+def iter_names(expr: Optional[Expr]) -> Iterator[str]:
+    """
+    Yields the (upper-cased) variable names referenced by an expression.
+    Function names, system variables ($SYSMIS) and format arguments are skipped.
+    """
+    stack = [expr] if expr is not None else []
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Name):
+            if not node.name.startswith("$"):
+                yield node.name.upper()
+        elif isinstance(node, Call):
+            args = node.args
+            if node.func.upper() in FORMAT_ARG_FUNCTIONS and len(args) > 1:
+                args = args[:-1]
+            stack.extend(reversed(args))
+        elif isinstance(node, Binary):
+            stack.append(node.right)
+            stack.append(node.left)
+        elif isinstance(node, Unary):
+            stack.append(node.operand)
+        elif isinstance(node, Group):
+            stack.append(node.inner)
+
+
+# --- Commands ---
+@dataclass
+class AssignmentAst:
+    """
+    Parsed form of an assignment command, computed once per command and
+    shared by dependency extraction, R generation and analysis.
+    """
+    keyword: str  # COMPUTE, RECODE, STRING, NUMERIC (bare IF assignments use COMPUTE)
+    target: str   # Upper-cased
+    value: Optional[Expr] = None      # Right-hand side
+    condition: Optional[Expr] = None  # IF (...) guard
+    sources: List[str] = field(default_factory=list)  # RECODE input variables
+
+    def dependencies(self) -> List[str]:
+        seen = {}
+        for name in iter_names(self.condition):
+            seen[name] = None
+        for name in iter_names(self.value):
+            seen[name] = None
+        for name in self.sources:
+            seen[name] = None
+        seen.pop(self.target, None)
+        return list(seen)
+
+    def reads_previous_target(self) -> bool:
+        """
+        True when the command keeps or reads the target's prior value:
+        conditional assignments, in-place RECODE, or 'x = x + 1'.
+        """
+        if self.condition is not None or self.target in self.sources:
+            return True
+        return any(name == self.target for name in iter_names(self.value))
+
+
+def _is_name(tok: Optional[Token], upper: Optional[str] = None) -> bool:
+    if tok is None or tok[0] != "NAME":
+        return False
+    return upper is None or tok[1].upper() == upper
+
+
+def parse_assignment(command: str) -> Optional[AssignmentAst]:
+    """
+    Parses COMPUTE / IF / RECODE / STRING / NUMERIC commands.
+    Returns None for anything else, or when the command cannot be parsed.
+    """
+    text = command.strip()
+    if text.endswith("."):
+        text = text[:-1]
+    try:
+        tokens = tokenize(text)
+    except ExpressionError:
+        return None
+
+    parser = _ExpressionParser(tokens)
+    condition = None
+    try:
+        # IF (cond) ... -- several guards are combined with AND
+        while _is_name(parser._peek(), "IF") and parser.pos + 1 < len(tokens) \
+                and tokens[parser.pos + 1][0] == "LP":
+            parser.pos += 2
+            guard = parser.parse()
+            parser._expect("RP")
+            condition = guard if condition is None else Binary("AND", condition, guard)
+
+        head = parser._peek()
+        if not _is_name(head):
+            return None
+        keyword = head[1].upper()
+
+        # "COMPUTE x = ..." or the bare "IF (cond) x = ..." form
+        is_compute = keyword == "COMPUTE"
+        is_bare_if = condition is not None and parser.pos + 1 < len(tokens) \
+            and tokens[parser.pos + 1] == ("OP", "=")
+        if is_compute or is_bare_if:
+            if is_compute:
+                parser.pos += 1
+            target = parser._expect("NAME")
+            if parser._peek() != ("OP", "="):
+                return None
+            parser.pos += 1
+            value = parser.parse()
+            if parser.pos != len(tokens):
+                return None
+            return AssignmentAst("COMPUTE", target.upper(), value=value, condition=condition)
+
+        if keyword == "RECODE":
+            parser.pos += 1
+            sources = []
+            while _is_name(parser._peek()):
+                name = parser._peek()[1].upper()
+                if name != "TO":
+                    sources.append(name)
+                parser.pos += 1
+            if not sources:
+                return None
+            target = sources[0]
+            rest = tokens[parser.pos:]
+            for i, tok in enumerate(rest):
+                if _is_name(tok, "INTO"):
+                    if i + 1 < len(rest) and _is_name(rest[i + 1]):
+                        target = rest[i + 1][1].upper()
+                    break
+            return AssignmentAst("RECODE", target, condition=condition, sources=sources)
+
+        if keyword in ("STRING", "NUMERIC"):
+            parser.pos += 1
+            target = parser._expect("NAME")
+            return AssignmentAst(keyword, target.upper(), condition=condition)
+
+    except ExpressionError:
+        return None
+    return None
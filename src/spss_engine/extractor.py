@@ -1,5 +1,63 @@
 import re
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from spss_engine.expression import AssignmentAst, parse_assignment
+
+
+# Reserved words that are never reported as variable dependencies.
+SPSS_KEYWORDS = frozenset({
+    # Commands that can prefix an assignment
+    "COMPUTE", "IF", "RECODE", "STRING", "NUMERIC", "EXECUTE",
+    "DO", "ELSE", "END",
+    # Operators and RECODE / range vocabulary
+    "AND", "OR", "NOT", "EQ", "NE", "LT", "GT", "LE", "GE",
+    "TO", "THRU", "LO", "LOWEST", "HI", "HIGHEST", "INTO", "COPY", "CONVERT", "BY",
+    # System variables
+    "$SYSMIS", "$CASENUM", "$DATE", "$DATE11", "$JDATE", "$TIME", "$LENGTH", "$WIDTH",
+})
+
+# Built-in functions, skipped only when called: many of the names (VALUE,
+# INDEX, MAX...) are also valid variable names. Dotted names (DATE.MDY)
+# are single tokens.
+SPSS_FUNCTIONS = frozenset({
+    # Arithmetic
+    "ABS", "ARSIN", "ARTAN", "COS", "EXP", "LG10", "LN", "LNGAMMA", "MOD",
+    "RND", "SIN", "SQRT", "TAN", "TRUNC",
+    # Statistical
+    "CFVAR", "MAX", "MEAN", "MEDIAN", "MIN", "SD", "SUM", "VARIANCE",
+    # Missing values / logical
+    "MISSING", "NMISS", "NVALID", "SYSMIS", "VALUE", "ANY", "RANGE",
+    # Strings
+    "CHAR.INDEX", "CHAR.LENGTH", "CHAR.LPAD", "CHAR.MBLEN", "CHAR.RINDEX",
+    "CHAR.RPAD", "CHAR.SUBSTR", "CONCAT", "INDEX", "LENGTH", "LOWER", "LPAD",
+    "LTRIM", "MBLEN.BYTE", "NORMALIZE", "NTRIM", "NUMBER", "REPLACE", "RINDEX",
+    "RPAD", "RTRIM", "STRUNC", "SUBSTR", "UPCASE", "VALUELABEL",
+    # Dates and times
+    "DATE.DMY", "DATE.MDY", "DATE.MOYR", "DATE.QYR", "DATE.WKYR", "DATE.YRDAY",
+    "TIME.DAYS", "TIME.HMS", "CTIME.DAYS", "CTIME.HOURS", "CTIME.MINUTES",
+    "CTIME.SECONDS", "DATEDIFF", "DATESUM", "YRMODA",
+    "XDATE.DATE", "XDATE.HOUR", "XDATE.JDAY", "XDATE.MDAY", "XDATE.MINUTE",
+    "XDATE.MONTH", "XDATE.QUARTER", "XDATE.SECOND", "XDATE.TDAY", "XDATE.TIME",
+    "XDATE.WEEK", "XDATE.WKDAY", "XDATE.YEAR",
+    # Distributions / random numbers
+    "UNIFORM", "NORMAL", "CDFNORM", "PROBIT",
+    "RV.BERNOULLI", "RV.BINOM", "RV.EXP", "RV.NORMAL", "RV.POISSON", "RV.UNIFORM",
+    "CDF.BINOM", "CDF.NORMAL", "CDF.POISSON", "CDF.T", "IDF.NORMAL", "IDF.T",
+    "PDF.NORMAL", "PDF.BINOM",
+    # Case functions
+    "LAG",
+})
+
+# One pass over the command: string literals and numbers are consumed (and
+# dropped), identifiers land in group 1, structural punctuation in group 2.
+_TOKEN_PATTERN = re.compile(
+    r"""'[^']*'|"[^"]*"|\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|([A-Za-z@#$][A-Za-z0-9@#$_.]*)|([()=])"""
+)
+
+_DECLARATIONS = ("STRING", "NUMERIC")
+
+_FILE_TARGET_PATTERN = re.compile(
+    r"(?:OUTFILE|TABLE|FILE)\s*=\s*['\"]([^'\"]+)['\"]", re.IGNORECASE
+)
 
 
 class AssignmentExtractor:
@@ -8,132 +66,135 @@ class AssignmentExtractor:
     """
 
     @staticmethod
-    def _normalize(name: str) -> str:
-        return name.strip().upper()
+    def _tokenize(command: str) -> List[str]:
+        """
+        Returns upper-cased identifiers and the punctuation '(', ')', '='.
+        A trailing command terminator is stripped from identifiers.
+        """
+        tokens = []
+        for word, punct in _TOKEN_PATTERN.findall(command):
+            if word:
+                tokens.append(word.upper().rstrip("."))
+            elif punct:
+                tokens.append(punct)
+        return tokens
 
-    # --- NEW: Handle "IF (Condition) Assignment" ---
-    # We strip the "IF (stuff)" part and recursively check the rest.
-    # This naive regex matches "IF" then greedy match until the last closing paren?
-    # Actually, simpler: just remove "IF" and look for keywords later?
-    # No, strictness is better.
-    # Let's try matching the IF pattern, then grabbing the rest of the string.
+    @staticmethod
+    def _is_name(token: str) -> bool:
+        return token not in ("(", ")", "=")
 
     @staticmethod
-    def extract_target(command: str) -> Optional[str]:
-        cmd = command.strip()
+    def _starts_with_keyword(command: str) -> bool:
+        # Comments ('* ...') and other non-commands never carry a target
+        return command.lstrip()[:1].isalpha()
 
-        # Handle "IF (Condition) Assignment"
-        if_match = re.match(r"^\s*IF\s*\(.+?\)\s*(.+)", cmd, re.IGNORECASE | re.DOTALL)
-        if if_match:
-            return AssignmentExtractor.extract_target(if_match.group(1))
+    @staticmethod
+    def _target_from_tokens(tokens: List[str]) -> Optional[str]:
+        # Handle "IF (Condition) Assignment": skip each balanced IF (...) prefix
+        i = 0
+        while i + 1 < len(tokens) and tokens[i] == "IF" and tokens[i + 1] == "(":
+            depth = 0
+            i += 1
+            while i < len(tokens):
+                if tokens[i] == "(":
+                    depth += 1
+                elif tokens[i] == ")":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                i += 1
+            i += 1
+
+        head = tokens[i:]
+        if len(head) < 2 or not AssignmentExtractor._is_name(head[1]):
+            return None
 
         # Pattern 1: COMPUTE Target = ...
-        compute_match = re.match(
-            r"^\s*COMPUTE\s+([A-Za-z0-9_#@$]+)\s*=", cmd, re.IGNORECASE
-        )
-        if compute_match:
-            return AssignmentExtractor._normalize(compute_match.group(1))
+        if head[0] == "COMPUTE":
+            return head[1] if len(head) > 2 and head[2] == "=" else None
 
         # Pattern 2: RECODE ... INTO Target
-        if "INTO" in cmd.upper():
-            recode_into_match = re.search(
-                r"INTO\s+([A-Za-z0-9_#@$]+)", cmd, re.IGNORECASE
-            )
-            if recode_into_match:
-                return AssignmentExtractor._normalize(recode_into_match.group(1))
+        if "INTO" in head:
+            pos = head.index("INTO") + 1
+            if pos < len(head) and AssignmentExtractor._is_name(head[pos]):
+                return head[pos]
 
         # Pattern 3: RECODE Target (...)
-        if cmd.upper().startswith("RECODE") and "INTO" not in cmd.upper():
-            recode_match = re.match(
-                r"^\s*RECODE\s+([A-Za-z0-9_#@$]+)", cmd, re.IGNORECASE
-            )
-            if recode_match:
-                return AssignmentExtractor._normalize(recode_match.group(1))
+        if head[0] == "RECODE" and "INTO" not in head:
+            return head[1]
 
         # Pattern 4: STRING/NUMERIC Target ...
-        decl_match = re.match(
-            r"^\s*(STRING|NUMERIC)\s+([A-Za-z0-9_#@$]+)", cmd, re.IGNORECASE
-        )
-        if decl_match:
-            return AssignmentExtractor._normalize(decl_match.group(2))
+        if head[0] in _DECLARATIONS:
+            return head[1]
 
         return None
 
     @staticmethod
-    def extract_dependencies(expression: str) -> List[str]:
+    def _dependencies_from_tokens(tokens: List[str], exclude: Optional[str] = None) -> List[str]:
+        seen = {}
+        for i, token in enumerate(tokens):
+            if token in seen or token in SPSS_KEYWORDS or token == exclude:
+                continue
+            if token in SPSS_FUNCTIONS and tokens[i + 1:i + 2] == ["("]:
+                continue
+            if AssignmentExtractor._is_name(token):
+                seen[token] = None
+        return list(seen)
+
+    @staticmethod
+    def analyze(command: str) -> Tuple[Optional[str], List[str], Optional[AssignmentAst]]:
         """
-        Scans a raw expression (Right-Hand Side) and returns a list of potential
-        variable names found within it.
+        Parses an assignment command into its AST and derives target and
+        dependencies from it. Commands the expression parser rejects fall
+        back to the keyword-filtered token scan (ast is then None).
         """
-        # 1. Remove string literals (e.g. 'Male') so we don't count them as vars
-        # This regex removes things inside quotes.
-        clean_expr = re.sub(r"('|\").*?('|\")", "", expression)
-
-        # 2. Tokenize: Split by non-alphanumeric characters
-        # We look for words that start with a letter.
-        # SPSS vars can have @, #, $, _
-        tokens = re.findall(r"[A-Za-z@#$][A-Za-z0-9@#$_]*", clean_expr)
-
-        # 3. Filter Keywords (Naive list for now)
-        # We don't want to list 'COMPUTE' or 'SQRT' as a dependency.
-        KEYWORDS = {
-            "COMPUTE",
-            "IF",
-            "SQRT",
-            "MEAN",
-            "SUM",
-            "AND",
-            "OR",
-            "NOT",
-            "EQ",
-            "NE",
-            "LT",
-            "GT",
-            "TO",
-            "RECODE",
-            "INTO",
-            "STRING",
-            "NUMERIC",
-            "EXECUTE",
-        }
-
-        dependencies = []
-        for token in tokens:
-            normalized = token.strip().upper()
-            if normalized not in KEYWORDS:
-                dependencies.append(normalized)
-
-        return list(set(dependencies))
-    
+        if not AssignmentExtractor._starts_with_keyword(command):
+            return None, [], None
+        ast = parse_assignment(command)
+        if ast is not None:
+            return ast.target, ast.dependencies(), ast
+        target, deps = AssignmentExtractor._extract_from_tokens(command)
+        return target, deps, None
 
-    def extract_file_target(self, command: str) -> Optional[str]:
+    @staticmethod
+    def extract(command: str) -> Tuple[Optional[str], List[str]]:
         """
-        Extracts the filename from SAVE or MATCH commands.
+        Single-pass analysis of an assignment command.
+        Returns (target, dependencies); the target is never listed as its
+        own dependency. Returns (None, []) for non-assignments.
         """
-        # Simple heuristic: Look for 'file.sav' or "file.sav"
-        import re
-        match = re.search(r"(?:OUTFILE|TABLE|FILE)\s*=\s*['\"]([^'\"]+)['\"]", command, re.IGNORECASE)
-        if match:
-            return match.group(1)
-        return None
+        target, deps, _ = AssignmentExtractor.analyze(command)
+        return target, deps
+
+    @staticmethod
+    def _extract_from_tokens(command: str) -> Tuple[Optional[str], List[str]]:
+        tokens = AssignmentExtractor._tokenize(command)
+        target = AssignmentExtractor._target_from_tokens(tokens)
+        if target is None:
+            return None, []
+        return target, AssignmentExtractor._dependencies_from_tokens(tokens, exclude=target)
 
+    @staticmethod
+    def extract_target(command: str) -> Optional[str]:
+        return AssignmentExtractor.analyze(command)[0]
+
+    @staticmethod
+    def extract_dependencies(expression: str) -> List[str]:
+        """
+        Scans a raw expression (Right-Hand Side) and returns a list of potential
+        variable names found within it.
+        """
+        return AssignmentExtractor._dependencies_from_tokens(
+            AssignmentExtractor._tokenize(expression)
+        )
 
     def extract_file_target(self, command: str) -> Optional[str]:
         """
         Extracts the filename from SAVE or MATCH commands.
         Looks for OUTFILE=, FILE=, or TABLE= followed by a quoted string.
         """
-        # Regex explanation:
-        # (?: ... )  -> Non-capturing group for the keyword options
-        # \s*=\s* -> Equals sign with optional whitespace
-        # ['"]       -> Opening quote (single or double)
-        # ([^'"]+)   -> CAPTURE GROUP 1: Anything that isn't a quote
-        # ['"]       -> Closing quote
-        
-        pattern = r"(?:OUTFILE|TABLE|FILE)\s*=\s*['\"]([^'\"]+)['\"]"
-        
-        match = re.search(pattern, command, re.IGNORECASE)
+        match = _FILE_TARGET_PATTERN.search(command)
         if match:
             return match.group(1)
-            
+
         return None
@@ -1,7 +1,8 @@
 import re
 import logging
 from typing import List, Tuple
-from spss_engine.lexer import SpssLexer
+from spss_engine.artifact import ParseArtifact, get_artifact
+from spss_engine.lexer import SpssLexer, SourceLike
 from spss_engine.parser import SpssParser, TokenType
 
 logger = logging.getLogger("SourceInspector")
@@ -15,22 +16,32 @@ class SourceInspector:
         # Matches: /FILE='...' OR /OUTFILE='...' OR /TABLE='...'
         self._ARG_PATTERN = re.compile(r"/?(?:FILE|OUTFILE|TABLE)\s*=\s*['\"](.*?)['\"]", re.IGNORECASE)
 
-    def scan(self, code: str) -> Tuple[List[str], List[str]]:
+    def scan(self, code: SourceLike) -> Tuple[List[str], List[str]]:
+        """
+        Returns (inputs, outputs). Accepts text, a file handle, chunks or a
+        ParseArtifact; full texts reuse the shared parse artifact cache.
+        """
+        if isinstance(code, str):
+            code = get_artifact(code)
+        if isinstance(code, ParseArtifact):
+            commands = zip(code.commands, (p.type for p in code.parsed))
+        else:
+            commands = (
+                (raw_cmd, self.parser.parse_command(raw_cmd).type)
+                for raw_cmd in self.lexer.iter_commands(code)
+            )
+
         inputs = []
         outputs = []
         
-        commands = self.lexer.split_commands(code)
-        
-        for raw_cmd in commands:
-            parsed = self.parser.parse_command(raw_cmd)
-            
+        for raw_cmd, cmd_type in commands:
             # FILE_READ (GET DATA) and FILE_MATCH (MATCH FILES) are both Inputs
-            if parsed.type == TokenType.FILE_READ or parsed.type == TokenType.FILE_MATCH:
-                found = self._extract_filenames(parsed.raw)
+            if cmd_type == TokenType.FILE_READ or cmd_type == TokenType.FILE_MATCH:
+                found = self._extract_filenames(raw_cmd)
                 inputs.extend(found)
                 
-            elif parsed.type == TokenType.FILE_SAVE or parsed.type == TokenType.AGGREGATE:
-                found = self._extract_filenames(parsed.raw)
+            elif cmd_type == TokenType.FILE_SAVE or cmd_type == TokenType.AGGREGATE:
+                found = self._extract_filenames(raw_cmd)
                 outputs.extend(found)
                 
         return sorted(list(set(inputs))), sorted(list(set(outputs)))
@@ -1,5 +1,10 @@
 import re
-from typing import List
+from typing import Iterable, Iterator, List, Optional, TextIO, Union
+
+# Anything the lexer can consume: a whole script, an open text handle,
+# or an iterable of text chunks (e.g. a network stream).
+SourceLike = Union[str, TextIO, Iterable[str]]
+
 
 class SpssLexer:
     """
@@ -8,6 +13,9 @@ class SpssLexer:
     Uses a hybrid approach: Can be stateful (legacy) or stateless (service).
     """
 
+    # Size of the slices read from file handles / large strings when streaming.
+    CHUNK_SIZE = 1 << 20
+
     def __init__(self, raw_text: str = None):
         # Allow optional raw_text for backward compatibility
         self.raw_text = raw_text
@@ -21,14 +29,19 @@ class SpssLexer:
         if target_text is None:
             raise ValueError("No text provided to split_commands")
 
-        commands = []
+        return list(self.iter_commands(target_text))
+
+    def iter_commands(self, source: SourceLike) -> Iterator[str]:
+        """
+        Streaming variant of split_commands.
+        Accepts a string, a text file handle or an iterable of text chunks and
+        yields commands one at a time, so the full script never has to be
+        held in memory. Command boundaries are identical to split_commands.
+        """
         current_command = []
-        in_quote = False
         quote_char = None
 
-        lines = target_text.splitlines()
-
-        for line in lines:
+        for line in self._iter_lines(source):
             stripped_line = line.strip()
 
             if not stripped_line:
@@ -38,28 +51,75 @@ class SpssLexer:
             current_command.append(line)
 
             # Update quote state for this line
-            for char in line:
-                if char in ('"', "'"):
-                    if not in_quote:
-                        in_quote = True
-                        quote_char = char
-                    elif char == quote_char:
-                        in_quote = False
-                        quote_char = None
+            quote_char = self._scan_quotes(line, quote_char)
 
             # A command ends if:
             # 1. The line ends with a dot.
             # 2. We are NOT currently inside an open quote string.
-            if stripped_line.endswith(".") and not in_quote:
-                full_cmd = "\n".join(current_command)
-                commands.append(full_cmd)
+            if stripped_line.endswith(".") and quote_char is None:
+                yield "\n".join(current_command)
                 current_command = []
 
         # Catch residuals
         if current_command:
-            commands.append("\n".join(current_command))
+            yield "\n".join(current_command)
 
-        return commands
+    def _iter_chunks(self, source: SourceLike) -> Iterator[str]:
+        if isinstance(source, str):
+            for start in range(0, len(source), self.CHUNK_SIZE):
+                yield source[start:start + self.CHUNK_SIZE]
+        elif hasattr(source, "read"):
+            yield from iter(lambda: source.read(self.CHUNK_SIZE), "")
+        else:
+            yield from source
+
+    def _iter_lines(self, source: SourceLike) -> Iterator[str]:
+        """
+        Re-assembles chunks into lines (same separators as str.splitlines).
+        Only the trailing partial line of a chunk is carried over.
+        """
+        pending = ""
+        for chunk in self._iter_chunks(source):
+            if not chunk:
+                continue
+            pending += chunk
+            lines = pending.splitlines(keepends=True)
+            pending = ""
+            for line in lines:
+                body = line.splitlines()[0]
+                if body == line:
+                    # No terminator: only possible for the last piece.
+                    pending = line
+                else:
+                    # A '\r\n' split across chunks yields an extra blank
+                    # line, which the command loop skips anyway.
+                    yield body
+        if pending:
+            yield pending
+
+    @staticmethod
+    def _scan_quotes(line: str, quote_char: Optional[str]) -> Optional[str]:
+        """
+        Returns the quote character still open at the end of the line
+        (None when balanced). Jumps between quotes with str.find instead
+        of visiting every character.
+        """
+        pos = 0
+        while True:
+            if quote_char is None:
+                dq = line.find('"', pos)
+                sq = line.find("'", pos)
+                if dq == -1 and sq == -1:
+                    return None
+                if sq == -1 or (dq != -1 and dq < sq):
+                    quote_char, pos = '"', dq + 1
+                else:
+                    quote_char, pos = "'", sq + 1
+            else:
+                close = line.find(quote_char, pos)
+                if close == -1:
+                    return quote_char
+                quote_char, pos = None, close + 1
 
     # 🟢 LEGACY ALIAS: Keeps old tests passing
     def get_commands(self) -> List[str]:
@@ -69,4 +129,4 @@ class SpssLexer:
         """
         Cleans up a command string: Removes extra whitespace.
         """
-        return re.sub(r"\s+", " ", command).strip()
\ No newline at end of file
+        return re.sub(r"\s+", " ", command).strip()
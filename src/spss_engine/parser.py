@@ -1,5 +1,7 @@
+import re
 from enum import Enum, auto
 from dataclasses import dataclass
+from typing import Dict, Tuple
 
 class TokenType(Enum):
     ASSIGNMENT = auto()
@@ -10,40 +12,203 @@ class TokenType(Enum):
     CONTROL_FLOW = auto()
     AGGREGATE = auto()
     RECODE = auto()       # 🟢 ADDED THIS
+    DECLARATION = auto()  # Dictionary / metadata (NUMERIC, VALUE LABELS, DATA LIST...)
+    BLOCK = auto()        # Structural blocks (DO IF, LOOP, DO REPEAT...)
+    CASE_SELECTION = auto()  # SELECT IF, FILTER, WEIGHT, SPLIT FILE...
+    TRANSFORM = auto()    # Transformations we do not model yet (COUNT, AUTORECODE...)
+    PROCEDURE = auto()    # Output-only procedures (FREQUENCIES, GRAPH...)
+    FILE_IO = auto()      # Other readers / writers we do not model yet (GET SAS, EXPORT...)
+    COMMENT = auto()
     UNKNOWN = auto()
 
 @dataclass
 class ParsedCommand:
     type: TokenType
     raw: str
+    keyword: str = ""  # Canonical command name, e.g. "SAVE TRANSLATE"
+
+
+# Command vocabulary: canonical (multi-word) keyword -> TokenType.
+# The nine original categories keep exactly the commands the old
+# startswith chain recognised; everything else gets its own bucket.
+COMMAND_TABLE: Dict[str, TokenType] = {
+    # Assignments
+    "COMPUTE": TokenType.ASSIGNMENT,
+    "STRING": TokenType.ASSIGNMENT,
+    "IF": TokenType.CONDITIONAL,
+    "RECODE": TokenType.RECODE,
+    # File IO
+    "GET DATA": TokenType.FILE_READ,
+    "GET FILE": TokenType.FILE_READ,
+    "MATCH FILES": TokenType.FILE_MATCH,
+    "ADD FILES": TokenType.FILE_MATCH,
+    "SAVE": TokenType.FILE_SAVE,
+    "SAVE TRANSLATE": TokenType.FILE_SAVE,
+    "AGGREGATE": TokenType.AGGREGATE,
+    # Control flow
+    "SORT CASES": TokenType.CONTROL_FLOW,
+    "EXECUTE": TokenType.CONTROL_FLOW,
+    "DATASET": TokenType.CONTROL_FLOW,
+    # Declarations / dictionary
+    "NUMERIC": TokenType.DECLARATION,
+    "FORMATS": TokenType.DECLARATION,
+    "PRINT FORMATS": TokenType.DECLARATION,
+    "WRITE FORMATS": TokenType.DECLARATION,
+    "VARIABLE LABELS": TokenType.DECLARATION,
+    "VARIABLE LEVEL": TokenType.DECLARATION,
+    "VARIABLE WIDTH": TokenType.DECLARATION,
+    "VARIABLE ALIGNMENT": TokenType.DECLARATION,
+    "VARIABLE ATTRIBUTE": TokenType.DECLARATION,
+    "VALUE LABELS": TokenType.DECLARATION,
+    "ADD VALUE LABELS": TokenType.DECLARATION,
+    "MISSING VALUES": TokenType.DECLARATION,
+    "RENAME VARIABLES": TokenType.DECLARATION,
+    "DELETE VARIABLES": TokenType.DECLARATION,
+    "APPLY DICTIONARY": TokenType.DECLARATION,
+    "DATA LIST": TokenType.DECLARATION,
+    "BEGIN DATA": TokenType.DECLARATION,
+    "END DATA": TokenType.DECLARATION,
+    "INPUT PROGRAM": TokenType.DECLARATION,
+    "END INPUT PROGRAM": TokenType.DECLARATION,
+    "FILE HANDLE": TokenType.DECLARATION,
+    "FILE LABEL": TokenType.DECLARATION,
+    "DOCUMENT": TokenType.DECLARATION,
+    "ADD DOCUMENT": TokenType.DECLARATION,
+    "DROP DOCUMENTS": TokenType.DECLARATION,
+    "VECTOR": TokenType.DECLARATION,
+    "NEW FILE": TokenType.DECLARATION,
+    "SET": TokenType.DECLARATION,
+    "TITLE": TokenType.DECLARATION,
+    "SUBTITLE": TokenType.DECLARATION,
+    # Block structure
+    "DO IF": TokenType.BLOCK,
+    "ELSE IF": TokenType.BLOCK,
+    "ELSE": TokenType.BLOCK,
+    "END IF": TokenType.BLOCK,
+    "DO REPEAT": TokenType.BLOCK,
+    "END REPEAT": TokenType.BLOCK,
+    "LOOP": TokenType.BLOCK,
+    "END LOOP": TokenType.BLOCK,
+    "BREAK": TokenType.BLOCK,
+    "END CASE": TokenType.BLOCK,
+    "END FILE": TokenType.BLOCK,
+    "LEAVE": TokenType.BLOCK,
+    "DEFINE": TokenType.BLOCK,
+    "!ENDDEFINE": TokenType.BLOCK,
+    "INCLUDE": TokenType.BLOCK,
+    "INSERT": TokenType.BLOCK,
+    "FINISH": TokenType.BLOCK,
+    # Case selection
+    "SELECT IF": TokenType.CASE_SELECTION,
+    "FILTER": TokenType.CASE_SELECTION,
+    "SAMPLE": TokenType.CASE_SELECTION,
+    "N OF CASES": TokenType.CASE_SELECTION,
+    "TEMPORARY": TokenType.CASE_SELECTION,
+    "WEIGHT": TokenType.CASE_SELECTION,
+    "SPLIT FILE": TokenType.CASE_SELECTION,
+    "USE": TokenType.CASE_SELECTION,
+    # Transformations not (yet) modelled by the State Machine
+    "COUNT": TokenType.TRANSFORM,
+    "AUTORECODE": TokenType.TRANSFORM,
+    "RANK": TokenType.TRANSFORM,
+    "FLIP": TokenType.TRANSFORM,
+    "CASESTOVARS": TokenType.TRANSFORM,
+    "VARSTOCASES": TokenType.TRANSFORM,
+    "SORT VARIABLES": TokenType.TRANSFORM,
+    "LAG": TokenType.TRANSFORM,
+    "SHIFT VALUES": TokenType.TRANSFORM,
+    "CREATE": TokenType.TRANSFORM,
+    "RMV": TokenType.TRANSFORM,
+    # Other readers / writers. Kept out of FILE_READ / FILE_SAVE: their
+    # DATA= / FILE= forms and formats are not handled by the loader yet.
+    "GET SAS": TokenType.FILE_IO,
+    "GET STATA": TokenType.FILE_IO,
+    "GET TRANSLATE": TokenType.FILE_IO,
+    "IMPORT": TokenType.FILE_IO,
+    "XSAVE": TokenType.FILE_IO,
+    "EXPORT": TokenType.FILE_IO,
+    # Procedures (produce output, never mutate the dataset)
+    "FREQUENCIES": TokenType.PROCEDURE,
+    "DESCRIPTIVES": TokenType.PROCEDURE,
+    "CROSSTABS": TokenType.PROCEDURE,
+    "MEANS": TokenType.PROCEDURE,
+    "EXAMINE": TokenType.PROCEDURE,
+    "CORRELATIONS": TokenType.PROCEDURE,
+    "REGRESSION": TokenType.PROCEDURE,
+    "LOGISTIC REGRESSION": TokenType.PROCEDURE,
+    "ONEWAY": TokenType.PROCEDURE,
+    "T-TEST": TokenType.PROCEDURE,
+    "NPAR TESTS": TokenType.PROCEDURE,
+    "GLM": TokenType.PROCEDURE,
+    "FACTOR": TokenType.PROCEDURE,
+    "RELIABILITY": TokenType.PROCEDURE,
+    "CTABLES": TokenType.PROCEDURE,
+    "TABLES": TokenType.PROCEDURE,
+    "REPORT": TokenType.PROCEDURE,
+    "GRAPH": TokenType.PROCEDURE,
+    "GGRAPH": TokenType.PROCEDURE,
+    "LIST": TokenType.PROCEDURE,
+    "PRINT": TokenType.PROCEDURE,
+    "WRITE": TokenType.PROCEDURE,
+    "DISPLAY": TokenType.PROCEDURE,
+    "SHOW": TokenType.PROCEDURE,
+    "SUMMARIZE": TokenType.PROCEDURE,
+    "OUTPUT": TokenType.PROCEDURE,
+    "OMS": TokenType.PROCEDURE,
+    "OMSEND": TokenType.PROCEDURE,
+    # Comments
+    "*": TokenType.COMMENT,
+    "COMMENT": TokenType.COMMENT,
+}
+
+# Leading-token scanners. Only the start of the command is examined;
+# the (possibly multi-KB) body is never uppercased or searched.
+_FIRST_WORD = re.compile(r"\s*([A-Za-z!][A-Za-z0-9_-]*|\*)")
+_NEXT_WORD = re.compile(r"\s+([A-Za-z!][A-Za-z0-9_-]*)")
+
+# Trie keyed by the first word: {first: {(rest words...): (keyword, type)}}
+_COMMAND_TRIE: Dict[str, Dict[Tuple[str, ...], Tuple[str, TokenType]]] = {}
+for _keyword, _type in COMMAND_TABLE.items():
+    _first, *_rest = _keyword.split()
+    _COMMAND_TRIE.setdefault(_first, {})[tuple(_rest)] = (_keyword, _type)
+
+# How many extra words are worth reading after each first word.
+_TRIE_DEPTH = {first: max(len(k) for k in branch) for first, branch in _COMMAND_TRIE.items()}
+
+
+def classify_command(command: str) -> Tuple[str, TokenType]:
+    """
+    Returns (canonical keyword, TokenType) for a command by looking up
+    its leading words in the command trie. Unknown commands return ("", UNKNOWN).
+    """
+    match = _FIRST_WORD.match(command)
+    if not match:
+        return "", TokenType.UNKNOWN
+
+    first = match.group(1).upper()
+    branches = _COMMAND_TRIE.get(first)
+    if not branches:
+        return "", TokenType.UNKNOWN
+
+    # Read only as many follow-up words as the longest keyword needs
+    rest = []
+    pos = match.end()
+    for _ in range(_TRIE_DEPTH[first]):
+        match = _NEXT_WORD.match(command, pos)
+        if not match:
+            break
+        rest.append(match.group(1).upper())
+        pos = match.end()
+
+    # Longest keyword wins (e.g. "SAVE TRANSLATE" over "SAVE")
+    for size in range(len(rest), -1, -1):
+        hit = branches.get(tuple(rest[:size]))
+        if hit:
+            return hit
+    return "", TokenType.UNKNOWN
+
 
 class SpssParser:
     def parse_command(self, command: str) -> ParsedCommand:
-        cmd_upper = command.strip().upper()
-        
-        # 🟢 ADD RECODE DETECTION
-        if cmd_upper.startswith("RECODE"):
-            return ParsedCommand(TokenType.RECODE, command)
-            
-        if cmd_upper.startswith("COMPUTE") or cmd_upper.startswith("STRING"):
-            return ParsedCommand(TokenType.ASSIGNMENT, command)
-            
-        if cmd_upper.startswith("IF"):
-            return ParsedCommand(TokenType.CONDITIONAL, command)
-            
-        if any(cmd_upper.startswith(x) for x in ["GET DATA", "GET FILE"]):
-            return ParsedCommand(TokenType.FILE_READ, command)
-            
-        if cmd_upper.startswith("MATCH FILES") or cmd_upper.startswith("ADD FILES"):
-            return ParsedCommand(TokenType.FILE_MATCH, command)
-            
-        if cmd_upper.startswith("SAVE") or cmd_upper.startswith("SAVE TRANSLATE"):
-            return ParsedCommand(TokenType.FILE_SAVE, command)
-            
-        if cmd_upper.startswith("AGGREGATE"):
-            return ParsedCommand(TokenType.AGGREGATE, command)
-            
-        if any(cmd_upper.startswith(x) for x in ["SORT CASES", "EXECUTE", "DATASET"]):
-            return ParsedCommand(TokenType.CONTROL_FLOW, command)
-            
-        return ParsedCommand(TokenType.UNKNOWN, command)
\ No newline at end of file
+        keyword, token_type = classify_command(command)
+        return ParsedCommand(token_type, command, keyword)
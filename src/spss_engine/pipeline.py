@@ -1,8 +1,9 @@
 # src/spss_engine/pipeline.py
+from spss_engine.artifact import ParseArtifact, get_artifact, load_artifact
 from spss_engine.extractor import AssignmentExtractor
-from spss_engine.lexer import SpssLexer
+from spss_engine.lexer import SpssLexer, SourceLike
 from spss_engine.parser import SpssParser, TokenType
-from spss_engine.state import StateMachine, VariableVersion
+from spss_engine.state import StateMachine, VariableVersion, SYSTEM_PREFIX
 from spss_engine.transformer import CommandTransformer
 from spss_engine.events import (
     SemanticEvent, FileReadEvent, FileMatchEvent, 
@@ -13,8 +14,9 @@ import os
 
 
 class CompilerPipeline:
-    def __init__(self):
-        self.state = StateMachine()
+    def __init__(self, compact: bool = False):
+        # compact=True selects the memory-lean StateMachine storage
+        self.state = StateMachine(compact=compact)
         self.parser = SpssParser()
         self.lexer = SpssLexer()
         self.transformer = CommandTransformer()
@@ -22,12 +24,21 @@ class CompilerPipeline:
         
         self.source_file = "script.sps"
         self.join_counter = 0
+        # Ordered history of every applied event (used e.g. to find loaders)
+        self.events: List[SemanticEvent] = []
 
  
-    def process(self, code: str):
-        commands = self.lexer.split_commands(code)
-        
-        for cmd_text in commands:
+    def process(self, code: SourceLike):
+        """
+        Compiles a script. 'code' may be the full text, an open file handle
+        or an iterable of chunks; commands are streamed through the lexer.
+        Full texts go through the shared parse artifact cache instead.
+        """
+        if isinstance(code, str):
+            self.process_artifact(get_artifact(code))
+            return
+
+        for cmd_text in self.lexer.iter_commands(code):
             normalized = self.lexer.normalize_command(cmd_text)
             parsed = self.parser.parse_command(normalized)
             events = self.transformer.transform(parsed)
@@ -35,7 +46,13 @@ class CompilerPipeline:
             for event in events:
                 self._apply_event(event)
 
+    def process_artifact(self, artifact: ParseArtifact):
+        """Applies the events of an already parsed script."""
+        for event in artifact.events:
+            self._apply_event(event)
+
     def _apply_event(self, event: SemanticEvent):
+        self.events.append(event)
         if isinstance(event, ScopeResetEvent):
             if self.state._get_current_cluster().node_count > 0:
                 self.state.reset_scope()
@@ -51,7 +68,7 @@ class CompilerPipeline:
             for f in event.files:
                 self.state.register_input_file(f)
             self.join_counter += 1
-            sys_id = f"###SYS_JOIN_{self.join_counter}###"
+            sys_id = f"{SYSTEM_PREFIX}JOIN_{self.join_counter}###"
             self.state.register_assignment(sys_id, event.source_command, [])
 
         elif isinstance(event, AssignmentEvent):
@@ -63,10 +80,18 @@ class CompilerPipeline:
                 except ValueError:
                     pass 
 
+            # The AST knows when the previous version survives into the new
+            # one (IF guards, in-place RECODE, x = x + 1); keep it live.
+            if event.ast is not None and event.ast.reads_previous_target():
+                previous = self.get_variable_version(event.target)
+                if previous is not None and all(previous is not d for d in resolved_deps):
+                    resolved_deps.append(previous)
+
             self.state.register_assignment(
                 var_name=event.target,
                 source=event.source_command,
-                dependencies=resolved_deps
+                dependencies=resolved_deps,
+                ast=event.ast
             )
             
             if event.source_command.upper().startswith("IF"):
@@ -82,13 +107,18 @@ class CompilerPipeline:
     def get_variable_history(self, var_name: str) -> List[VariableVersion]:
         return self.state.get_history(var_name)
 
-    def analyze_dead_code(self) -> List[str]:
-        raw_dead_ids = self.state.find_dead_versions()
-        return [vid for vid in raw_dead_ids if "###SYS_" not in vid]
+    def analyze_dead_code(self, transitive: bool = False) -> List[str]:
+        """
+        Dead variable versions (system join nodes excluded).
+        transitive=True runs the whole-program reachability pass from the
+        saved outputs, which also catches chains that only feed dead code.
+        """
+        if transitive:
+            return self.state.find_unreachable_versions()
+        return self.state.find_dead_versions(include_system=False)
 
     def process_file(self, file_path: str):
         if not os.path.exists(file_path): 
             raise FileNotFoundError(f"Source file not found: {file_path}")
         self.source_file = file_path # Capture path
-        with open(file_path, "r", encoding="utf-8") as f: 
-            self.process(f.read())
\ No newline at end of file
+        self.process_artifact(load_artifact(file_path))
\ No newline at end of file
@@ -0,0 +1,239 @@
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("ColumnarProbe")
+
+NUMERIC = "numeric"
+STRING = "string"
+
+# Tokens PSPP writes for system-missing values in CSV output
+_MISSING_TOKENS = ["", ".", " "]
+_ROW_KEY = "__probe_key__"
+
+
+@dataclass
+class ColumnProfile:
+    """Streaming summary of one output column."""
+    name: str
+    kind: str                 # NUMERIC or STRING
+    count: int = 0            # Non-missing values
+    missing: int = 0
+    minimum: Optional[float] = None  # Numeric columns only
+    maximum: Optional[float] = None
+    digest: Optional[str] = None     # Order-sensitive hash of the typed values
+
+
+@dataclass
+class ProbeResult:
+    """
+    What a columnar probe learned about a data file without holding it:
+    row count, per-column profiles and a bounded sample of rows (indexed
+    by their original row number).
+    """
+    path: str
+    row_count: int = 0
+    columns: Dict[str, ColumnProfile] = field(default_factory=dict)
+    sample: Optional[pd.DataFrame] = None
+
+    def digests(self) -> Dict[str, Optional[str]]:
+        return {name: col.digest for name, col in self.columns.items()}
+
+    def first_values(self) -> Dict[str, str]:
+        """The first row as text (whole numbers without decimals), if sampled."""
+        if self.sample is None or not len(self.sample) or self.sample.index[0] != 0:
+            return {}
+        return {name: _as_text(value) for name, value in self.sample.iloc[0].items()}
+
+
+class ColumnarProbe:
+    """
+    Reads a CSV export (PSPP's SAVE TRANSLATE probe or an R result) in
+    fixed-size chunks and converts each chunk to typed columns: float64 for
+    numeric variables, strings otherwise. Column kinds are fixed by the
+    first chunk, like SPSS variable types; later non-numeric tokens in a
+    numeric column become missing (SYSMIS).
+
+    Memory is bounded by `chunk_rows` plus `sample_rows`, whatever the file
+    size. Sampling is either the first rows ("head") or a seeded uniform
+    sample over the whole file ("uniform").
+    """
+
+    def __init__(self, chunk_rows: int = 100_000, sample_rows: int = 1000,
+                 sample: str = "head", hash_columns: bool = True, seed: int = 0):
+        if sample not in ("head", "uniform"):
+            raise ValueError(f"Unknown sampling mode: {sample}")
+        self.chunk_rows = chunk_rows
+        self.sample_rows = sample_rows
+        self.sample = sample
+        self.hash_columns = hash_columns
+        self.seed = seed
+
+    def iter_chunks(self, csv_path: str) -> Iterator[pd.DataFrame]:
+        """
+        Yields typed chunks with upper-cased column names. The index holds
+        each row's position in the file.
+        """
+        kinds = self._sniff_kinds(csv_path)
+        if kinds is None:
+            return  # No header at all: an empty dataset
+
+        # Fast path: the C parser converts numeric columns itself.
+        dtypes = {raw: ("float64" if kind == NUMERIC else str) for raw, kind in kinds.items()}
+        emitted = 0
+        try:
+            with self._reader(csv_path, dtypes) as reader:
+                for chunk in reader:
+                    emitted += len(chunk)
+                    chunk.columns = [_normalize(c) for c in chunk.columns]
+                    yield chunk
+            return
+        except ValueError:
+            logger.warning(f"Non-numeric values in numeric columns of {csv_path}; "
+                           f"converting the rest column by column")
+
+        # Slow path from the first unconverted row: read text, coerce per column
+        with self._reader(csv_path, str, skip=emitted) as reader:
+            for raw in reader:
+                raw.index += emitted
+                yield self._convert(raw, kinds)
+
+    def load(self, csv_path: str) -> pd.DataFrame:
+        """The whole file as typed columns (memory grows with the data)."""
+        chunks = list(self.iter_chunks(csv_path))
+        if not chunks:
+            return pd.DataFrame()
+        return pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+
+    def profile(self, csv_path: str) -> ProbeResult:
+        """Streams the file once, building column profiles, hashes and the sample."""
+        return self._profile_chunks(csv_path, self.iter_chunks(csv_path))
+
+    def profile_frame(self, frame: pd.DataFrame, path: str = "") -> ProbeResult:
+        """Same profile for a table already in memory (or memory-mapped), chunk by chunk."""
+        chunks = (frame.iloc[start:start + self.chunk_rows]
+                  for start in range(0, len(frame), self.chunk_rows))
+        return self._profile_chunks(path, chunks)
+
+    def _profile_chunks(self, path: str, chunks: Iterator[pd.DataFrame]) -> ProbeResult:
+        result = ProbeResult(path)
+        hashers: Dict[str, "hashlib._Hash"] = {}
+        sample: Optional[pd.DataFrame] = None
+        rng = np.random.default_rng(self.seed)
+
+        for chunk in chunks:
+            result.row_count += len(chunk)
+
+            for name in chunk.columns:
+                column = chunk[name]
+                profile = result.columns.get(name)
+                if profile is None:
+                    kind = NUMERIC if column.dtype.kind == "f" else STRING
+                    profile = result.columns[name] = ColumnProfile(name, kind)
+                self._update_profile(profile, column)
+                if self.hash_columns:
+                    hasher = hashers.setdefault(name, hashlib.sha256())
+                    hashed = pd.util.hash_pandas_object(column, index=False)
+                    hasher.update(hashed.to_numpy().tobytes())
+
+            if self.sample_rows > 0:
+                sample = self._update_sample(sample, chunk, rng)
+
+        for name, hasher in hashers.items():
+            result.columns[name].digest = hasher.hexdigest()
+        if sample is not None:
+            if _ROW_KEY in sample.columns:
+                sample = sample.drop(columns=_ROW_KEY).sort_index()
+            result.sample = sample
+        return result
+
+    # --- Internals ---
+    def _reader(self, csv_path: str, dtype, skip: int = 0):
+        return pd.read_csv(
+            csv_path,
+            dtype=dtype,
+            encoding="utf-8-sig",
+            skipinitialspace=True,
+            na_values=_MISSING_TOKENS,
+            keep_default_na=False,
+            skiprows=range(1, skip + 1) if skip else None,
+            chunksize=self.chunk_rows,
+        )
+
+    def _sniff_kinds(self, csv_path: str) -> Optional[Dict[str, str]]:
+        """Column kinds (keyed by raw header) from the first chunk's text."""
+        try:
+            with self._reader(csv_path, str) as reader:
+                head = next(reader, None)
+        except pd.errors.EmptyDataError:
+            return None
+        if head is None:
+            return None
+        return {raw: self._infer_kind(head[raw]) for raw in head.columns}
+
+    @staticmethod
+    def _infer_kind(raw: pd.Series) -> str:
+        present = raw.dropna()
+        if present.empty:
+            return NUMERIC  # All SYSMIS: SPSS numerics are the default type
+        converted = pd.to_numeric(present, errors="coerce")
+        return NUMERIC if not converted.isna().any() else STRING
+
+    @staticmethod
+    def _convert(raw: pd.DataFrame, kinds: Dict[str, str]) -> pd.DataFrame:
+        columns = {}
+        for name in raw.columns:
+            column = raw[name]
+            if kinds.get(name) == NUMERIC:
+                values = pd.to_numeric(column, errors="coerce").astype("float64")
+                coerced = int(values.isna().sum() - column.isna().sum())
+                if coerced:
+                    logger.warning(f"{coerced} non-numeric value(s) in numeric column {name} "
+                                   "read as missing")
+                column = values
+            columns[_normalize(name)] = column
+        return pd.DataFrame(columns, index=raw.index)
+
+    @staticmethod
+    def _update_profile(profile: ColumnProfile, column: pd.Series):
+        missing = int(column.isna().sum())
+        profile.missing += missing
+        profile.count += len(column) - missing
+        if profile.kind == NUMERIC and missing < len(column):
+            values = column.to_numpy()
+            low, high = float(np.nanmin(values)), float(np.nanmax(values))
+            profile.minimum = low if profile.minimum is None else min(profile.minimum, low)
+            profile.maximum = high if profile.maximum is None else max(profile.maximum, high)
+
+    def _update_sample(self, sample: Optional[pd.DataFrame], chunk: pd.DataFrame,
+                       rng: np.random.Generator) -> pd.DataFrame:
+        if self.sample == "head":
+            if sample is not None and len(sample) >= self.sample_rows:
+                return sample
+            head = chunk.iloc[: self.sample_rows - (0 if sample is None else len(sample))]
+            return head if sample is None else pd.concat([sample, head])
+
+        # Uniform: keep the rows with the smallest random keys seen so far
+        # (bottom-k sampling), which is a uniform sample without replacement.
+        keyed = chunk.assign(**{_ROW_KEY: rng.random(len(chunk))})
+        merged = keyed if sample is None else pd.concat([sample, keyed])
+        if len(merged) <= self.sample_rows:
+            return merged
+        return merged.nsmallest(self.sample_rows, _ROW_KEY)
+
+
+def _normalize(column) -> str:
+    # PSPP headers may carry stray whitespace; the engine uses upper case
+    return str(column).strip().upper()
+
+
+def _as_text(value) -> str:
+    if pd.isna(value):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
@@ -1,5 +1,21 @@
+import fnmatch
 import os
-from typing import Dict, List, Optional
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+@dataclass(frozen=True)
+class FileInfo:
+    """Index entry recorded during the scan (no content is read)."""
+    full_path: str
+    size: int
+    mtime: float
+
+# End-of-walk marker on the discovery queue
+_WALK_DONE = object()
 
 class Repository:
     """
@@ -9,53 +25,201 @@ class Repository:
     # FIX: Removed '.txt' so we don't accidentally scan Readmes or logs.
     VALID_EXTENSIONS = {'.spss', '.sps'}
 
-    def __init__(self, root_path: str):
+    # Default content budget for lazy mode
+    DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+    # Directory batches buffered between walker threads and the consumer
+    WALK_QUEUE_SIZE = 256
+
+    def __init__(
+        self,
+        root_path: str,
+        lazy: bool = False,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+        include: Optional[Sequence[str]] = None,
+        exclude: Optional[Sequence[str]] = None,
+        walk_workers: int = 1,
+    ):
+        """
+        lazy=False reads every file during scan (original behaviour).
+        lazy=True only indexes path/size/mtime; content is read on the first
+        get_content and kept in an LRU cache bounded by cache_bytes.
+
+        include: glob patterns selecting files (default: VALID_EXTENSIONS).
+        exclude: glob patterns for files or directories to skip.
+        Patterns match the forward-slash relative path or the bare name.
+        walk_workers > 1 lists directories concurrently (network shares).
+        """
         if not os.path.exists(root_path):
             raise FileNotFoundError(f"Repository root not found: {root_path}")
             
         self.root_path = os.path.abspath(root_path)
-        self._files: Dict[str, str] = {} # Key: Relative Path, Value: Content
+        self.lazy = lazy
+        self.cache_bytes = cache_bytes
+        default_include = [f"*{ext}" for ext in sorted(self.VALID_EXTENSIONS)]
+        self.include = list(include) if include else default_include
+        self.exclude = list(exclude) if exclude else []
+        self.walk_workers = walk_workers
+        self._index: Dict[str, FileInfo] = {} # Key: Relative Path
+        self._files: Dict[str, str] = OrderedDict() # Key: Relative Path, Value: Content
+        self._cached_bytes = 0
         self._specs: Dict[str, str] = {} # Key: Relative Path, Value: Markdown Spec
 
     def scan(self):
         """
         Recursively finds all valid SPSS files in the root_path.
         """
+        for _ in self.iter_scan():
+            pass
+
+    def iter_scan(self) -> Iterator[str]:
+        """
+        Streaming scan: yields relative paths as the walker discovers them,
+        so callers can start work before the walk has finished. Discovery
+        order is arbitrary when walking concurrently; list_files() is
+        sorted once the scan completes.
+        """
+        self._index.clear()
         self._files.clear()
-        
-        for root, _, files in os.walk(self.root_path):
-            for file in files:
-                ext = os.path.splitext(file)[1].lower()
-                if ext in self.VALID_EXTENSIONS:
-                    full_path = os.path.join(root, file)
-                    
-                    # Calculate relative path
-                    rel_path = os.path.relpath(full_path, self.root_path)
-                    
-                    # Normalize to forward slashes for internal consistency
-                    rel_path = rel_path.replace(os.sep, "/")
-                    
-                    try:
-                        with open(full_path, 'r', encoding='utf-8') as f:
-                            self._files[rel_path] = f.read()
-                    except UnicodeDecodeError:
-                        # Fallback for legacy encodings often found in SPSS
-                        with open(full_path, 'r', encoding='latin-1') as f:
-                            self._files[rel_path] = f.read()
+        self._cached_bytes = 0
+
+        walk = self._walk_concurrent() if self.walk_workers > 1 else self._walk()
+        for rel_path, info in walk:
+            self._index[rel_path] = info
+            if not self.lazy:
+                self._files[rel_path] = self._read(info.full_path)
+            yield rel_path
+
+    @staticmethod
+    def _matches(rel_path: str, name: str, patterns: Sequence[str]) -> bool:
+        return any(fnmatch.fnmatch(rel_path, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+    def _list_directory(self, directory: str) -> Tuple[List[Tuple[str, FileInfo]], List[str]]:
+        """One scandir call: returns (matching files, subdirectories to visit)."""
+        files, subdirs = [], []
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return files, subdirs
+        for entry in entries:
+            # Normalize to forward slashes for internal consistency
+            rel_path = os.path.relpath(entry.path, self.root_path).replace(os.sep, "/")
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not self._matches(rel_path, entry.name, self.exclude):
+                        subdirs.append(entry.path)
+                    continue
+                if not self._matches(rel_path, entry.name.lower(), self.include) \
+                        and not self._matches(rel_path, entry.name, self.include):
+                    continue
+                if self._matches(rel_path, entry.name, self.exclude) or not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            files.append((rel_path, FileInfo(entry.path, st.st_size, st.st_mtime)))
+        return files, subdirs
+
+    def _walk(self) -> Iterator[Tuple[str, FileInfo]]:
+        """Yields (relative path, FileInfo) using os.scandir (stat data comes with the listing)."""
+        pending = [self.root_path]
+        while pending:
+            files, subdirs = self._list_directory(pending.pop())
+            pending.extend(subdirs)
+            yield from files
+
+    def _walk_concurrent(self) -> Iterator[Tuple[str, FileInfo]]:
+        """
+        Lists directories on a thread pool. Each task scans one directory,
+        schedules its subdirectories and pushes its files onto a bounded
+        queue, which the caller drains as a stream.
+        """
+        results: "queue.Queue" = queue.Queue(maxsize=self.WALK_QUEUE_SIZE)
+        stop = threading.Event()
+        lock = threading.Lock()
+        outstanding = [1]  # Directories scheduled but not finished
+
+        def put(item) -> bool:
+            # Back-pressure without deadlocking if the consumer goes away
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def visit(directory: str):
+            try:
+                files, subdirs = self._list_directory(directory)
+                with lock:
+                    outstanding[0] += len(subdirs)
+                for subdir in subdirs:
+                    if stop.is_set():
+                        break
+                    pool.submit(visit, subdir)
+                if files:
+                    put(files)
+            finally:
+                with lock:
+                    outstanding[0] -= 1
+                    done = outstanding[0] == 0
+                if done:
+                    put(_WALK_DONE)
+
+        pool = ThreadPoolExecutor(max_workers=self.walk_workers, thread_name_prefix="repo-walk")
+        try:
+            pool.submit(visit, self.root_path)
+            while True:
+                batch = results.get()
+                if batch is _WALK_DONE:
+                    break
+                yield from batch
+        finally:
+            stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _read(full_path: str) -> str:
+        try:
+            with open(full_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except UnicodeDecodeError:
+            # Fallback for legacy encodings often found in SPSS
+            with open(full_path, 'r', encoding='latin-1') as f:
+                return f.read()
 
     def list_files(self) -> List[str]:
-        """Returns a list of all loaded file relative paths."""
-        return sorted(list(self._files.keys()))
+        """Returns a list of all indexed file relative paths."""
+        return sorted(self._index.keys())
+
+    def get_file_info(self, relative_path: str) -> Optional[FileInfo]:
+        return self._index.get(relative_path.replace(os.sep, "/"))
 
     def get_content(self, relative_path: str) -> Optional[str]:
-        """Retrieves raw code for a specific file."""
+        """Retrieves raw code for a specific file (read on demand in lazy mode)."""
         normalized = relative_path.replace(os.sep, "/")
-        return self._files.get(normalized)
+        content = self._files.get(normalized)
+        if content is not None or not self.lazy:
+            if content is not None and self.lazy:
+                self._files.move_to_end(normalized)
+            return content
+
+        info = self._index.get(normalized)
+        if info is None:
+            return None
+        content = self._read(info.full_path)
+        self._files[normalized] = content
+        self._cached_bytes += info.size
+        # Evict least recently used files, but always keep the one just read
+        while self._cached_bytes > self.cache_bytes and len(self._files) > 1:
+            evicted, _ = self._files.popitem(last=False)
+            self._cached_bytes -= self._index[evicted].size
+        return content
 
     def save_spec(self, relative_path: str, spec_content: str):
         """Stores a generated specification for a file."""
         normalized = relative_path.replace(os.sep, "/")
-        if normalized not in self._files:
+        if normalized not in self._index:
             raise ValueError(f"File {relative_path} does not exist in repository.")
         self._specs[normalized] = spec_content
 
@@ -2,30 +2,156 @@
 import subprocess
 import os
 import csv
+import uuid
+import queue
+import re
+import signal
 import logging
-from typing import Dict, List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from spss_engine.probe import ColumnarProbe, ProbeResult
 
 logger = logging.getLogger(__name__)
 
+# Printed by ECHO after each pooled job; marks the end of its output.
+_SENTINEL = "STATIFY_JOB_DONE"
+# Named file handles a script declares (closed again after a pooled job)
+_FILE_HANDLE = re.compile(r"^\s*FILE\s+HANDLE\s+([A-Za-z@#$][\w.@#$]*)",
+                          re.IGNORECASE | re.MULTILINE)
+
+
+class _PsppSession:
+    """
+    One long-lived 'pspp' process reading syntax from stdin.
+    A reader thread moves stdout lines onto a queue so waits can time out.
+    """
+
+    def __init__(self, executable: str):
+        self.executable = executable
+        self.proc: Optional[subprocess.Popen] = None
+        self.lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.jobs_run = 0
+
+    def start(self):
+        self.proc = subprocess.Popen(
+            [self.executable],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            # Own process group, so a hung job can be killed with its children
+            start_new_session=True,
+        )
+        self.lines = queue.Queue()
+        threading.Thread(target=self._pump, args=(self.proc, self.lines), daemon=True).start()
+
+    @staticmethod
+    def _pump(proc: subprocess.Popen, lines: "queue.Queue"):
+        for line in proc.stdout:
+            lines.put(line.rstrip("\n"))
+        lines.put(None)  # EOF: the process exited
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def run(self, syntax: str, timeout: Optional[float]) -> List[str]:
+        """Sends one job and returns its output lines (up to the sentinel)."""
+        if not self.alive():
+            self.start()
+        token = f"{_SENTINEL} {uuid.uuid4().hex}"
+        try:
+            self.proc.stdin.write(f"{syntax}\nECHO '{token}'.\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.kill()
+            raise RuntimeError(f"PSPP process died before accepting the job: {e}")
+
+        # The timeout covers the whole job, not each line: a job that keeps
+        # printing must not run forever
+        deadline = None if timeout is None else time.monotonic() + timeout
+        output = []
+        while True:
+            try:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                line = self.lines.get(timeout=remaining)
+            except queue.Empty:
+                self.kill()
+                raise TimeoutError(f"PSPP job timed out after {timeout}s")
+            if line is None:
+                code = self.proc.wait()
+                self.proc = None
+                raise RuntimeError(f"PSPP process exited with code {code}:\n" + "\n".join(output))
+            if token in line:
+                self.jobs_run += 1
+                return output
+            output.append(line)
+
+    def kill(self):
+        if self.proc is None:
+            return
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        self.proc.wait()
+        self.proc = None
+
+    def close(self):
+        if self.alive():
+            try:
+                self.proc.stdin.write("FINISH.\n")
+                self.proc.stdin.close()
+                self.proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        self.kill()
+
 
 class PsppRunner:
     """
     Executes SPSS code using the system 'pspp' binary and captures the output state.
+
+    By default every call starts a fresh 'pspp' process. With pool_size > 0
+    the runner keeps that many long-lived processes and feeds them jobs over
+    stdin (at most pool_size jobs run at once). Each pooled job CDs into the
+    script's folder so relative data paths resolve as in a fresh run, while
+    its temporary copy is written to the output folder (the source tree may
+    be read-only). A job that hangs past `timeout` or crashes its process
+    gets the process replaced, and crashes are retried up to `max_retries`
+    times.
+
+    Between pooled jobs the session is reset: SET options (PRESERVE /
+    RESTORE), named datasets, the file handles the script declares and the
+    active dataset. Macros (DEFINE) cannot be undefined in PSPP and stay
+    visible to later jobs on the same process; a script that defines a
+    macro of the same name replaces it.
     """
 
-    def __init__(self, executable: str = "pspp"):
+    def __init__(self, executable: str = "pspp", pool_size: int = 0,
+                 timeout: Optional[float] = None, max_retries: int = 1):
         self.executable = executable
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._idle: "queue.LifoQueue[_PsppSession]" = queue.LifoQueue()
+        self._sessions: List[_PsppSession] = []
+        if pool_size > 0:
+            for _ in range(pool_size):
+                session = _PsppSession(executable)
+                self._sessions.append(session)
+                self._idle.put(session)
 
-
-    def run_and_probe(self, file_path: str, output_dir: str = ".") -> Dict[str, str]:
-        """
-        Runs the SPSS file and returns the final values of the first row of data.
-        Returns: Dict {Variable: Value}
-        """
+    def _prepare(self, file_path: str, output_dir: str) -> Tuple[str, str, str, str]:
+        """Returns (source_dir, base_name, csv_path, probed script text)."""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Source file not found: {file_path}")
 
-        # 1. Resolve Paths
         # We need absolute paths because we are going to change the CWD
         abs_file_path = os.path.abspath(file_path)
         abs_output_dir = os.path.abspath(output_dir)
@@ -33,24 +159,58 @@ class PsppRunner:
         
         base_name = os.path.splitext(os.path.basename(file_path))[0]
         csv_path = os.path.join(abs_output_dir, f"{base_name}_probe.csv")
-        temp_script_path = os.path.join(abs_output_dir, f"{base_name}_temp.sps")
 
-        # 2. Read Original Code
         with open(abs_file_path, 'r') as f:
             original_code = f.read()
 
-        # 3. Inject "The Probe"
+        # Inject "The Probe"
         # Note: We must use the ABSOLUTE path for the probe output, 
         # because PSPP will be running inside 'source_dir', but we want output in 'docs/'
         # Windows/PSPP sometimes struggles with paths, but forward slashes usually work.
         csv_path_safe = csv_path.replace(os.sep, "/")
-        
         probe_cmd = f"\nSAVE TRANSLATE /OUTFILE='{csv_path_safe}' /TYPE=CSV /FIELDNAMES /REPLACE.\n"
+        return source_dir, base_name, csv_path, original_code + probe_cmd
+
+    def run_and_probe(self, file_path: str, output_dir: str = ".") -> Dict[str, str]:
+        """
+        Runs the SPSS file and returns the final values of the first row of data.
+        Returns: Dict {Variable: Value}
+        """
+        return self._read_first_row(self._execute(file_path, output_dir))
+
+    def run_and_profile(self, file_path: str, output_dir: str = ".",
+                        probe: Optional[ColumnarProbe] = None) -> ProbeResult:
+        """
+        Runs the SPSS file and streams the complete output dataset through a
+        ColumnarProbe: row count, typed column profiles, per-column hashes
+        and a bounded row sample. The probe CSV stays in output_dir.
+        """
+        return (probe or ColumnarProbe()).profile(self._execute(file_path, output_dir))
+
+    def run_and_load(self, file_path: str, output_dir: str = ".",
+                     probe: Optional[ColumnarProbe] = None) -> Tuple[pd.DataFrame, ProbeResult]:
+        """
+        Like run_and_profile, for callers that also need the whole table
+        (e.g. an equivalence check): the CSV is parsed once and the profile
+        is built from the loaded columns.
+        """
+        probe = probe or ColumnarProbe()
+        csv_path = self._execute(file_path, output_dir)
+        table = probe.load(csv_path)
+        return table, probe.profile_frame(table, csv_path)
+
+    def _execute(self, file_path: str, output_dir: str) -> str:
+        """Runs the probed script and returns the path of the output CSV."""
+        if self.pool_size > 0:
+            return self._run_pooled(file_path, output_dir)
+
+        source_dir, base_name, csv_path, script = self._prepare(file_path, output_dir)
+        temp_script_path = os.path.join(os.path.abspath(output_dir), f"{base_name}_temp.sps")
         
         with open(temp_script_path, 'w') as f:
-            f.write(original_code + probe_cmd)
+            f.write(script)
 
-        # 4. Execute PSPP
+        # Execute PSPP
         # FIX: Removed "-b". 
         # The legacy code uses "Interactive" style syntax (subcommands in col 1, explicit dots).
         # -b enforces "Batch" rules (indentation required), which causes the crash.
@@ -63,7 +223,8 @@ class PsppRunner:
                 capture_output=True, 
                 text=True, 
                 check=True,
-                cwd=source_dir 
+                cwd=source_dir,
+                timeout=self.timeout
             )
             logger.info(f"PSPP Execution successful for {base_name}")
         except subprocess.CalledProcessError as e:
@@ -75,10 +236,91 @@ class PsppRunner:
             if os.path.exists(temp_script_path):
                 os.remove(temp_script_path)
 
-        # 5. Read the Probe (CSV)
-        return self._read_first_row(csv_path)
+        return csv_path
+
+    def _run_pooled(self, file_path: str, output_dir: str) -> str:
+        source_dir, base_name, csv_path, script = self._prepare(file_path, output_dir)
+
+        # The copy stays out of the (possibly read-only) source tree; CD makes
+        # the script's own relative paths resolve from its folder.
+        temp_script_path = os.path.join(
+            os.path.abspath(output_dir), f".{base_name}_{uuid.uuid4().hex[:8]}_probe.sps")
+        with open(temp_script_path, 'w') as f:
+            f.write(script)
+        if os.path.exists(csv_path):
+            os.remove(csv_path)  # Never read a stale probe
+
+        insert_path = temp_script_path.replace(os.sep, "/")
+        cd_path = source_dir.replace(os.sep, "/")
+        handles = sorted({name.upper() for name in _FILE_HANDLE.findall(script)})
+        job = "\n".join([
+            "NEW FILE.",
+            "PRESERVE.",
+            f"CD '{cd_path}'.",
+            f"INSERT FILE='{insert_path}' CD=NO ERROR=CONTINUE SYNTAX=INTERACTIVE.",
+            # Leave nothing behind for the session's next job
+            "RESTORE.",
+            "DATASET CLOSE ALL.",
+            *(f"CLOSE FILE HANDLE {name}." for name in handles),
+            "NEW FILE.",
+        ])
+        try:
+            output = self._submit(job)
+        finally:
+            if os.path.exists(temp_script_path):
+                os.remove(temp_script_path)
+
+        if not os.path.exists(csv_path):
+            detail = "\n".join(output)
+            logger.error(f"PSPP Failed:\n{detail}")
+            raise RuntimeError(f"PSPP execution failed: {detail}")
+        logger.info(f"PSPP Execution successful for {base_name}")
+        return csv_path
+
+    def _submit(self, job: str) -> List[str]:
+        """Runs a job on an idle session (blocking while all are busy)."""
+        session = self._idle.get()
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return session.run(job, self.timeout)
+                except RuntimeError as e:
+                    # Crashed process: the session restarts on the next run
+                    if attempt == self.max_retries:
+                        raise
+                    logger.warning(f"PSPP process crashed, retrying job: {e}")
+        finally:
+            self._idle.put(session)
+
+    def run_batch(self, jobs: Sequence[Tuple[str, str]], probe: Optional[ColumnarProbe] = None
+                  ) -> List[Union[Dict[str, str], ProbeResult, Exception]]:
+        """
+        Runs several (file_path, output_dir) jobs across the pool.
+        Results are returned in input order; failed jobs yield their exception.
+        With a probe, each result is a ProbeResult instead of the first row.
+        """
+        def _one(job):
+            try:
+                if probe is not None:
+                    return self.run_and_profile(*job, probe=probe)
+                return self.run_and_probe(*job)
+            except Exception as e:
+                return e
+
+        workers = max(1, self.pool_size)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_one, jobs))
+
+    def close(self):
+        """Stops pooled PSPP processes."""
+        for session in self._sessions:
+            session.close()
 
+    def __enter__(self):
+        return self
 
+    def __exit__(self, *exc):
+        self.close()
 
     def _read_first_row(self, csv_path: str) -> Dict[str, str]:
         if not os.path.exists(csv_path):
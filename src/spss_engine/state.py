@@ -1,22 +1,74 @@
+from array import array
 from typing import Dict, List, Set, Optional
 from dataclasses import dataclass, field
+from spss_engine.expression import AssignmentAst, parse_assignment
 
-@dataclass
+# Synthetic nodes (e.g. MATCH FILES joins) carry this name prefix and are
+# never reported as dead code.
+SYSTEM_PREFIX = "###SYS_"
+
+@dataclass(slots=True)
 class VariableVersion:
     name: str
     version: int
     source: str 
     dependencies: List['VariableVersion'] = field(default_factory=list)
     cluster_index: int = 0
+    ast: Optional[AssignmentAst] = None
+    index: int = -1  # Position in StateMachine.nodes (integer node id)
+    _id: Optional[str] = field(default=None, init=False, repr=False, compare=False)
     
     @property
     def id(self):
-        return f"{self.name}_{self.version}"
+        # Built once; ids are read in hot loops (dead code, graphs, reports)
+        if self._id is None:
+            self._id = f"{self.name}_{self.version}"
+        return self._id
+
+    def get_ast(self) -> Optional[AssignmentAst]:
+        """Returns the parsed command, parsing (and caching) it on first use."""
+        if self.ast is None:
+            self.ast = parse_assignment(self.source)
+        return self.ast
 
     # 🟢 ADD THIS METHOD
     def __str__(self):
         return self.id
 
+
+class CompactVariableVersion(VariableVersion):
+    """
+    Node used by StateMachine(compact=True). Dependency edges live in the
+    owning machine's flat integer arrays instead of a per-node list, and
+    parsed ASTs are not retained (get_ast re-parses on demand).
+    Equality is identity, so comparisons never walk the graph.
+    """
+    __slots__ = ("_state",)
+
+    def __init__(self, state: "StateMachine", index: int, name: str, version: int,
+                 source: str, cluster_index: int):
+        self._state = state
+        self.index = index
+        self.name = name
+        self.version = version
+        self.source = source
+        self.cluster_index = cluster_index
+        self.ast = None
+        self._id = None
+
+    @property
+    def dependencies(self) -> List[VariableVersion]:
+        return self._state.get_dependencies(self)
+
+    def get_ast(self) -> Optional[AssignmentAst]:
+        return parse_assignment(self.source)
+
+    def __repr__(self):
+        return f"CompactVariableVersion({self.id})"
+
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
 @dataclass
 class ClusterMetadata:
     index: int
@@ -25,7 +77,14 @@ class ClusterMetadata:
     node_count: int = 0 
 
 class StateMachine:
-    def __init__(self):
+    def __init__(self, compact: bool = False):
+        """
+        compact=True trades a little lookup speed for memory on very large
+        corpora: nodes are CompactVariableVersion, names and sources are
+        interned, and dependency edges are stored CSR-style (one offsets
+        array plus one flat array of node indices).
+        """
+        self.compact = compact
         self.history_ledger: Dict[str, List[VariableVersion]] = {}
         self.nodes: List[VariableVersion] = []
         self.conditionals: List[str] = []
@@ -34,6 +93,22 @@ class StateMachine:
         self.clusters: List[ClusterMetadata] = [ClusterMetadata(index=0)]
         self.current_cluster_index = 0
 
+        # Lookup indexes, maintained by register_assignment / reset_scope
+        self._nodes_by_id: Dict[str, VariableVersion] = {}
+        self._cluster_nodes: List[List[VariableVersion]] = [[]]
+
+        # Compact mode storage: edges of node i are
+        # _dep_targets[_dep_offsets[i]:_dep_offsets[i + 1]]
+        self._strings: Dict[str, str] = {}
+        self._dep_offsets = array("q", [0])
+        self._dep_targets = array("q")
+        self._foreign_deps: Dict[int, list] = {}  # Non-node deps (e.g. raw id strings)
+
+        # Liveness bookkeeping, per node index: how many later versions read
+        # it, and whether it is a synthetic system node.
+        self._read_counts = array("q")
+        self._is_system = bytearray()
+
     def get_history(self, var_name: str) -> List[VariableVersion]:
         return self.history_ledger.get(var_name.upper(), [])
 
@@ -43,46 +118,146 @@ class StateMachine:
             raise ValueError(f"Variable {var_name} not found in history.")
         return history[-1]
 
-    def register_assignment(self, var_name: str, source: str, dependencies: List[VariableVersion] = None):
+    def register_assignment(self, var_name: str, source: str,
+                            dependencies: List[VariableVersion] = None,
+                            ast: Optional[AssignmentAst] = None):
         if dependencies is None: dependencies = []
             
         var_upper = var_name.upper()
         history = self.get_history(var_upper)
         new_version_num = len(history)
+
+        # Edges to nodes of this machine, as integer ids
+        dep_indices = [dep.index for dep in dependencies if self._owns(dep)]
+        for target in dep_indices:
+            self._read_counts[target] += 1
+        self._read_counts.append(0)
+        self._is_system.append(var_upper.startswith(SYSTEM_PREFIX))
         
-        new_node = VariableVersion(
-            name=var_upper, 
-            version=new_version_num, 
-            source=source, 
-            dependencies=dependencies,
-            cluster_index=self.current_cluster_index 
-        )
+        if self.compact:
+            new_node = self._new_compact_node(
+                var_upper, new_version_num, source, dependencies, dep_indices)
+        else:
+            new_node = VariableVersion(
+                name=var_upper, 
+                version=new_version_num, 
+                source=source, 
+                dependencies=dependencies,
+                cluster_index=self.current_cluster_index,
+                ast=ast,
+                index=len(self.nodes)
+            )
         
         if var_upper not in self.history_ledger:
-            self.history_ledger[var_upper] = []
+            self.history_ledger[new_node.name] = []
             
-        self.history_ledger[var_upper].append(new_node)
+        self.history_ledger[new_node.name].append(new_node)
         self.nodes.append(new_node)
+        # Ids repeat across clusters (the ledger resets per scope); the first
+        # registration wins, matching a front-to-back scan of self.nodes.
+        self._nodes_by_id.setdefault(new_node.id, new_node)
+        self._cluster_nodes[self.current_cluster_index].append(new_node)
         self._get_current_cluster().node_count += 1
         return new_node
 
+    def _intern(self, text: str) -> str:
+        return self._strings.setdefault(text, text)
+
+    def _owns(self, node) -> bool:
+        return isinstance(node, VariableVersion) and 0 <= node.index < len(self.nodes) \
+            and self.nodes[node.index] is node
+
+    def _new_compact_node(self, name: str, version: int, source: str,
+                          dependencies: list, dep_indices: List[int]) -> CompactVariableVersion:
+        index = len(self.nodes)
+        # Only nodes of this machine fit in the index arrays
+        self._dep_targets.extend(dep_indices)
+        self._dep_offsets.append(len(self._dep_targets))
+        foreign = [dep for dep in dependencies if not self._owns(dep)]
+        if foreign:
+            self._foreign_deps[index] = foreign
+        return CompactVariableVersion(
+            self, index, self._intern(name), version, self._intern(source),
+            self.current_cluster_index,
+        )
+
+    def get_dependencies(self, node: VariableVersion) -> List[VariableVersion]:
+        """Dependencies of a node (materialised from the edge arrays in compact mode)."""
+        if not isinstance(node, CompactVariableVersion):
+            return node.dependencies
+        i = node.index
+        targets = self._dep_targets[self._dep_offsets[i]:self._dep_offsets[i + 1]]
+        deps = [self.nodes[t] for t in targets]
+        return deps + self._foreign_deps.get(i, [])
+
+    def get_node(self, node_id: str) -> Optional[VariableVersion]:
+        """O(1) lookup of a version by its id (e.g. 'AGE_2')."""
+        return self._nodes_by_id.get(node_id)
+
+    def get_cluster_nodes(self, cluster_index: int) -> List[VariableVersion]:
+        """Nodes of one cluster, in registration order."""
+        if 0 <= cluster_index < len(self._cluster_nodes):
+            return self._cluster_nodes[cluster_index]
+        return []
+
     def register_conditional(self, command: str):
         self.conditionals.append(command)
 
     def register_control_flow(self, command: str):
         self.control_flow.append(command)
         
-    def find_dead_versions(self) -> List[str]:
-        usage_map = {node.id: 0 for node in self.nodes}
+    def find_dead_versions(self, include_system: bool = True) -> List[str]:
+        """
+        Versions in the current scope that are overwritten without ever
+        being read. Uses the read counts kept by register_assignment, so
+        no usage map is rebuilt.
+        """
+        reads, system = self._read_counts, self._is_system
+        return [
+            ver.id
+            for history in self.history_ledger.values()
+            for ver in history[:-1]
+            if reads[ver.index] == 0 and (include_system or not system[ver.index])
+        ]
+
+    def _dependency_indices(self, index: int):
+        if self.compact:
+            return self._dep_targets[self._dep_offsets[index]:self._dep_offsets[index + 1]]
+        return [dep.index for dep in self.nodes[index].dependencies if self._owns(dep)]
+
+    def live_roots(self) -> List[int]:
+        """
+        Node indices whose values leave the script: the final version of
+        every variable in a cluster that writes an output (SAVE, AGGREGATE
+        ...) and in the last cluster, which is still the active dataset
+        when the script ends.
+        """
+        last = len(self.clusters) - 1
+        finals: Dict[tuple, int] = {}
         for node in self.nodes:
-            for dep in node.dependencies:
-                usage_map[dep.id] += 1
-        dead_ids = []
-        for var_name, history in self.history_ledger.items():
-            for i, ver in enumerate(history):
-                if i == len(history) - 1: continue
-                if usage_map[ver.id] == 0: dead_ids.append(ver.id)
-        return dead_ids
+            idx = node.cluster_index
+            if idx == last or (0 <= idx < len(self.clusters) and self.clusters[idx].outputs):
+                finals[(idx, node.name)] = node.index
+        return sorted(i for i in finals.values() if not self._is_system[i])
+
+    def find_unreachable_versions(self) -> List[str]:
+        """
+        Whole-program dead code: versions that no live root reads, directly
+        or through a chain of other versions. One backward sweep, O(V + E).
+        """
+        live = bytearray(len(self.nodes))
+        stack = self.live_roots()
+        for i in stack:
+            live[i] = 1
+        while stack:
+            for dep in self._dependency_indices(stack.pop()):
+                if not live[dep]:
+                    live[dep] = 1
+                    stack.append(dep)
+        return [
+            node.id for node in self.nodes
+            if not live[node.index] and not self._is_system[node.index]
+        ]
 
     def _get_current_cluster(self) -> ClusterMetadata:
         return self.clusters[self.current_cluster_index]
@@ -116,4 +291,5 @@ class StateMachine:
             return
 
         self.current_cluster_index += 1
-        self.clusters.append(ClusterMetadata(index=self.current_cluster_index))
\ No newline at end of file
+        self.clusters.append(ClusterMetadata(index=self.current_cluster_index))
+        self._cluster_nodes.append([])
\ No newline at end of file
@@ -54,15 +54,15 @@ class CommandTransformer:
                 events.append(FileSaveEvent(command.raw, filename=fname))
 
         elif command.type in (TokenType.ASSIGNMENT, TokenType.RECODE, TokenType.CONDITIONAL):
-            target = self.extractor.extract_target(command.raw)
+            # Parsed once; the AST travels with the event into the State Machine
+            target, raw_deps, ast = self.extractor.analyze(command.raw)
             if target:
-                raw_deps = self.extractor.extract_dependencies(command.raw)
-                raw_deps = [d for d in raw_deps if d.upper() != target.upper()]
                 events.append(AssignmentEvent(
                     source_command=command.raw,
                     target=target,
                     dependencies=raw_deps,
-                    expression=command.raw
+                    expression=command.raw,
+                    ast=ast
                 ))
 
         elif command.type == TokenType.AGGREGATE:
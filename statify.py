@@ -3,26 +3,72 @@ import os
 import argparse
 import logging
 import shutil
-from typing import List
+import multiprocessing.util
+from typing import Dict, List, Optional, Tuple, Union
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 # --- CORE COMPONENTS ---
 from spec_writer.review import ProjectArchitect
 from code_forge.refiner import CodeRefiner
 from code_forge.R_runner import RRunner
+from code_forge.r_session import RSession
 from code_forge.generator import RGenerator
 from spss_engine.pipeline import CompilerPipeline
 from spss_engine.repository import Repository
 from spss_engine.spss_runner import PsppRunner
-from spec_writer.graph import GraphGenerator
+from spec_writer.graph import GraphGenerator, LARGE_GRAPH_NODES
+from spec_writer.dot_renderer import BatchRenderer, RenderResult
 from spec_writer.describer import SpecGenerator
-from common.llm import OllamaClient
+from common.llm import OllamaClient, CACHE_ENV_VAR
+from common.manifest import BuildManifest
+from common.data_store import DataStore, UNCHANGED
+from common.equivalence import EquivalenceChecker, EquivalenceReport
 from spss_engine.inspector import SourceInspector  # 🟢 REQUIRED for robust file finding
+from spss_engine.lexer import SourceLike
+from spss_engine.artifact import ParseArtifact, load_artifact
 
 # Setup Logging (Default INFO)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s', datefmt='%H:%M:%S')
 logger = logging.getLogger("Statify")
 
+# Threads used to list directories when scanning a source tree
+WALK_WORKERS = 8
+# Per-script limit for the PSPP verification probe (seconds)
+PSPP_TIMEOUT = 600
+
+# Long-lived PSPP, R and dot processes of a batch worker (see _init_worker)
+_worker_pspp: Optional[PsppRunner] = None
+_worker_r: Optional[RSession] = None
+_worker_renderer: Optional[BatchRenderer] = None
+# A worker's view of the output root's data store (keeps its digest index loaded)
+_worker_store: Optional[DataStore] = None
+# Read-only copy of the build manifest; jobs fingerprint with its memoised hashes
+_worker_manifest: Optional[BuildManifest] = None
+
+def _batch_pspp_runner() -> Optional[PsppRunner]:
+    """A one-process pooled runner reused across files, if PSPP is installed."""
+    if not shutil.which("pspp"):
+        return None
+    return PsppRunner(pool_size=1, timeout=PSPP_TIMEOUT)
+
+def _batch_r_session() -> Optional[RSession]:
+    """An R worker reused across files, if R is installed (starts on first use)."""
+    if not shutil.which("Rscript"):
+        return None
+    return RSession()
+
+def _batch_renderer() -> Optional[BatchRenderer]:
+    """Shared Graphviz renderer for a batch, if 'dot' is installed (else one render per file)."""
+    if not shutil.which("dot"):
+        return None
+    return BatchRenderer()
+
+def _log_render(future):
+    result: RenderResult = future.result()
+    if not result.ok:
+        logger.error(f"  ❌ Graph Generation Failed for {result.output_path}: {result.error}")
+
 def ensure_output_dir(base_output_dir: str, relative_path: str) -> str:
     """Creates the subdirectory structure in the output folder."""
     rel_dir = os.path.dirname(relative_path)
@@ -31,9 +77,12 @@ def ensure_output_dir(base_output_dir: str, relative_path: str) -> str:
     return target_dir
 
 # 🟢 NEW: Robust Dependency Copier
-def copy_dependencies(code: str, source_dir: str, target_dir: str) -> List[str]:
+def copy_dependencies(code: Union[SourceLike, ParseArtifact], source_dir: str, target_dir: str,
+                      store: Optional[DataStore] = None) -> List[str]:
     """
-    Scans for data files using the SourceInspector and copies them.
+    Scans for data files using the SourceInspector and places them in the
+    output folder: linked from the content-addressed store when one is
+    given, otherwise copied. Files already in place are left alone.
     """
     inspector = SourceInspector()
     inputs, _ = inspector.scan(code)
@@ -44,16 +93,46 @@ def copy_dependencies(code: str, source_dir: str, target_dir: str) -> List[str]:
         if os.path.exists(src_path):
             dst_path = os.path.join(target_dir, filename)
             try:
-                shutil.copy(src_path, dst_path)
+                if store is not None:
+                    method = store.stage(src_path, dst_path)
+                elif _same_file_stats(src_path, dst_path):
+                    method = UNCHANGED
+                else:
+                    shutil.copy2(src_path, dst_path)  # Keeps mtime for the next run's check
+                    method = "copy"
                 copied.append(filename)
-                logger.info(f"  📂 Copied dependency: {filename}")
+                if method == UNCHANGED:
+                    logger.info(f"  📂 Dependency up to date: {filename}")
+                else:
+                    logger.info(f"  📂 Staged dependency: {filename} ({method})")
             except Exception as e:
                 logger.warning(f"  ⚠️ Failed to copy {filename}: {e}")
+    if store is not None:
+        try:
+            store.save()
+        except OSError as e:
+            logger.warning(f"  ⚠️ Could not save the data store index: {e}")
     return copied
 
-def process_file(full_path: str, relative_path: str, output_root: str, model: str, generate_code: bool, refine_mode: bool):
+def _same_file_stats(src_path: str, dst_path: str) -> bool:
+    """A previous copy is reused when size and mtime still match the source."""
+    try:
+        src, dst = os.stat(src_path), os.stat(dst_path)
+    except OSError:
+        return False
+    return src.st_size == dst.st_size and src.st_mtime_ns == dst.st_mtime_ns
+
+def process_file(full_path: str, relative_path: str, output_root: str, model: str,
+                 generate_code: bool, refine_mode: bool, llm_concurrency: int = 4,
+                 compact: bool = False, pspp_runner: Optional[PsppRunner] = None,
+                 r_session: Optional[RSession] = None, data_store: Optional[DataStore] = None,
+                 renderer: Optional[BatchRenderer] = None, llm_batch: int = 1,
+                 llm_context: Optional[int] = None, manifest: Optional[BuildManifest] = None,
+                 config: Optional[Dict] = None) -> Optional[Dict]:
     """
     Orchestrates the conversion pipeline for a single file.
+    With a manifest, returns the file's build fingerprint (script + data
+    dependencies + config), taken from the same parse as the build.
     """
     logger.info(f"📂 Processing {relative_path}...")
     
@@ -61,13 +140,13 @@ def process_file(full_path: str, relative_path: str, output_root: str, model: st
     target_dir = ensure_output_dir(output_root, relative_path)
     base_name = os.path.splitext(os.path.basename(full_path))[0]
     
-    with open(full_path, 'r', encoding='utf-8') as f:
-        code = f.read()
-
     # 1. Engine Phase (Parsing)
+    # Lexed, classified and transformed once; every later phase reuses it.
     logger.info("  ⚙️  Compiling Logic Graph...")
-    pipeline = CompilerPipeline()
-    pipeline.process(code)
+    artifact = load_artifact(full_path)
+    fingerprint = _fingerprint(manifest, full_path, relative_path, artifact, config)
+    pipeline = CompilerPipeline(compact=compact)
+    pipeline.process_artifact(artifact)
     
     # 2. Optimization Phase
     dead_vars = pipeline.analyze_dead_code()
@@ -76,12 +155,22 @@ def process_file(full_path: str, relative_path: str, output_root: str, model: st
 
     # 3. Verification Phase (Ground Truth Probe)
     runtime_values = {}
+    spss_probe = None
+    spss_table = None
     if shutil.which("pspp"):
         logger.info("  🔬 Running Verification Probe (PSPP)...")
         try:
-            runner = PsppRunner()
-            runtime_values = runner.run_and_probe(full_path, output_dir=target_dir)
-            logger.info(f"  ✅ Verification Successful. Captured {len(runtime_values)} values.")
+            # Batch runs pass a pooled runner; single files start PSPP directly
+            runner = pspp_runner or PsppRunner()
+            if generate_code:
+                # The equivalence check needs the whole table: parse the output once
+                spss_table, spss_probe = runner.run_and_load(full_path, output_dir=target_dir)
+            else:
+                # Streams the whole output dataset; the spec shows its first row
+                spss_probe = runner.run_and_profile(full_path, output_dir=target_dir)
+            runtime_values = spss_probe.first_values()
+            logger.info(f"  ✅ Verification Successful. Captured {spss_probe.row_count} rows "
+                        f"of {len(spss_probe.columns)} variables.")
         except Exception as e:
             logger.warning(f"  ⚠️ Verification Failed: {e}") 
             logger.debug(f"PSPP Error Details:", exc_info=True)
@@ -90,28 +179,48 @@ def process_file(full_path: str, relative_path: str, output_root: str, model: st
 
     # 🟢 NEW: Copy Input Data (Before Code Gen)
     source_dir = os.path.dirname(full_path)
-    input_files = copy_dependencies(code, source_dir, target_dir)
+    # Data files are stored once under the output root and linked in
+    input_files = copy_dependencies(artifact, source_dir, target_dir,
+                                    data_store or DataStore(output_root))
 
     # 4. Visualization Phase
-    img_name = os.path.join(target_dir, f"{base_name}_flow")
+    img_name = _graph_path(output_root, relative_path)
     logger.info(f"  🎨 Rendering Graph to {img_name}.png...")
     
     try:
         # 🟢 FIX: Use .state directly
         graph_gen = GraphGenerator(pipeline.state)
-        graph_gen.render(img_name)
+        if len(pipeline.state.nodes) > LARGE_GRAPH_NODES:
+            # Too big to lay out whole: full graph as JSON/SVG, summary as PNG
+            logger.info(f"  🗺️  {len(pipeline.state.nodes)} nodes: "
+                        "exporting the full graph without layout.")
+            graph_gen.export_json(img_name)
+            graph_gen.export_svg(img_name)
+            graph_gen = GraphGenerator.summarised(pipeline.state)
+        if renderer is not None:
+            # Batch runs share 'dot' processes; the image is finished later
+            graph_gen.submit(renderer, img_name).add_done_callback(_log_render)
+        else:
+            # Streamed into dot's stdin; the DOT text is never held whole
+            graph_gen.render_stream(img_name)
     except Exception as e:
         logger.error(f"  ❌ Graph Generation Failed: {e}")
 
     # 5. Specification Phase
     logger.info(f"  🤖 Connecting to AI ({model})...")
-    client = OllamaClient(model=model)
+    client = OllamaClient(model=model, num_ctx=llm_context)
     
     # 🟢 FIX: Use .state directly
-    generator = SpecGenerator(pipeline.state, client)
+    generator = SpecGenerator(pipeline.state, client, max_in_flight=llm_concurrency,
+                              batch_size=llm_batch, context_tokens=llm_context)
     
     logger.info("  📝 Writing Specification...")
+    before = client.cache.stats() if client.cache else None
     spec_content = generator.generate_report(dead_ids=dead_vars, runtime_values=runtime_values)
+    if before is not None:
+        after = client.cache.stats()
+        logger.info(f"  💾 LLM cache: {after['hits'] - before['hits']} hits, "
+                    f"{after['misses'] - before['misses']} misses.")
     
     report_file = os.path.join(target_dir, f"{base_name}_spec.md")
     with open(report_file, "w") as f:
@@ -165,10 +274,11 @@ def process_file(full_path: str, relative_path: str, output_root: str, model: st
 
         
         # 7. Equivalence Check
-        if runtime_values:
+        if spss_probe is not None:
             logger.info("  ⚖️  Running Equivalence Check (Black Box vs White Box)...")
             
-            r_runner = RRunner(r_path, state_machine=pipeline.state)
+            r_runner = RRunner(r_path, state_machine=pipeline.state, session=r_session,
+                               inputs=input_files)
             
             # 🟢 NEW: Extract Loader Logic from Pipeline Events
             loader_snippet = None
@@ -186,39 +296,15 @@ def process_file(full_path: str, relative_path: str, output_root: str, model: st
             
             # Pass BOTH the file (for fallback) and the strict code
             main_input = input_files[0] if input_files else None
-            r_results = r_runner.run_and_capture(data_file=main_input, loader_code=loader_snippet)
-
-           
-            matches = 0
-            mismatches = 0
-            
-            for key, legacy_raw in runtime_values.items():
-                key = key.upper()
-                if key in r_results:
-                    new_val = r_results[key]
-                    try:
-                        leg_float = float(legacy_raw)
-                        new_float = float(new_val)
-                        if abs(leg_float - new_float) < 0.001:
-                            matches += 1
-                        else:
-                            mismatches += 1
-                            logger.error(f"    ❌ MISMATCH on {key}: SPSS={leg_float} | R={new_float}")
-                    except (ValueError, TypeError):
-                        leg_str = str(legacy_raw).strip().upper()
-                        new_str = str(new_val).strip().upper()
-                        if leg_str == new_str:
-                            matches += 1
-                        else:
-                            mismatches += 1
-                            logger.error(f"    ❌ MISMATCH on {key}: SPSS='{leg_str}' | R='{new_str}'")
-
-            if matches > 0 and mismatches == 0:
-                logger.info(f"  ✅ PROVEN EQUIVALENCE! ({matches} variables match perfectly)")
-            elif mismatches > 0:
-                logger.warning(f"  ⚠️  Equivalence Check Failed: {mismatches} mismatches found.")
-            else:
-                logger.warning("  ❓ No overlapping variables found to compare.")
+            try:
+                r_table = r_runner.run_and_load(data_file=main_input, loader_code=loader_snippet)
+                if r_table is None:
+                    logger.warning("  ⚠️  Equivalence Check Skipped: R produced no results.")
+                else:
+                    _log_equivalence(EquivalenceChecker().compare(spss_table, r_table))
+            except Exception as e:
+                logger.warning(f"  ⚠️  Equivalence Check Failed to run: {e}")
+                logger.debug("Equivalence Error Details:", exc_info=True)
 
         # 8. Architectural Review
         if refine_mode: 
@@ -234,32 +320,268 @@ def process_file(full_path: str, relative_path: str, output_root: str, model: st
                 
             logger.info(f"  📝 Architectural Review Saved: {review_path}")
 
-def process_directory(source_root: str, output_root: str, model: str, generate_code: bool, refine_mode: bool):
+    return fingerprint
+
+def _log_equivalence(report: EquivalenceReport):
+    """Logs an SPSS (left) vs R (right) comparison summary."""
+    if not report.columns:
+        logger.warning("  ❓ No overlapping variables found to compare.")
+        return
+    if report.equivalent:
+        logger.info(f"  ✅ PROVEN EQUIVALENCE! ({len(report.columns)} variables match "
+                    f"perfectly across {report.rows_compared} rows)")
+        return
+
+    if report.rows_left != report.rows_right:
+        logger.error(f"    ❌ ROW COUNT: SPSS={report.rows_left} | R={report.rows_right}")
+    for name, count in report.mismatched_columns().items():
+        logger.error(f"    ❌ MISMATCH on {name}: {count} of {report.rows_compared} rows")
+    for example in report.examples.itertuples(index=False):
+        logger.error(f"       row {example.row}, {example.column}: "
+                     f"SPSS={example.left!r} | R={example.right!r}")
+    logger.warning(f"  ⚠️  Equivalence Check Failed: {report.mismatches} mismatches found.")
+
+def _init_worker(log_level: int, output_root: str):
+    """Tags every log line from a pool worker with its process name."""
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - [%(processName)s] %(message)s',
+        datefmt='%H:%M:%S',
+        force=True,
+    )
+    logger.setLevel(log_level)
+    # Each worker keeps one PSPP process and one R worker for all of its
+    # files. They exit on their own when the worker dies and stdin closes.
+    global _worker_pspp, _worker_r, _worker_store, _worker_renderer, _worker_manifest
+    _worker_pspp = _batch_pspp_runner()
+    _worker_r = _batch_r_session()
+    _worker_store = DataStore(output_root)
+    _worker_manifest = BuildManifest.load(output_root)
+    _worker_renderer = _batch_renderer()
+    if _worker_renderer is not None:
+        # Graphs still queued when the pool shuts the worker down get rendered then
+        multiprocessing.util.Finalize(_worker_renderer, _worker_renderer.close, exitpriority=10)
+
+def _process_file_job(full_path: str, rel_path: str, output_root: str, model: str,
+                      generate_code: bool, refine_mode: bool, llm_concurrency: int = 4,
+                      compact: bool = False, llm_batch: int = 1,
+                      llm_context: Optional[int] = None,
+                      config: Optional[Dict] = None) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Pool entry point. Returns (fingerprint, None) on success or (None, error
+    message), so that unpicklable exceptions never cross the process boundary.
+    """
+    try:
+        fingerprint = process_file(
+            full_path, rel_path, output_root, model, generate_code, refine_mode,
+            llm_concurrency, compact, pspp_runner=_worker_pspp, r_session=_worker_r,
+            data_store=_worker_store, renderer=_worker_renderer, llm_batch=llm_batch,
+            llm_context=llm_context,
+            manifest=_worker_manifest or BuildManifest(output_root), config=config)
+        return fingerprint, None
+    except Exception as e:
+        logger.error(f"❌ Failed to process {rel_path}: {e}", exc_info=True)
+        return None, str(e) or e.__class__.__name__
+
+def _build_config(model: str, generate_code: bool, refine_mode: bool, llm_batch: int = 1,
+                  llm_context: Optional[int] = None) -> Dict:
+    """Settings that change the generated artifacts (recorded in the build manifest)."""
+    config = {"model": model, "code": generate_code, "refine": refine_mode}
+    if llm_batch > 1:
+        # Batched prompts word descriptions differently (absent = per-node, as before)
+        config["llm_batch"] = llm_batch
+    if llm_context:
+        config["llm_context"] = llm_context
+    return config
+
+def _graph_path(output_root: str, rel_path: str) -> str:
+    """Where a file's flow graph goes (without extension)."""
+    base_name = os.path.splitext(os.path.basename(rel_path))[0]
+    return os.path.join(output_root, os.path.dirname(rel_path), f"{base_name}_flow")
+
+def _fingerprint(manifest: Optional[BuildManifest], full_path: str, rel_path: str,
+                 artifact: ParseArtifact, config: Optional[Dict]) -> Optional[Dict]:
+    """
+    Fingerprints a source file (script + data dependencies + config) from
+    its parse artifact; None without a manifest or if the file can't be scanned.
+    """
+    if manifest is None:
+        return None
+    try:
+        inputs, _ = SourceInspector().scan(artifact)
+        return manifest.fingerprint(full_path, inputs, config or {})
+    except Exception as e:
+        logger.debug(f"Could not fingerprint {rel_path}: {e}")
+        return None
+
+def _up_to_date(manifest: BuildManifest, full_path: str, rel_path: str, output_root: str,
+                config: Dict) -> bool:
+    """True when the last build saw the same script, data and config (no parsing needed)."""
+    target_dir = os.path.join(output_root, os.path.dirname(rel_path))
+    base_name = os.path.splitext(os.path.basename(full_path))[0]
+    outputs = [os.path.join(target_dir, f"{base_name}_spec.md")]
+    if config.get("code"):
+        outputs.append(os.path.join(target_dir, f"{base_name}.R"))
+    try:
+        return manifest.is_unchanged(rel_path, full_path, config, outputs)
+    except OSError as e:
+        logger.debug(f"Could not check {rel_path}: {e}")
+        return False
+
+def process_directory(source_root: str, output_root: str, model: str, generate_code: bool,
+                      refine_mode: bool, jobs: int = 1, llm_concurrency: int = 4,
+                      force: bool = False, compact: bool = False,
+                      include: Optional[List[str]] = None, exclude: Optional[List[str]] = None,
+                      llm_batch: int = 1, llm_context: Optional[int] = None):
     logger.info(f"📂 Scanning Repository: {source_root}")
     logger.info(f"💾 Output Target: {output_root}")
     
-    repo = Repository(source_root)
-    repo.scan()
-    
-    files = repo.list_files()
-    total = len(files)
-    logger.info(f"🔎 Found {total} valid SPSS files.")
+    # Only paths are needed here; scripts are read when processed.
+    # Directories are listed concurrently (slow network shares).
+    repo = Repository(source_root, lazy=True, include=include, exclude=exclude,
+                      walk_workers=WALK_WORKERS)
     
     errors = []
-    
-    for i, rel_path in enumerate(files, 1):
+    skipped = []
+    pspp_runner = None
+    r_session = None
+    renderer = None
+    # Built files whose graph a BatchRenderer finishes after the file itself
+    deferred_graphs = []
+
+    # Work out which files changed since the last successful build
+    manifest = BuildManifest.load(output_root)
+    config = _build_config(model, generate_code, refine_mode, llm_batch, llm_context)
+    pending = set()
+
+    def _needs_build(rel_path: str) -> bool:
         full_path = repo.get_full_path(rel_path)
-        print("-" * 60)
-        logger.info(f"[{i}/{total}] Starting: {rel_path}")
-        
-        try:
-            process_file(full_path, rel_path, output_root, model, generate_code, refine_mode)
-        except Exception as e:
-            logger.error(f"❌ Failed to process {rel_path}: {e}", exc_info=True)
+        if not force and _up_to_date(manifest, full_path, rel_path, output_root, config):
+            skipped.append(rel_path)
+            return False
+        pending.add(rel_path)
+        return True
+
+    def _announce(total: int):
+        logger.info(f"🔎 Found {total} valid SPSS files.")
+        if skipped:
+            logger.info(f"⏭️  {len(skipped)} file(s) unchanged since the last build "
+                        "(use --force to rebuild).")
+
+    def _finish(rel_path: str, ok: bool, fingerprint: Optional[Dict] = None,
+                deferred_graph: bool = False):
+        if ok and fingerprint is not None:
+            manifest.record(rel_path, fingerprint)
+            if deferred_graph:
+                deferred_graphs.append(rel_path)
+        else:
+            manifest.forget(rel_path)
             errors.append(rel_path)
 
+    def _check_deferred_graphs():
+        # BatchRenderer keeps <graph>.dot only next to a rendered image, so
+        # a file whose render failed is rebuilt on the next run
+        for rel_path in deferred_graphs:
+            if not os.path.exists(_graph_path(output_root, rel_path) + ".dot"):
+                logger.error(f"❌ Graph rendering failed for {rel_path}; "
+                             "it will be rebuilt next run.")
+                manifest.forget(rel_path)
+                errors.append(rel_path)
+
+    try:
+        if jobs > 1:
+            # Files are independent apart from their output folder, so each one
+            # runs in its own worker. Jobs are submitted as the walker finds
+            # them; progress is reported in listing order once it is known.
+            logger.info(f"🧵 Running with {jobs} worker processes.")
+            with ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=_init_worker,
+                initargs=(logging.getLogger().getEffectiveLevel(), output_root),
+            ) as pool:
+                futures = {}
+                for rel_path in repo.iter_scan():
+                    if _needs_build(rel_path):
+                        futures[rel_path] = pool.submit(
+                            _process_file_job, repo.get_full_path(rel_path), rel_path,
+                            output_root, model, generate_code, refine_mode, llm_concurrency,
+                            compact, llm_batch, llm_context, config)
+
+                files = repo.list_files()
+                total = len(files)
+                _announce(total)
+                for i, rel_path in enumerate(files, 1):
+                    if rel_path not in futures:
+                        logger.info(f"[{i}/{total}] Up to date: {rel_path}")
+                        continue
+                    try:
+                        fingerprint, error = futures[rel_path].result()
+                    except Exception as e:
+                        # The worker itself died (e.g. BrokenProcessPool)
+                        fingerprint, error = None, str(e) or e.__class__.__name__
+                    if error is None:
+                        logger.info(f"[{i}/{total}] Finished: {rel_path}")
+                    else:
+                        logger.info(f"[{i}/{total}] Failed: {rel_path} ({error})")
+                    # Workers batch graphs through 'dot' when it is installed
+                    _finish(rel_path, error is None, fingerprint,
+                            deferred_graph=shutil.which("dot") is not None)
+        else:
+            pspp_runner = _batch_pspp_runner()
+            r_session = _batch_r_session()
+            data_store = DataStore(output_root)
+            renderer = _batch_renderer()
+            repo.scan()
+            files = repo.list_files()
+            total = len(files)
+            for rel_path in files:
+                _needs_build(rel_path)
+            _announce(total)
+
+            for i, rel_path in enumerate(files, 1):
+                if rel_path not in pending:
+                    logger.info(f"[{i}/{total}] Up to date: {rel_path}")
+                    continue
+                full_path = repo.get_full_path(rel_path)
+                print("-" * 60)
+                logger.info(f"[{i}/{total}] Starting: {rel_path}")
+                
+                try:
+                    fingerprint = process_file(
+                        full_path, rel_path, output_root, model, generate_code, refine_mode,
+                        llm_concurrency, compact, pspp_runner=pspp_runner, r_session=r_session,
+                        data_store=data_store, renderer=renderer, llm_batch=llm_batch,
+                        llm_context=llm_context,
+                        manifest=manifest, config=config)
+                    _finish(rel_path, True, fingerprint, deferred_graph=renderer is not None)
+                except Exception as e:
+                    logger.error(f"❌ Failed to process {rel_path}: {e}", exc_info=True)
+                    _finish(rel_path, False)
+    finally:
+        if renderer is not None:
+            logger.info("🎨 Finishing queued graph renders...")
+            renderer.close()
+        _check_deferred_graphs()
+        manifest.save()
+        if pspp_runner is not None:
+            pspp_runner.close()
+        if r_session is not None:
+            r_session.close()
+
+    try:
+        removed = DataStore(output_root).prune()
+        if removed:
+            logger.info(f"🧹 Removed {removed} data file(s) no source uses any more "
+                        "from the store.")
+    except OSError as e:
+        logger.warning(f"⚠️ Could not prune the data store: {e}")
+
     print("=" * 60)
-    logger.info(f"🏁 Batch Complete. Success: {total - len(errors)}/{total}")
+    built = total - len(skipped) - len(errors)
+    logger.info(f"🏁 Batch Complete. {total} file(s): {built} built, "
+                f"{len(skipped)} skipped (up to date), {len(errors)} failed.")
+    if skipped:
+        logger.info(f"⏭️  Skipped (up to date): {sorted(skipped)}")
     if errors:
         logger.info(f"⚠️ Failed files: {errors}")
 
@@ -270,6 +592,27 @@ def main():
     parser.add_argument("--model", default="mistral:instruct", help="Ollama model to use")
     parser.add_argument("--code", action="store_true", help="Generate R code alongside the spec")
     parser.add_argument("--refine", action="store_true", help="Use AI to refine the generated code")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Number of files to process in parallel (directories only)")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="Only process files matching GLOB "
+                             "(repeatable; default *.sps, *.spss)")
+    parser.add_argument("--exclude", action="append", metavar="GLOB",
+                        help="Skip files or directories matching GLOB (repeatable)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Use memory-lean graph storage (very large scripts)")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild every file, even if unchanged since the last run")
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="Always query Ollama instead of reusing cached responses")
+    parser.add_argument("--llm-concurrency", type=int, default=4,
+                        help="Maximum concurrent Ollama requests per file")
+    parser.add_argument("--llm-batch", type=int, default=1, metavar="K",
+                        help="Describe up to K nodes per Ollama prompt "
+                             "(default 1: one prompt per node)")
+    parser.add_argument("--llm-context", type=int, metavar="TOKENS",
+                        help="Context window to request from Ollama and size batches for "
+                             "(default: the model's configured num_ctx)")
     
     # Verbose Flag
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose debug logging")
@@ -282,15 +625,36 @@ def main():
         logging.getLogger().setLevel(logging.DEBUG)
         logger.debug("🔧 Verbose mode enabled")
     
+    if args.no_llm_cache:
+        # Via the environment so worker processes and CodeRefiner inherit it
+        os.environ[CACHE_ENV_VAR] = "off"
+
     source_path = os.path.abspath(args.path)
     output_path = os.path.abspath(args.output)
     
     if os.path.isfile(source_path):
         root_dir = os.path.dirname(source_path)
         rel_path = os.path.relpath(source_path, root_dir)
-        process_file(source_path, rel_path, output_path, args.model, args.code, args.refine)
+        manifest = BuildManifest.load(output_path)
+        config = _build_config(args.model, args.code, args.refine, args.llm_batch,
+                               args.llm_context)
+        if not args.force and _up_to_date(manifest, source_path, rel_path, output_path, config):
+            logger.info(f"⏭️  {rel_path} is unchanged since the last build "
+                        "(use --force to rebuild).")
+        else:
+            fingerprint = process_file(
+                source_path, rel_path, output_path, args.model, args.code, args.refine,
+                args.llm_concurrency, args.compact, llm_batch=args.llm_batch,
+                llm_context=args.llm_context, manifest=manifest, config=config)
+            if fingerprint is not None:
+                manifest.record(rel_path, fingerprint)
+                manifest.save()
     elif os.path.isdir(source_path):
-        process_directory(source_path, output_path, args.model, args.code, args.refine)
+        process_directory(source_path, output_path, args.model, args.code, args.refine,
+                          jobs=args.jobs, llm_concurrency=args.llm_concurrency,
+                          force=args.force, compact=args.compact,
+                          include=args.include, exclude=args.exclude, llm_batch=args.llm_batch,
+                          llm_context=args.llm_context)
     else:
         logger.error(f"Path not found: {source_path}")
 
@@ -0,0 +1,8 @@
+import pytest
+from common.llm import CACHE_ENV_VAR
+
+
+@pytest.fixture(autouse=True)
+def _no_llm_disk_cache(monkeypatch):
+    """Keeps tests hermetic: never read or write the user's LLM response cache."""
+    monkeypatch.setenv(CACHE_ENV_VAR, "off")
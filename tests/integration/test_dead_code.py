@@ -67,3 +67,63 @@ class TestDeadCodeAnalysis:
 
         # TEMP_1 (200) was used by final. Live.
         assert "TEMP_1" not in dead_vars
+
+    def test_level_4_conditional_overwrite(self):
+        """
+        Level 4: Partial Overwrite.
+        An IF only replaces 'x' for some cases, so X_0 survives into X_1.
+        """
+        code = """
+        COMPUTE x = 1.
+        IF (y > 0) x = 2.
+        """
+        pipeline = CompilerPipeline()
+        pipeline.process(code)
+
+        dead_vars = pipeline.analyze_dead_code()
+
+        assert "X_0" not in dead_vars
+
+    def test_level_5_transitive_chain(self):
+        """
+        Level 5: Dead Chains.
+        A_0 only feeds B_0, then both are overwritten. The one-level
+        check keeps A_0 (it has a reader); the reachability pass sees that
+        the reader is itself dead.
+        """
+        code = """
+        COMPUTE a = 1.
+        COMPUTE b = a * 2.
+        COMPUTE b = 7.
+        COMPUTE a = 5.
+        """
+        pipeline = CompilerPipeline()
+        pipeline.process(code)
+
+        assert pipeline.analyze_dead_code() == ["B_0"]
+        assert sorted(pipeline.analyze_dead_code(transitive=True)) == ["A_0", "B_0"]
+
+    def test_level_6_unsaved_dataset(self):
+        """
+        Level 6: Lost Work.
+        Results computed before another GET FILE, without a SAVE, never
+        leave the script. Saved clusters and the final dataset stay live.
+        """
+        code = """
+        GET FILE='first.sav'.
+        COMPUTE lost = 1.
+        GET FILE='second.sav'.
+        COMPUTE kept = 1.
+        COMPUTE helper = 2.
+        COMPUTE total = kept + helper.
+        SAVE OUTFILE='out.sav'.
+        GET FILE='third.sav'.
+        COMPUTE final = 3.
+        """
+        pipeline = CompilerPipeline()
+        pipeline.process(code)
+
+        dead = pipeline.analyze_dead_code(transitive=True)
+
+        assert "LOST_0" in dead
+        assert not {"KEPT_0", "HELPER_0", "TOTAL_0", "FINAL_0"} & set(dead)
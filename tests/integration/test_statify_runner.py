@@ -28,7 +28,12 @@ class TestStatifyRunner:
         mock_pipeline_instance.analyze_dead_code.return_value = []
 
         # Return some data so the "Equivalence Check" block triggers
-        MockPspp.return_value.run_and_probe.return_value = {"VAR": 100}
+        profile = MockPspp.return_value.run_and_profile.return_value
+        profile.first_values.return_value = {"VAR": "100"}
+        # With code generation the table is loaded once and profiled in memory
+        spss_probe = MagicMock()
+        spss_probe.first_values.return_value = {"VAR": "100"}
+        MockPspp.return_value.run_and_load.return_value = (MagicMock(), spss_probe)
         
         # 3. Setup Generator
         mock_gen_instance = MockGen.return_value
@@ -36,7 +41,7 @@ class TestStatifyRunner:
         
         # 4. Setup Runner
         mock_runner_instance = MockRunner.return_value
-        mock_runner_instance.run_and_capture.return_value = {"VAR": 100}
+        mock_runner_instance.run_and_load.return_value = None
         
         # 5. Execute with CORRECT Arguments
         process_file(
@@ -57,4 +62,164 @@ class TestStatifyRunner:
         
         # Verify r_path was passed to Runner (it should end in .R)
         args, _ = MockRunner.call_args
-        assert args[0].endswith(".R")
\ No newline at end of file
+        assert args[0].endswith(".R")
+
+def test_process_directory_parallel(tmp_path, caplog):
+    """
+    --jobs N runs files across a process pool and still reports every
+    file, in listing order, with the usual summary.
+    """
+    from statify import process_directory
+
+    src = tmp_path / "src"
+    src.mkdir()
+    for name in ("a", "b", "c"):
+        (src / f"{name}.sps").write_text(f"COMPUTE {name} = 1.\n", encoding="utf-8")
+    out = tmp_path / "out"
+
+    with patch('statify.shutil.which', return_value=None):
+        with caplog.at_level("INFO", logger="Statify"):
+            process_directory(str(src), str(out), "test_model", False, False, jobs=2)
+
+    for name in ("a", "b", "c"):
+        assert (out / f"{name}_spec.md").exists()
+
+    progress = [r.getMessage() for r in caplog.records if "Finished:" in r.getMessage()]
+    assert progress == ["[1/3] Finished: a.sps", "[2/3] Finished: b.sps", "[3/3] Finished: c.sps"]
+    assert any("3 file(s): 3 built, 0 skipped (up to date), 0 failed." in r.getMessage()
+               for r in caplog.records)
+
+def test_process_directory_incremental(tmp_path, caplog):
+    """
+    A rerun skips files whose script, data dependencies and options are
+    unchanged; editing a data file or passing force rebuilds.
+    """
+    from statify import process_directory
+
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.sps").write_text("GET DATA /TYPE=TXT /FILE='a.csv'.\nCOMPUTE a = 1.\n",
+                               encoding="utf-8")
+    (src / "a.csv").write_text("x\n1\n", encoding="utf-8")
+    (src / "b.sps").write_text("COMPUTE b = 1.\n", encoding="utf-8")
+    out = tmp_path / "out"
+
+    def run(**kwargs):
+        caplog.clear()
+        with patch('statify.shutil.which', return_value=None):
+            with caplog.at_level("INFO", logger="Statify"):
+                process_directory(str(src), str(out), "test_model", False, False, **kwargs)
+        return [r.getMessage() for r in caplog.records]
+
+    first = run()
+    assert "[1/2] Starting: a.sps" in first and "[2/2] Starting: b.sps" in first
+    assert (out / ".statify-manifest.json").exists()
+
+    second = run()
+    assert "[1/2] Up to date: a.sps" in second and "[2/2] Up to date: b.sps" in second
+    assert any("2 file(s): 0 built, 2 skipped (up to date), 0 failed." in m for m in second)
+    assert any("Skipped (up to date): ['a.sps', 'b.sps']" in m for m in second)
+
+    (src / "a.csv").write_text("x\n2\n", encoding="utf-8")
+    third = run()
+    assert "[1/2] Starting: a.sps" in third and "[2/2] Up to date: b.sps" in third
+    assert any("2 file(s): 1 built, 1 skipped (up to date), 0 failed." in m for m in third)
+
+    (out / "b_spec.md").unlink()  # Missing outputs are rebuilt too
+    fourth = run()
+    assert "[1/2] Up to date: a.sps" in fourth and "[2/2] Starting: b.sps" in fourth
+
+    forced = run(force=True)
+    assert "[1/2] Starting: a.sps" in forced and "[2/2] Starting: b.sps" in forced
+
+def test_equivalence_summary_logging(caplog):
+    """Mismatch counts and the first differing rows reach the log."""
+    import pandas as pd
+    from common.equivalence import EquivalenceChecker
+    from statify import _log_equivalence
+
+    spss = pd.DataFrame({"NET": [10.0, 20.0, 30.0], "BAND": ["A", "B", "C"]})
+    r = pd.DataFrame({"NET": [10.0, 21.0, 30.0], "BAND": ["a", "B", "C"]})
+
+    with caplog.at_level("INFO", logger="Statify"):
+        _log_equivalence(EquivalenceChecker().compare(spss, spss.copy()))
+        _log_equivalence(EquivalenceChecker().compare(spss, r))
+
+    assert "PROVEN EQUIVALENCE! (2 variables match perfectly across 3 rows)" in caplog.text
+    assert "MISMATCH on NET: 1 of 3 rows" in caplog.text
+    assert "row 1, NET: SPSS=20.0 | R=21.0" in caplog.text
+    assert "1 mismatches found" in caplog.text
+
+def test_copy_dependencies_links_from_store_once(tmp_path, caplog):
+    """
+    Two scripts reading the same data file share one stored copy; staging
+    again leaves the linked files alone.
+    """
+    from statify import copy_dependencies
+    from common.data_store import DataStore
+
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "big.csv").write_text("x\n1\n", encoding="utf-8")
+    code = "GET DATA /TYPE=TXT /FILE='big.csv'.\nCOMPUTE a = 1.\n"
+    out = tmp_path / "out"
+    store = DataStore(str(out))
+
+    for folder in ("one", "two"):
+        (out / folder).mkdir(parents=True)
+        assert copy_dependencies(code, str(src), str(out / folder), store) == ["big.csv"]
+    assert os.path.samefile(out / "one" / "big.csv", out / "two" / "big.csv")
+
+    with caplog.at_level("INFO", logger="Statify"):
+        copy_dependencies(code, str(src), str(out / "one"), DataStore(str(out)))
+    assert any("up to date: big.csv" in r.getMessage() for r in caplog.records)
+
+    # Without a store the file is copied, and reused while size and mtime match
+    plain = tmp_path / "plain"
+    plain.mkdir()
+    assert copy_dependencies(code, str(src), str(plain)) == ["big.csv"]
+    assert not os.path.samefile(plain / "big.csv", src / "big.csv")
+    caplog.clear()
+    with caplog.at_level("INFO", logger="Statify"):
+        copy_dependencies(code, str(src), str(plain))
+    assert any("up to date: big.csv" in r.getMessage() for r in caplog.records)
+
+def test_process_directory_parses_each_file_once(tmp_path):
+    """Fingerprints come from the build's own parse; unchanged files are not parsed."""
+    from statify import process_directory
+    from spss_engine.artifact import ParseArtifact
+
+    src = tmp_path / "src"
+    src.mkdir()
+    for name in ("a", "b", "c"):
+        (src / f"{name}.sps").write_text(f"COMPUTE {name}_once = 1.\n", encoding="utf-8")
+    out = tmp_path / "out"
+
+    for expected in (3, 0):
+        with patch('statify.shutil.which', return_value=None), \
+                patch.object(ParseArtifact, "build", wraps=ParseArtifact.build) as build:
+            process_directory(str(src), str(out), "test_model", False, False)
+        assert build.call_count == expected
+
+def test_failed_batch_render_is_rebuilt(tmp_path, caplog):
+    """A graph whose deferred render fails leaves its file out of the manifest."""
+    from statify import process_directory
+    from spec_writer.dot_renderer import BatchRenderer
+
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.sps").write_text("COMPUTE a = 1.\n", encoding="utf-8")
+    out = tmp_path / "out"
+    broken_dot = tmp_path / "dot.sh"
+    broken_dot.write_text("#!/bin/sh\necho 'syntax error' >&2\nexit 1\n")
+    broken_dot.chmod(0o755)
+
+    for _ in range(2):
+        caplog.clear()
+        with patch('statify.shutil.which', return_value=None), \
+                patch('statify._batch_renderer', lambda: BatchRenderer(str(broken_dot))):
+            with caplog.at_level("INFO", logger="Statify"):
+                process_directory(str(src), str(out), "test_model", False, False)
+        messages = [r.getMessage() for r in caplog.records]
+        assert "[1/1] Starting: a.sps" in messages
+        assert any("Graph rendering failed for a.sps" in m for m in messages)
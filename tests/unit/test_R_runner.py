@@ -2,7 +2,8 @@ import pytest
 import os
 import subprocess
 from unittest.mock import patch, MagicMock
-from code_forge.R_runner import RRunner
+import threading
+from code_forge.R_runner import RRunner, WORKSPACE_PREFIX
 from spss_engine.state import StateMachine, VariableVersion
 
 class TestRRunner:
@@ -92,4 +93,114 @@ class TestRRunner:
         assert "df <- data.frame" in content
         assert "weight = 1" in content
         assert "height = 1" in content
-        assert "source" in content        
\ No newline at end of file
+        assert "source" in content        
+
+    @patch("subprocess.run")
+    def test_profile_exports_whole_result(self, mock_run, tmp_path):
+        r_script = tmp_path / "logic.R"
+        r_script.write_text("logic_pipeline <- function(df) df", encoding="utf-8")
+        seen = {}
+
+        def fake_rscript(cmd, cwd, **kwargs):
+            seen["wrapper"] = open(os.path.join(cwd, "wrapper.R")).read()
+            rows = "\n".join(f"{i},{i}.5" for i in range(300))
+            with open(os.path.join(cwd, "r_output.csv"), "w") as f:
+                f.write(f"id,score\n{rows}\n")
+            return MagicMock(returncode=0)
+
+        mock_run.side_effect = fake_rscript
+        result = RRunner(str(r_script)).run_and_profile(loader_code="df <- read_csv('in.csv')")
+
+        assert "write_csv(result" in seen["wrapper"]
+        assert "result[1, ]" not in seen["wrapper"]
+        assert result.row_count == 300
+        assert result.columns["SCORE"].minimum == 0.5
+        # Harness and export stay in the run's workspace, which is removed
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["logic.R"]
+
+    @patch("subprocess.run")
+    def test_load_reads_binary_export(self, mock_run, tmp_path):
+        from code_forge.exchange import write_columns
+        import pandas as pd
+
+        r_script = tmp_path / "logic.R"
+        r_script.write_text("logic_pipeline <- function(df) df", encoding="utf-8")
+
+        def fake_rscript(cmd, cwd, **kwargs):
+            # Stand-in for write_statify_columns in the harness
+            assert "write_statify_columns(result" in open(os.path.join(cwd, "wrapper.R")).read()
+            write_columns(pd.DataFrame({"id": [1, 2], "band": ["a", "b"]}),
+                          os.path.join(cwd, "r_output.cols"))
+            return MagicMock(returncode=0)
+
+        mock_run.side_effect = fake_rscript
+        table = RRunner(str(r_script)).run_and_load(loader_code="df <- read_csv('in.csv')")
+
+        assert table["ID"].tolist() == [1.0, 2.0]
+        assert table["BAND"].tolist() == ["a", "b"]
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["logic.R"]
+
+    def test_concurrent_runs_get_private_workspaces(self, tmp_path):
+        """Verifications in one folder see the data they read but never each other's files."""
+        (tmp_path / "input.csv").write_text("x\n1\n")
+        (tmp_path / "lookups").mkdir()
+        scripts = []
+        for name in ("a", "b", "c", "d"):
+            path = tmp_path / f"{name}.R"
+            path.write_text(f"# {name}")
+            scripts.append(str(path))
+
+        seen = []
+        barrier = threading.Barrier(4, timeout=5)
+
+        def fake_rscript(cmd, cwd, **kwargs):
+            barrier.wait()  # All four runs are in flight together
+            entries = set(os.listdir(cwd))
+            seen.append((cwd, entries))
+            assert os.path.samefile(os.path.join(cwd, "input.csv"), tmp_path / "input.csv")
+            # Only the script and the data the loader names are linked in
+            assert not os.path.exists(os.path.join(cwd, "lookups"))
+            with open(os.path.join(cwd, "r_output.csv"), "w") as f:
+                f.write(f"script\n{open(os.path.join(cwd, 'wrapper.R')).read().count('source')}\n")
+            return MagicMock(returncode=0)
+
+        with patch("subprocess.run", side_effect=fake_rscript):
+            results = RRunner.run_batch([(s, "df <- read_csv('input.csv')") for s in scripts],
+                                        max_workers=4)
+
+        assert [r.shape for r in results] == [(1, 1)] * 4
+        assert len({cwd for cwd, _ in seen}) == 4
+        assert all(len(entries & {"a.R", "b.R", "c.R", "d.R"}) == 1 for _, entries in seen)
+        assert all("wrapper.R" in entries
+                   and not any(e.startswith(WORKSPACE_PREFIX) for e in entries)
+                   for _, entries in seen)
+        assert not list(tmp_path.glob(f"{WORKSPACE_PREFIX}*"))
+
+    def test_batch_borrows_sessions_and_reports_errors(self, tmp_path):
+        script = tmp_path / "logic.R"
+        script.write_text("# logic")
+        session = MagicMock()
+        session.run.side_effect = [MagicMock(ok=False, output=["Error in df"], error="boom"),
+                                   RuntimeError("worker died")]
+
+        results = RRunner.run_batch([(str(script), "df <- 1"), (str(script), "df <- 2")],
+                                    sessions=[session], mode="capture")
+
+        assert results[0] == {}  # R-level failure, as run_and_capture reports it
+        assert results[1] == {}  # Worker crash is logged by the runner
+        assert session.run.call_count == 2
+        with pytest.raises(ValueError):
+            RRunner.run_batch([], mode="knit")
+
+    def test_workspace_links_script_and_inputs(self, tmp_path):
+        for name in ("logic.R", "other.R", "input.csv", "unrelated.sav"):
+            (tmp_path / name).write_text("x")
+        (tmp_path / "lookups").mkdir()
+        (tmp_path / "lookups" / "codes.csv").write_text("x")
+
+        runner = RRunner(str(tmp_path / "logic.R"), inputs=["lookups/codes.csv", "missing.csv"])
+        with runner._workspace(loader_code="df <- read_csv('input.csv')") as workspace:
+            entries = sorted(os.listdir(workspace))
+            assert os.path.isfile(os.path.join(workspace, "lookups", "codes.csv"))
+
+        assert entries == ["input.csv", "logic.R", "lookups"]
@@ -0,0 +1,79 @@
+from unittest.mock import patch
+from spss_engine.artifact import ArtifactCache, ParseArtifact, get_artifact, load_artifact
+from spss_engine.events import AssignmentEvent, FileReadEvent
+from spss_engine.inspector import SourceInspector
+from spss_engine.parser import TokenType
+from spss_engine.pipeline import CompilerPipeline
+
+SCRIPT = """
+GET DATA /TYPE=TXT /FILE='people.csv' /DELIMITERS=",".
+COMPUTE age2 = age * 2.
+SAVE OUTFILE='out.sav'.
+"""
+
+
+class TestParseArtifact:
+    def test_build(self):
+        artifact = ParseArtifact.build(SCRIPT)
+
+        assert len(artifact.commands) == len(artifact.parsed) == 3
+        assert [p.type for p in artifact.parsed] == [
+            TokenType.FILE_READ, TokenType.ASSIGNMENT, TokenType.FILE_SAVE
+        ]
+        assert any(isinstance(e, FileReadEvent) for e in artifact.events)
+        assert any(isinstance(e, AssignmentEvent) and e.target == "AGE2" for e in artifact.events)
+
+    def test_cache_is_keyed_by_content(self):
+        cache = ArtifactCache(max_entries=2)
+        first = cache.get(SCRIPT)
+        assert cache.get(SCRIPT) is first
+        assert cache.get(SCRIPT + "COMPUTE z = 1.\n") is not first
+
+        cache.get("COMPUTE a = 1.")
+        cache.get("COMPUTE b = 1.")  # Evicts the least recently used entry
+        assert cache.get(SCRIPT) is not first
+
+    def test_consumers_share_one_parse(self, tmp_path):
+        path = tmp_path / "shared.sps"
+        path.write_text(SCRIPT + "* shared.\n", encoding="utf-8")
+
+        with patch.object(ParseArtifact, "build", wraps=ParseArtifact.build) as build:
+            pipeline = CompilerPipeline()
+            pipeline.process_file(str(path))
+            inputs, outputs = SourceInspector().scan(load_artifact(str(path)))
+            SourceInspector().scan(path.read_text(encoding="utf-8"))
+
+        assert build.call_count == 1
+        assert inputs == ["people.csv"] and outputs == ["out.sav"]
+        assert pipeline.state.get_current_version("AGE2").source.startswith("COMPUTE age2")
+        assert isinstance(pipeline.events[1], FileReadEvent)
+
+    def test_matches_streaming_path(self):
+        cached, streamed = CompilerPipeline(), CompilerPipeline()
+        cached.process(SCRIPT)
+        streamed.process(iter([SCRIPT]))
+
+        assert cached.events == streamed.events
+        assert [n.id for n in cached.state.nodes] == [n.id for n in streamed.state.nodes]
+        assert get_artifact(SCRIPT) is get_artifact(SCRIPT)
+
+    def test_file_is_hashed_while_streamed(self, tmp_path):
+        path = tmp_path / "streamed.sps"
+        path.write_text(SCRIPT, encoding="utf-8")
+        cache = ArtifactCache()
+
+        artifact = cache.load(str(path))
+        assert artifact.digest == get_artifact(SCRIPT).digest
+        assert artifact.size == len(SCRIPT.encode("utf-8"))
+        with patch("builtins.open", side_effect=AssertionError("re-read")):
+            assert cache.load(str(path)) is artifact  # Same size and mtime: no read
+
+    def test_cache_is_bounded_by_bytes(self):
+        cache = ArtifactCache(max_bytes=len(SCRIPT) + 20)
+        first = cache.get(SCRIPT)
+        assert cache.get(SCRIPT) is first
+
+        cache.get("COMPUTE a = 1.\nCOMPUTE b = 2.\n")  # Pushes the total over the limit
+        assert cache.get(SCRIPT) is not first
+        big = SCRIPT * 2
+        assert cache.get(big) is not cache.get(big)  # Larger than the cache: never kept
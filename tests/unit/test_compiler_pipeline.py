@@ -57,4 +57,12 @@ class TestCompilerPipeline:
         # Assertion 2: The system variable (###SYS...) is filtered out.
         # It technically has a dead version, but the pipeline should hide it from the user.
         system_vars = [d for d in dead_ids if "###SYS" in d]
-        assert len(system_vars) == 0
\ No newline at end of file
+        assert len(system_vars) == 0
+
+    def test_process_streams_file_handle(self):
+        """process() accepts an open handle instead of the full text."""
+        import io
+        pipeline = CompilerPipeline()
+        pipeline.process(io.StringIO("COMPUTE a = 1.\nCOMPUTE b = a + 1.\n"))
+
+        assert pipeline.get_variable_version("B").dependencies[0].id == "A_0"
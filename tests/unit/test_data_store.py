@@ -0,0 +1,121 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from common.data_store import DataStore, INDEX_NAME, STORE_NAME, UNCHANGED
+
+
+@pytest.fixture
+def lookup(tmp_path):
+    path = tmp_path / "src" / "lookup.csv"
+    path.parent.mkdir()
+    path.write_text("code,label\n1,one\n")
+    return path
+
+
+class TestDataStore:
+
+    def test_one_object_shared_by_every_folder(self, tmp_path, lookup):
+        store = DataStore(str(tmp_path / "out"))
+        targets = []
+        for name in ("a", "b", "c"):
+            folder = tmp_path / "out" / name
+            folder.mkdir(parents=True)
+            targets.append(folder / "lookup.csv")
+            assert store.stage(str(lookup), str(targets[-1])) == "hardlink"
+
+        objects = list((tmp_path / "out" / STORE_NAME / "objects").rglob("*"))
+        stored = [p for p in objects if p.is_file()]
+        assert len(stored) == 1
+        assert all(os.path.samefile(t, stored[0]) for t in targets)
+        assert targets[0].read_text() == "code,label\n1,one\n"
+        # Read-only, so a write through one folder cannot reach the others
+        assert not os.access(stored[0], os.W_OK) or os.geteuid() == 0
+
+    def test_unchanged_files_are_not_rehashed_or_relinked(self, tmp_path, lookup):
+        dst = tmp_path / "lookup.csv"
+        store = DataStore(str(tmp_path / "out"))
+        store.stage(str(lookup), str(dst))
+        store.save()
+
+        # A fresh store (next run) trusts the saved index while size and mtime match
+        again = DataStore(str(tmp_path / "out"))
+        with patch("common.data_store._sha256_file") as rehash:
+            assert again.stage(str(lookup), str(dst)) == UNCHANGED
+        rehash.assert_not_called()
+        assert (tmp_path / "out" / STORE_NAME / INDEX_NAME).exists()
+
+    def test_edited_source_gets_a_new_object(self, tmp_path, lookup):
+        dst = tmp_path / "lookup.csv"
+        store = DataStore(str(tmp_path / "out"))
+        store.stage(str(lookup), str(dst))
+
+        lookup.write_text("code,label\n1,uno\n2,dos\n")
+        assert store.stage(str(lookup), str(dst)) == "hardlink"
+        assert dst.read_text() == "code,label\n1,uno\n2,dos\n"
+
+    def test_falls_back_to_writable_copy(self, tmp_path, lookup):
+        dst = tmp_path / "lookup.csv"
+        store = DataStore(str(tmp_path / "out"), methods=("copy",))
+
+        assert store.stage(str(lookup), str(dst)) == "copy"
+        assert os.access(dst, os.W_OK)
+        assert not os.path.samefile(dst, store.object_path(store.digest(str(lookup))))
+        # Same size and mtime as the object: left in place next time
+        assert store.stage(str(lookup), str(dst)) == UNCHANGED
+
+    def test_symlink_mode(self, tmp_path, lookup):
+        dst = tmp_path / "lookup.csv"
+        store = DataStore(str(tmp_path / "out"), methods=("symlink",))
+
+        assert store.stage(str(lookup), str(dst)) == "symlink"
+        assert os.path.islink(dst) and dst.read_text() == "code,label\n1,one\n"
+        assert store.stage(str(lookup), str(dst)) == UNCHANGED
+
+    def test_concurrent_saves_merge_their_entries(self, tmp_path, lookup):
+        other = lookup.parent / "rates.csv"
+        other.write_text("rate\n0.2\n")
+        out = str(tmp_path / "out")
+        first, second = DataStore(out), DataStore(out)
+        first.digest(str(lookup))
+        second.digest(str(other))  # Loaded the (empty) index before `first` saved
+
+        first.save()
+        second.save()
+
+        index = DataStore(out)._index()
+        assert set(index) == {str(lookup), str(other)}
+
+    def test_prune_removes_objects_no_source_holds(self, tmp_path, lookup):
+        out = str(tmp_path / "out")
+        store = DataStore(out)
+        store.stage(str(lookup), str(tmp_path / "a.csv"))
+        old_object = store.object_path(store.digest(str(lookup)))
+        lookup.write_text("code,label\n1,uno\n")
+        store.stage(str(lookup), str(tmp_path / "a.csv"))
+        gone = lookup.parent / "gone.csv"
+        gone.write_text("x\n")
+        store.stage(str(gone), str(tmp_path / "gone.csv"))
+        gone_object = store.object_path(store.digest(str(gone)))
+        store.save()
+        gone.unlink()
+
+        assert DataStore(out).prune(grace=0) == 2
+        assert not os.path.exists(old_object) and not os.path.exists(gone_object)
+        assert os.path.exists(store.object_path(store.digest(str(lookup))))
+        assert set(DataStore(out)._index()) == {str(lookup)}
+        assert (tmp_path / "a.csv").read_text() == "code,label\n1,uno\n"
+
+    def test_prune_keeps_objects_other_processes_have_not_saved(self, tmp_path, lookup):
+        out = str(tmp_path / "out")
+        writer = DataStore(out)
+        writer.stage(str(lookup), str(tmp_path / "a.csv"))  # Ingested, index not saved
+
+        assert DataStore(out).prune() == 0
+        obj = writer.object_path(writer.digest(str(lookup)))
+        assert os.path.exists(obj)
+        writer.stage(str(lookup), str(tmp_path / "b.csv"))
+        assert (tmp_path / "b.csv").read_text() == lookup.read_text()
+        # Past the grace period an object no saved index refers to goes
+        assert DataStore(out).prune(grace=0) == 1
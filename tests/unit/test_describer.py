@@ -1,7 +1,13 @@
+import json
+import re
+import threading
+import time
 import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import MagicMock
+from common.llm import OllamaClient
 from spss_engine.state import StateMachine
-from spec_writer.describer import SpecGenerator
+from spec_writer.describer import DEFAULT_CONTEXT_TOKENS, SpecGenerator
 
 class TestSpecGenerator:
     def test_generate_report_structure(self):
@@ -48,4 +54,171 @@ class TestSpecGenerator:
         
         # Note: We haven't implemented the injection logic in the prompt yet, 
         # but this confirms the API call works.
-        assert report is not None
\ No newline at end of file
+        assert report is not None
+
+    def test_concurrent_requests_keep_report_order(self):
+        """
+        Runs against a local fake Ollama server that answers slowly and
+        out of order. Requests must overlap (bounded by max_in_flight) and
+        the report must still list nodes in topological order.
+        """
+        stats = {"active": 0, "peak": 0, "calls": 0}
+        lock = threading.Lock()
+
+        class FakeOllama(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = body["prompt"]
+                with lock:
+                    stats["active"] += 1
+                    stats["calls"] += 1
+                    stats["peak"] = max(stats["peak"], stats["active"])
+                # Earlier prompts answer later, so completion order is reversed
+                time.sleep(0.2 if "V1 " in prompt else 0.05)
+                with lock:
+                    stats["active"] -= 1
+                code = prompt.split("Code: ")[-1] if "Code: " in prompt else "Title"
+                payload = json.dumps({"response": f"About {code}"}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllama)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            state = StateMachine()
+            prev = []
+            for i in range(1, 7):
+                state.register_assignment(f"V{i}", f"COMPUTE V{i} = {i}.", dependencies=prev)
+                prev = [state.get_current_version(f"V{i}")]
+
+            endpoint = f"http://127.0.0.1:{server.server_port}/api/generate"
+            client = OllamaClient(endpoint=endpoint, timeout=5)
+            generator = SpecGenerator(state, client, max_in_flight=3)
+            report = generator.generate_report()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert stats["calls"] == 7  # 1 title + 6 nodes
+        assert 1 < stats["peak"] <= 3
+
+        lines = [line for line in report.splitlines() if line.startswith("* **")]
+        assert [line.split("**")[1] for line in lines] == [f"V{i}_0" for i in range(1, 7)]
+        assert "* **V3_0**: About COMPUTE V3 = 3." in report
+
+    def test_failed_request_falls_back_per_node(self):
+        state = StateMachine()
+        state.register_assignment("A", "COMPUTE A = 1.", dependencies=[])
+        state.register_assignment("B", "COMPUTE B = A.",
+                                  dependencies=[state.get_current_version("A")])
+
+        def fake_generate(prompt):
+            if "COMPUTE A" in prompt and "Code:" in prompt:
+                raise RuntimeError("boom")
+            return "Payroll"
+
+        mock_client = MagicMock()
+        mock_client.generate.side_effect = fake_generate
+
+        report = SpecGenerator(state, mock_client, max_in_flight=2).generate_report()
+
+        assert "## Chapter 1: Payroll" in report
+        assert "* **A_0**: Logic description unavailable." in report
+        assert "* **B_0**: Payroll" in report
+
+    @staticmethod
+    def _chain(count, source="COMPUTE V{i} = {i}."):
+        state = StateMachine()
+        prev = []
+        for i in range(1, count + 1):
+            state.register_assignment(f"V{i}", source.format(i=i), dependencies=prev)
+            prev = [state.get_current_version(f"V{i}")]
+        return state
+
+    def test_batch_mode_packs_nodes_into_json_prompts(self):
+        calls = []
+
+        def fake_generate(prompt, max_tokens=None):
+            calls.append((prompt, max_tokens))
+            if "JSON object" not in prompt:
+                return "Payroll"
+            numbers = re.findall(r"^(\d+)\. COMPUTE (V\d+)", prompt, re.M)
+            return "```json\n" + json.dumps({n: f"Sets {v}" for n, v in numbers}) + "\n```"
+
+        mock_client = MagicMock()
+        mock_client.generate.side_effect = fake_generate
+        report = SpecGenerator(self._chain(5), mock_client, batch_size=2).generate_report()
+
+        batched = [(p, t) for p, t in calls if "JSON object" in p]
+        assert len(calls) == 1 + 3  # 1 title, batches of 2 + 2 + 1
+        assert len(batched) == 2 and all(t == 2 * 88 + 16 for _, t in batched)  # With JSON syntax
+        assert "1. COMPUTE V1 = 1.\n2. COMPUTE V2 = 2." in batched[0][0]
+        lines = [line for line in report.splitlines() if line.startswith("* **")]
+        assert lines == [f"* **V{i}_0**: Sets V{i}" for i in range(1, 5)] + ["* **V5_0**: Payroll"]
+
+    def test_batch_mode_retries_unparsed_items_per_node(self):
+        def fake_generate(prompt, max_tokens=None):
+            if "JSON object" in prompt:
+                # Numbered text instead of JSON, and item 2 missing
+                return "1. Sets the first value\n   to one.\n3) Sets the third value."
+            if "Code:" in prompt:
+                return f"Single answer for {prompt.split('Code: ')[1]}"
+            return "Payroll"
+
+        mock_client = MagicMock()
+        mock_client.generate.side_effect = fake_generate
+        report = SpecGenerator(self._chain(3), mock_client, batch_size=3).generate_report()
+
+        assert "* **V1_0**: Sets the first value to one." in report
+        assert "* **V2_0**: Single answer for COMPUTE V2 = 2." in report
+        assert "* **V3_0**: Sets the third value." in report
+
+    def test_batch_size_adapts_to_context_window(self):
+        long_source = "COMPUTE V{i} = " + " + ".join(["X"] * 300) + "."  # ~300 tokens each
+        generator = SpecGenerator(self._chain(6, long_source), MagicMock(), batch_size=10,
+                                  context_tokens=1200)
+        nodes = [generator._find_node_by_id(f"V{i}_0") for i in range(1, 7)]
+
+        batches = generator._plan_batches(nodes)
+
+        assert [len(b) for b in batches] == [2, 2, 2]
+        generator = SpecGenerator(self._chain(6), MagicMock(), batch_size=4)
+        assert generator._plan_batches(nodes) == [[0, 1, 2, 3], [4, 5]]
+
+    def test_truncated_json_answer_keeps_complete_items(self):
+        calls = []
+
+        def fake_generate(prompt, max_tokens=None):
+            if "JSON object" in prompt:
+                # Cut off by the token budget in the middle of item 3
+                return '```json\n{"1": "Sets \\"V1\\".", "2": "Sets V2.", "3": "Flags'
+            if "Code:" in prompt:
+                calls.append(prompt)
+                return "Single answer"
+            return "Payroll"
+
+        mock_client = MagicMock()
+        mock_client.generate.side_effect = fake_generate
+        report = SpecGenerator(self._chain(3), mock_client, batch_size=3).generate_report()
+
+        assert '* **V1_0**: Sets "V1".' in report
+        assert "* **V2_0**: Sets V2." in report
+        assert "* **V3_0**: Single answer" in report
+        assert len(calls) == 1  # Only the cut-off item is asked again
+
+    def test_context_window_comes_from_the_client(self):
+        client = MagicMock()
+        client.context_length.return_value = 1200
+        generator = SpecGenerator(self._chain(2), client, batch_size=4)
+        assert generator._context_window() == 1200
+
+        client.context_length.return_value = None
+        generator = SpecGenerator(self._chain(2), client, batch_size=4)
+        assert generator._context_window() == DEFAULT_CONTEXT_TOKENS
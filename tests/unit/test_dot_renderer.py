@@ -0,0 +1,99 @@
+import stat
+import sys
+import textwrap
+
+import pytest
+
+from spec_writer.dot_renderer import BatchRenderer
+
+# Stand-in for 'dot -Tpng -O file...': writes file.png per input, stops at the
+# first graph containing BROKEN (like dot on a syntax error) and logs each call.
+FAKE_DOT = textwrap.dedent("""\
+    import os, sys
+    with open(os.environ["FAKE_DOT_LOG"], "a") as log:
+        log.write(" ".join(os.path.basename(p) for p in sys.argv[3:]) + "\\n")
+    for path in sys.argv[3:]:
+        text = open(path).read()
+        if "BROKEN" in text:
+            sys.stderr.write(f"Error: {path}: syntax error in line 1\\n")
+            sys.exit(1)
+        with open(path + "." + sys.argv[1][2:], "w") as out:
+            out.write("IMAGE " + text)
+""")
+
+
+@pytest.fixture
+def fake_dot(tmp_path, monkeypatch):
+    script = tmp_path / "dot"
+    script.write_text(f"#!{sys.executable}\n" + FAKE_DOT)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / "calls.log"
+    monkeypatch.setenv("FAKE_DOT_LOG", str(log))
+    return str(script), log
+
+
+def _calls(log):
+    return log.read_text().splitlines() if log.exists() else []
+
+
+class TestBatchRenderer:
+
+    def test_batches_share_processes(self, tmp_path, fake_dot):
+        executable, log = fake_dot
+        jobs = [(f"digraph {{ N{i} }}", str(tmp_path / f"g{i}")) for i in range(5)]
+
+        with BatchRenderer(executable=executable, batch_size=2, workers=2) as renderer:
+            results = renderer.render_batch(jobs)
+
+        assert [r.output_path for r in results] == [path for _, path in jobs]
+        assert all(r.ok and not r.skipped for r in results)
+        assert (tmp_path / "g3.png").read_text() == "IMAGE digraph { N3 }"
+        assert (tmp_path / "g3.dot").read_text() == "digraph { N3 }"
+        assert sorted(_calls(log)) == ["g0.dot g1.dot", "g2.dot g3.dot", "g4.dot"]
+
+    def test_unchanged_graphs_are_skipped(self, tmp_path, fake_dot):
+        executable, log = fake_dot
+        with BatchRenderer(executable=executable) as renderer:
+            renderer.render_batch([("digraph { A }", str(tmp_path / "a")),
+                                   ("digraph { B }", str(tmp_path / "b"))])
+            again = renderer.render_batch([("digraph { A }", str(tmp_path / "a")),
+                                           ("digraph { B2 }", str(tmp_path / "b"))])
+
+        assert [r.skipped for r in again] == [True, False]
+        assert (tmp_path / "b.png").read_text() == "IMAGE digraph { B2 }"
+        assert _calls(log) == ["a.dot b.dot", "b.dot"]
+
+    def test_failures_are_reported_per_graph(self, tmp_path, fake_dot):
+        executable, log = fake_dot
+        jobs = [("digraph { A }", str(tmp_path / "a")),
+                ("digraph { BROKEN", str(tmp_path / "b")),
+                ("digraph { C }", str(tmp_path / "c"))]
+
+        with BatchRenderer(executable=executable) as renderer:
+            results = renderer.render_batch(jobs)
+
+        assert [r.ok for r in results] == [True, False, True]
+        assert "b.dot: syntax error" in results[1].error
+        assert results[1].output_file is None
+        # The failed source is dropped so the next run tries again
+        assert not (tmp_path / "b.dot").exists()
+        assert _calls(log) == ["a.dot b.dot c.dot", "b.dot", "c.dot"]
+
+    def test_missing_executable(self, tmp_path):
+        with BatchRenderer(executable=str(tmp_path / "no-dot")) as renderer:
+            future = renderer.submit("digraph {}", str(tmp_path / "g"))
+            renderer.flush()
+        result = future.result()
+        assert not result.ok and "Cannot run" in result.error
+
+    def test_streamed_sources_are_hashed_like_strings(self, tmp_path, fake_dot):
+        executable, log = fake_dot
+        lines = ["digraph {\n", "    A -> B;\n", "}"]
+        with BatchRenderer(executable=executable) as renderer:
+            first = renderer.render_batch([(iter(lines), str(tmp_path / "g"))])[0]
+            again = renderer.render_batch([("".join(lines), str(tmp_path / "g"))])[0]
+
+        assert first.ok and not first.skipped
+        assert again.skipped
+        assert (tmp_path / "g.dot").read_text() == "".join(lines)
+        assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from common.equivalence import NUMERIC, STRING, EquivalenceChecker, Tolerance
+
+
+class TestEquivalenceChecker:
+
+    def test_identical_tables_are_equivalent(self):
+        spss = pd.DataFrame({"ID": [1.0, 2.0, 3.0], "NAME": ["a", "b", None]})
+        report = EquivalenceChecker().compare(spss, spss.copy())
+
+        assert report.equivalent
+        assert report.rows_compared == 3
+        assert report.columns["ID"].kind == NUMERIC
+        assert report.columns["NAME"].kind == STRING
+        assert report.examples.empty
+
+    def test_numeric_tolerances_and_missing_values(self):
+        spss = pd.DataFrame({"X": [1.0, 100.0, np.nan, 5.0, np.inf]})
+        r = pd.DataFrame({"X": [1.0004, 100.5, np.nan, np.nan, np.inf]})
+
+        report = EquivalenceChecker().compare(spss, r)
+        assert report.columns["X"].mismatches == 2  # 100 vs 100.5, 5 vs NA
+        assert report.columns["X"].max_abs_diff == pytest.approx(0.5)
+
+        relative = EquivalenceChecker(Tolerance(rel_tol=0.01)).compare(spss, r)
+        assert relative.columns["X"].mismatches == 1
+
+        strict = EquivalenceChecker(Tolerance(missing_equal=False)).compare(spss, r)
+        assert strict.columns["X"].mismatches == 3  # SYSMIS no longer equals NA
+
+    def test_string_normalisation_and_mixed_types(self):
+        spss = pd.DataFrame({
+            "CITY": ["  Leeds", "york", "", "Hull"],
+            "FLAG": [1.0, 0.0, 1.0, np.nan],
+            "CODE": [7.0, 8.0, 9.0, 10.0],
+        })
+        r = pd.DataFrame({
+            "CITY": ["LEEDS", "York ", None, "Bath"],
+            "FLAG": ["TRUE", "FALSE", "TRUE", None],  # R logicals
+            "CODE": ["7", "8", "x9", "10"],            # Not all numeric: compared as text
+        })
+        report = EquivalenceChecker().compare(spss, r)
+
+        assert report.mismatched_columns() == {"CITY": 1, "CODE": 1}
+        assert report.columns["FLAG"].kind == NUMERIC
+        assert report.columns["CODE"].kind == STRING
+
+        cased = EquivalenceChecker(Tolerance(case_sensitive=True, strip=False)).compare(spss, r)
+        assert cased.columns["CITY"].mismatches == 3
+
+    def test_key_alignment_and_unmatched_rows(self):
+        spss = pd.DataFrame({"ID": [1.0, 2.0, 3.0, 4.0], "Y": [10.0, 20.0, 30.0, 40.0]})
+        r = pd.DataFrame({"ID": ["4", "2", "1", "5"], "Y": [40.0, 25.0, 10.0, 50.0]})
+
+        report = EquivalenceChecker().compare(spss, r, key=["ID"])
+        assert report.rows_compared == 3
+        assert (report.unmatched_left, report.unmatched_right) == (1, 1)
+        assert report.columns["Y"].mismatches == 1
+        assert report.examples.to_dict("records") == [
+            {"row": 2.0, "column": "Y", "left": 20.0, "right": 25.0}]
+        assert not report.equivalent
+
+        with pytest.raises(ValueError):
+            EquivalenceChecker().compare(spss, pd.concat([r, r]), key=["ID"])
+
+        # Text and composite keys go through a hash join
+        left = pd.DataFrame({"K": ["a", "b", "c"], "V": [1.0, 2.0, 3.0]})
+        right = pd.DataFrame({"K": ["c ", "a", "b"], "V": [3.0, 1.0, 2.5]})
+        report = EquivalenceChecker().compare(left, right, key=["K"])
+        assert report.rows_compared == 3
+        assert report.examples.to_dict("records") == [
+            {"row": "b", "column": "V", "left": 2.0, "right": 2.5}]
+
+    def test_positional_examples_and_column_sets(self):
+        spss = pd.DataFrame({"A": np.arange(100.0), "B": ["x"] * 100, "ONLY_SPSS": 0.0})
+        r = pd.DataFrame({"A": np.arange(100.0), "B": ["x"] * 100, "ONLY_R": 0.0})
+        r.loc[[5, 50, 70], "A"] = -1.0
+        r.loc[50, "B"] = "y"
+
+        report = EquivalenceChecker(max_examples=2).compare(spss, r.iloc[:90])
+        assert report.unmatched_left == 10
+        assert (report.only_left, report.only_right) == (["ONLY_SPSS"], ["ONLY_R"])
+        assert report.mismatches == 4
+        # First two differing rows, every differing value in them
+        examples = report.examples[["row", "column"]].values.tolist()
+        assert examples == [[5, "A"], [50, "A"], [50, "B"]]
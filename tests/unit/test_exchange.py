@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from code_forge.exchange import R_WRITER, SCHEMA_NAME, read_columns, write_columns
+
+
+class TestColumnarExchange:
+
+    def test_round_trip_keeps_types_and_missing_values(self, tmp_path):
+        frame = pd.DataFrame({
+            "id": [1, 2, 3],
+            "net": [1.5, np.nan, -2.25],
+            "flag": [True, False, True],
+            "city": ["Leeds", None, "Zürich"],
+        })
+        write_columns(frame, str(tmp_path / "out"))
+        result = read_columns(str(tmp_path / "out"))
+
+        assert list(result.columns) == ["ID", "NET", "FLAG", "CITY"]
+        assert result["ID"].tolist() == [1.0, 2.0, 3.0]
+        assert np.isnan(result["NET"][1])
+        assert result["FLAG"].tolist() == [1.0, 0.0, 1.0]
+        assert result["CITY"][0] == "Leeds" and result["CITY"][2] == "Zürich"
+        assert pd.isna(result["CITY"][1])
+
+    def test_numeric_columns_are_memory_mapped(self, tmp_path):
+        write_columns(pd.DataFrame({"X": np.arange(1000.0)}), str(tmp_path))
+        column = read_columns(str(tmp_path))["X"].to_numpy()
+        owner = column
+        while owner is not None and not isinstance(owner, np.memmap):
+            owner = owner.base
+        assert owner is not None  # A view of the file, not a copy
+        assert column.sum() == 499500.0
+
+    def test_empty_table_and_corrupt_files(self, tmp_path):
+        empty_df = pd.DataFrame({"X": pd.Series([], dtype=float),
+                                 "S": pd.Series([], dtype=object)})
+        write_columns(empty_df, str(tmp_path / "empty"))
+        empty = read_columns(str(tmp_path / "empty"))
+        assert list(empty.columns) == ["X", "S"] and len(empty) == 0
+
+        write_columns(pd.DataFrame({"X": [1.0, 2.0]}), str(tmp_path / "bad"))
+        (tmp_path / "bad" / "1.f8").write_bytes(b"\0" * 8)  # Truncated column
+        with pytest.raises(ValueError):
+            read_columns(str(tmp_path / "bad"))
+
+    def test_r_writer_matches_layout(self):
+        # The R side must produce the same files the reader expects
+        assert "write_statify_columns <- function(df, dir)" in R_WRITER
+        assert SCHEMA_NAME in R_WRITER
+        assert 'endian = "little"' in R_WRITER
@@ -0,0 +1,69 @@
+import pytest
+from spss_engine.expression import (
+    tokenize, parse_expression, parse_assignment, iter_names,
+    ExpressionError, Binary, Call, Group, Name, Number,
+)
+
+
+class TestExpressionParser:
+
+    def test_tokenize_strips_terminator_and_keeps_dotted_names(self):
+        tokens = tokenize("DATE.MDY(m, d, y) + x.")
+        assert tokens[0] == ("NAME", "DATE.MDY")
+        assert tokens[-1] == ("NAME", "x")
+
+    def test_tokenize_rejects_garbage(self):
+        with pytest.raises(ExpressionError):
+            tokenize("x % 2")
+
+    def test_precedence(self):
+        """Multiplication binds tighter than addition; parentheses are kept."""
+        ast = parse_expression("a + b * (c - 1)")
+        assert isinstance(ast, Binary) and ast.op == "+"
+        assert isinstance(ast.right, Binary) and ast.right.op == "*"
+        assert isinstance(ast.right.right, Group)
+
+    def test_word_operators_are_canonical(self):
+        ast = parse_expression("x EQ 1 AND y NE 2")
+        assert ast.op == "AND"
+        assert ast.left.op == "="
+        assert ast.right.op == "<>"
+
+    def test_function_calls(self):
+        ast = parse_expression("MOD(a, 10)")
+        assert ast == Call("MOD", (Name("a"), Number("10")))
+
+    def test_iter_names_skips_functions_and_formats(self):
+        ast = parse_expression("NUMBER(s, F8.0) + SQRT(x) + $SYSMIS")
+        assert sorted(iter_names(ast)) == ["S", "X"]
+
+
+class TestAssignmentParsing:
+
+    def test_compute(self):
+        ast = parse_assignment("COMPUTE net = gross - tax.")
+        assert ast.keyword == "COMPUTE"
+        assert ast.target == "NET"
+        assert ast.dependencies() == ["GROSS", "TAX"]
+
+    def test_bare_if_assignment(self):
+        ast = parse_assignment("IF (sales > avg_sales) bonus = 1000.")
+        assert ast.target == "BONUS"
+        assert ast.condition is not None
+        assert ast.dependencies() == ["SALES", "AVG_SALES"]
+
+    def test_recode_into(self):
+        ast = parse_assignment("RECODE income (Lowest thru 20000 = 1) (Else = 0) INTO poor.")
+        assert ast.target == "POOR"
+        assert ast.dependencies() == ["INCOME"]
+        assert not ast.reads_previous_target()
+
+    def test_reads_previous_target(self):
+        assert parse_assignment("COMPUTE x = x + 1.").reads_previous_target()
+        assert parse_assignment("RECODE g ('m'='M').").reads_previous_target()
+        assert parse_assignment("IF (c = 1) x = 2.").reads_previous_target()
+        assert not parse_assignment("COMPUTE x = 2.").reads_previous_target()
+
+    def test_non_assignment(self):
+        assert parse_assignment("FREQUENCIES x.") is None
+        assert parse_assignment("* comment.") is None
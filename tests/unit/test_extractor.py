@@ -63,4 +63,36 @@ class TestAssignmentExtractor:
         cmd4 = "MATCH FILES /FILE='part1.sav' /FILE='part2.sav'."
         # Our simple extractor should probably just grab the first valid file it finds 
         # or we might need to handle multiple. For now, let's target the first one.
-        assert extractor.extract_file_target(cmd4) == "part1.sav"
\ No newline at end of file
+        assert extractor.extract_file_target(cmd4) == "part1.sav"
+
+    def test_extract_single_pass(self):
+        """extract() returns target and dependencies together, minus the target."""
+        target, deps = AssignmentExtractor.extract("COMPUTE total = total + SQRT(base) + bonus.")
+        assert target == "TOTAL"
+        assert sorted(deps) == ["BASE", "BONUS"]
+
+    def test_extract_ignores_builtins_and_literals(self):
+        cmd = "COMPUTE dob = DATE.MDY(m, d, y) + RND(x) + LENGTH('abc name')."
+        target, deps = AssignmentExtractor.extract(cmd)
+        assert target == "DOB"
+        assert sorted(deps) == ["D", "M", "X", "Y"]
+
+    def test_function_names_as_variables(self):
+        """Built-in names are only skipped when called, not when used as variables."""
+        deps = AssignmentExtractor.extract_dependencies("COMPUTE total = value + index + max.")
+        assert deps == ["TOTAL", "VALUE", "INDEX", "MAX"]
+        target, deps = AssignmentExtractor._extract_from_tokens("COMPUTE y = MAX(a, b) + mean.")
+        assert target == "Y"
+        assert deps == ["A", "B", "MEAN"]
+        for names in ("length + number + range", "min + sd + lag", "normal + missing"):
+            target, deps = AssignmentExtractor.extract(f"COMPUTE z = {names}.")
+            assert sorted(deps) == sorted(n.strip().upper() for n in names.split("+"))
+
+    def test_extract_nested_if_condition(self):
+        """Balanced parentheses in the IF prefix are skipped correctly."""
+        target, deps = AssignmentExtractor.extract("IF (ABS(x) > 1) COMPUTE flag = 1.")
+        assert target == "FLAG"
+        assert deps == ["X"]
+
+    def test_extract_non_assignment(self):
+        assert AssignmentExtractor.extract("FREQUENCIES x.") == (None, [])
@@ -55,4 +55,64 @@ class TestGraphGenerator:
         # Check for red styling on the dead node
         assert 'X_0 [label="X_0\\nx=1" color="red" fontcolor="red" style="dashed"];' in dot
         # Live node should not have red styling (or at least not the full string match)
-        assert 'color="red"' in dot # At least one node is red
\ No newline at end of file
+        assert 'color="red"' in dot # At least one node is red
+class TestScalableGraphModes:
+
+    @staticmethod
+    def _two_clusters():
+        state = StateMachine()
+        a0 = state.register_assignment("a", "COMPUTE a = 1.", dependencies=[])
+        a1 = state.register_assignment("a", "COMPUTE a = a + 1.", dependencies=[a0])
+        state.register_assignment("b", "COMPUTE b = a * 2 + some_very_long_expression.",
+                                  dependencies=[a1])
+        state.register_output_file("'out.sav'")
+        state.reset_scope()
+        state.register_assignment("a", "COMPUTE a = 5.", dependencies=[])
+        return state
+
+    def test_clustered_uses_one_subgraph_per_cluster(self):
+        dot = GraphGenerator(self._two_clusters(), clustered=True).generate_dot()
+
+        assert 'subgraph cluster_0 {' in dot and 'subgraph cluster_1 {' in dot
+        assert 'label="Cluster 0\\nout: out.sav";' in dot
+        # Same id in two clusters stays two nodes
+        assert "C0_A_0 [" in dot and "C1_A_0 [" in dot
+        assert "C0_A_0 -> C0_A_1" in dot
+
+    def test_collapse_merges_version_chains(self):
+        view = GraphGenerator(self._two_clusters(), collapse=True, max_label=12).build_view()
+
+        labels = {node.key: node.label for node in view.nodes}
+        assert labels["C0_A"] == "A (2 versions)\nCOMPUTE a..."
+        assert labels["C0_B"] == "B_0\nCOMPUTE b..."
+        assert view.edges == [("C0_A", "C0_B")]  # The A_0 -> A_1 edge is now internal
+
+    def test_node_cap_adds_summary_node(self):
+        state = StateMachine()
+        previous = []
+        for i in range(6):
+            previous = [state.register_assignment(f"v{i}", f"v{i}=1", dependencies=previous)]
+
+        generator = GraphGenerator(state, max_nodes=2)
+        view = generator.build_view()
+
+        assert [node.key for node in view.nodes] == ["V0_0", "V1_0", "MORE"]
+        assert view.nodes[-1].label == "... 4 more nodes"
+        assert view.edges == [("V0_0", "V1_0"), ("V1_0", "MORE")]
+        assert 'MORE [label="... 4 more nodes" style="dotted"' in generator.generate_dot()
+
+    def test_layout_free_exports(self, tmp_path):
+        import json
+        generator = GraphGenerator(self._two_clusters(), clustered=True)
+
+        json_path = generator.export_json(str(tmp_path / "flow"), highlight_dead=["A_0"])
+        svg_path = generator.export_svg(str(tmp_path / "flow"))
+
+        data = json.loads(open(json_path).read())
+        assert [n["id"] for n in data["nodes"]] == ["C0_A_0", "C0_A_1", "C0_B_0", "C1_A_0"]
+        assert data["nodes"][0]["dead"] is True
+        assert {"source": "C0_A_0", "target": "C0_A_1"} in data["edges"]
+        assert data["clusters"][0]["outputs"] == ["out.sav"]
+
+        svg = open(svg_path).read()
+        assert svg.startswith("<svg") and svg.count("<rect") == 4 and svg.count("<line") == 2
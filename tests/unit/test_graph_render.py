@@ -29,4 +29,65 @@ class TestGraphRender:
                 mock_source.return_value.render.return_value = "output.png"
                 
                 result = generator.render("correct_path")
-                assert result == "output.png"
\ No newline at end of file
+                assert result == "output.png"
+
+    def test_submit_queues_on_shared_renderer(self):
+        state = StateMachine()
+        state.register_assignment("x", "x=1", dependencies=[])
+        generator = GraphGenerator(state)
+        renderer = MagicMock()
+
+        future = generator.submit(renderer, "out/flow")
+
+        (source, path), _ = renderer.submit.call_args
+        assert path == "out/flow"
+        # Streamed line by line rather than passed as one string
+        assert "".join(source).rstrip("\n") == generator.generate_dot()
+        assert future is renderer.submit.return_value
+
+    def test_write_dot_streams_in_blocks(self):
+        import io
+        state = StateMachine()
+        previous = []
+        for i in range(200):
+            previous = [state.register_assignment(f"v{i}", f'COMPUTE v{i} = "a\\b".',
+                                                  dependencies=previous)]
+        generator = GraphGenerator(state)
+
+        out = io.StringIO()
+        writes = []
+        out.write = lambda text, _write=out.write: writes.append(len(text)) or _write(text)
+        count = generator.write_dot(out, buffer_size=1024)
+
+        assert out.getvalue().rstrip("\n") == generator.generate_dot()
+        assert count == len(out.getvalue())
+        assert len(writes) > 5 and max(writes) < 1024 + 200
+        # Backslashes and quotes are escaped for DOT strings
+        assert 'label="V0_0\\nCOMPUTE v0 = \\"a\\\\b\\"."' in out.getvalue()
+
+    def test_render_stream_pipes_into_dot(self, tmp_path):
+        import sys
+        fake_dot = tmp_path / "dot"
+        # Copies stdin to the -o file
+        fake_dot.write_text(f"#!{sys.executable}\nimport sys\n"
+                            "open(sys.argv[3], 'w').write(sys.stdin.read())\n")
+        fake_dot.chmod(0o755)
+        state = StateMachine()
+        state.register_assignment("x", "x=1", dependencies=[])
+        generator = GraphGenerator(state)
+
+        output_file = generator.render_stream(str(tmp_path / "flow"), executable=str(fake_dot))
+
+        assert output_file == str(tmp_path / "flow.png")
+        assert open(output_file).read().rstrip("\n") == generator.generate_dot()
+
+    def test_render_stream_reports_dot_errors(self, tmp_path):
+        import sys
+        fake_dot = tmp_path / "dot"
+        fake_dot.write_text(f"#!{sys.executable}\nimport sys\n"
+                            "sys.stderr.write('Error: syntax error in line 3')\nsys.exit(1)\n")
+        fake_dot.chmod(0o755)
+        generator = GraphGenerator(StateMachine())
+
+        with pytest.raises(RuntimeError, match="syntax error in line 3"):
+            generator.render_stream(str(tmp_path / "flow"), executable=str(fake_dot))
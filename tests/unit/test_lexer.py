@@ -66,3 +66,29 @@ class TestSpssLexer:
         normalized = lexer.normalize_command(cmd)
 
         assert normalized == "COMPUTE x = 1."
+
+    def test_iter_commands_matches_split_commands(self):
+        """Streaming from a file handle yields the same command boundaries."""
+        import io
+        from tests.corpus import COMPREHENSIVE_SCOPE_CORPUS
+
+        lexer = SpssLexer()
+        expected = lexer.split_commands(COMPREHENSIVE_SCOPE_CORPUS)
+        streamed = list(lexer.iter_commands(io.StringIO(COMPREHENSIVE_SCOPE_CORPUS)))
+
+        assert streamed == expected
+
+    def test_iter_commands_chunk_boundaries(self):
+        """
+        Lines and quoted strings split across chunk boundaries must be
+        re-assembled before the termination check.
+        """
+        raw_code = 'COMPUTE msg = "End.\nof it".\r\nEXECUTE.\nCOMPUTE y = 2.'
+        lexer = SpssLexer()
+        expected = lexer.split_commands(raw_code)
+
+        for size in (1, 2, 5):
+            chunks = [raw_code[i:i + size] for i in range(0, len(raw_code), size)]
+            assert list(lexer.iter_commands(chunks)) == expected
+
+        assert len(expected) == 3
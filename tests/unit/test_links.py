@@ -0,0 +1,52 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from common.links import link_path
+
+
+class TestLinkPath:
+    def test_files_are_hard_linked(self, tmp_path):
+        src = tmp_path / "data.csv"
+        src.write_text("x\n1\n")
+        dst = tmp_path / "linked.csv"
+
+        assert link_path(str(src), str(dst)) == "hardlink"
+        assert os.path.samefile(src, dst)
+
+    def test_directories_are_symlinked(self, tmp_path):
+        src = tmp_path / "lookups"
+        src.mkdir()
+        (src / "codes.csv").write_text("code\n1\n")
+        dst = tmp_path / "work" / "lookups"
+        dst.parent.mkdir()
+
+        assert link_path(str(src), str(dst)) == "symlink"
+        assert (dst / "codes.csv").read_text() == "code\n1\n"
+
+    def test_falls_back_to_copy(self, tmp_path):
+        src = tmp_path / "data.csv"
+        src.write_text("x\n1\n")
+        dst = tmp_path / "copy.csv"
+
+        with patch("os.link", side_effect=OSError("cross-device")), \
+             patch("common.links.reflink", side_effect=OSError("no clones")), \
+             patch("os.symlink", side_effect=OSError("not permitted")):
+            assert link_path(str(src), str(dst)) == "copy"
+        assert dst.read_text() == "x\n1\n"
+        assert not os.path.samefile(src, dst)
+
+    def test_reflink_is_tried_before_symlink(self, tmp_path):
+        src = tmp_path / "data.csv"
+        src.write_text("x\n1\n")
+        dst = tmp_path / "clone.csv"
+
+        with patch("os.link", side_effect=OSError("cross-device")), \
+             patch("common.links.reflink") as clone:
+            assert link_path(str(src), str(dst)) == "reflink"
+        clone.assert_called_once_with(str(src), str(dst))
+
+    def test_unknown_method_is_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            link_path(str(tmp_path), str(tmp_path / "x"), methods=("teleport",))
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from common.llm import OllamaClient
+from common.llm import OllamaClient, LLMCache, CACHE_ENV_VAR, default_cache, generate_concurrently
 from common.prompts import DESCRIBE_NODE_PROMPT
 import requests
 
@@ -38,4 +38,125 @@ class TestOllamaClient:
             source="COMPUTE X=1"
         )
         assert "VAR_A" in formatted
-        assert "COMPUTE X=1" in formatted
\ No newline at end of file
+        assert "COMPUTE X=1" in formatted
+
+    @patch('common.llm.requests.post')
+    def test_context_length(self, mock_post):
+        show = MagicMock()
+        show.json.return_value = {"parameters": "stop \"[INST]\"\nnum_ctx 8192"}
+        mock_post.return_value = show
+
+        client = OllamaClient(endpoint="http://host:11434/api/generate", cache=False)
+        assert client.context_length() == 8192
+        assert client.context_length() == 8192
+        mock_post.assert_called_once()
+        assert mock_post.call_args[0][0] == "http://host:11434/api/show"
+
+        # A requested window is used as-is and sent with each prompt
+        mock_post.reset_mock()
+        mock_post.return_value = _ok_response("ok")
+        sized = OllamaClient(num_ctx=16384, cache=False)
+        assert sized.context_length() == 16384
+        sized.generate("Test")
+        assert mock_post.call_args.kwargs["json"]["options"]["num_ctx"] == 16384
+
+    @patch('common.llm.requests.post')
+    def test_context_length_unknown(self, mock_post):
+        mock_post.side_effect = requests.exceptions.ConnectionError("down")
+        assert OllamaClient(cache=False).context_length() is None
+
+    def test_concurrent_failures_are_logged(self, caplog):
+        client = MagicMock()
+        client.generate.side_effect = ["ok", RuntimeError("boom")]
+        with caplog.at_level("WARNING", logger="common.llm"):
+            assert generate_concurrently(client, ["a", "b"], max_in_flight=1) == ["ok", None]
+        assert "LLM request failed" in caplog.text and "boom" in caplog.text
+
+
+def _ok_response(text):
+    response = MagicMock()
+    response.json.return_value = {"response": text}
+    response.raise_for_status.return_value = None
+    return response
+
+
+class TestLLMCache:
+
+    @patch('common.llm.requests.post')
+    def test_repeat_prompt_is_served_from_disk(self, mock_post, tmp_path):
+        mock_post.return_value = _ok_response("Adds one")
+        cache = LLMCache(str(tmp_path))
+
+        first = OllamaClient(cache=cache).generate("COMPUTE X = X + 1.")
+        # A fresh client (e.g. the next nightly run) reuses the stored answer
+        second = OllamaClient(cache=LLMCache(str(tmp_path))).generate("COMPUTE X = X + 1.")
+
+        assert first == second == "Adds one"
+        mock_post.assert_called_once()
+        assert cache.stats()["misses"] == 1
+
+    @patch('common.llm.requests.post')
+    def test_key_covers_model_and_options(self, mock_post, tmp_path):
+        mock_post.return_value = _ok_response("Text")
+        cache = LLMCache(str(tmp_path))
+
+        OllamaClient(model="a", cache=cache).generate("P")
+        OllamaClient(model="b", cache=cache).generate("P")
+        OllamaClient(model="a", cache=cache).generate("P", max_tokens=50)
+        OllamaClient(model="a", cache=cache).generate("P")
+
+        assert mock_post.call_count == 3
+        assert cache.stats() == {"hits": 1, "misses": 3, "evictions": 0}
+
+    @patch('common.llm.requests.post')
+    def test_opt_out(self, mock_post, tmp_path, monkeypatch):
+        mock_post.return_value = _ok_response("Text")
+        client = OllamaClient(cache=False)
+        client.generate("P")
+        client.generate("P")
+        assert client.cache is None
+        assert mock_post.call_count == 2
+
+        monkeypatch.setenv(CACHE_ENV_VAR, "off")
+        assert default_cache() is None
+        monkeypatch.setenv(CACHE_ENV_VAR, str(tmp_path))
+        assert default_cache() is default_cache()
+        assert OllamaClient().cache.directory == str(tmp_path)
+
+    @patch('common.llm.requests.post')
+    def test_errors_are_not_cached(self, mock_post, tmp_path):
+        cache = LLMCache(str(tmp_path))
+        mock_post.side_effect = requests.exceptions.ReadTimeout("Timeout!")
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            OllamaClient(cache=cache).generate("P")
+
+        mock_post.side_effect = None
+        mock_post.return_value = _ok_response("Recovered")
+        assert OllamaClient(cache=cache).generate("P") == "Recovered"
+
+    def test_lru_eviction_keeps_recent_entries(self, tmp_path):
+        cache = LLMCache(str(tmp_path), max_bytes=2000)
+        keys = [LLMCache.make_key("m", f"prompt {i}", {}) for i in range(10)]
+        for i, key in enumerate(keys):
+            cache.put(key, "x" * 300)
+            if i >= 1:
+                cache.get(keys[0])  # Keep the first entry hot
+
+        assert cache.stats()["evictions"] > 0
+        assert cache.get(keys[0]) == "x" * 300
+        assert cache.get(keys[-1]) == "x" * 300
+        assert cache.get(keys[1]) is None
+
+    def test_overwrite_and_clear_keep_accounting_exact(self, tmp_path):
+        cache = LLMCache(str(tmp_path))
+        key = LLMCache.make_key("m", "p", {})
+        cache.put(key, "first")  # Measures the directory
+        for _ in range(3):
+            cache.put(key, "x" * 100)
+        assert cache._size == cache._measure()
+
+        cache.get(key)
+        cache.get("missing")
+        cache.clear()
+        assert cache._size == 0
+        assert cache.stats() == {"hits": 0, "misses": 0, "evictions": 0}
@@ -0,0 +1,60 @@
+from common.manifest import BuildManifest, MANIFEST_NAME
+
+
+class TestBuildManifest:
+    def _source(self, tmp_path, text="GET DATA /FILE='d.csv'.\n"):
+        (tmp_path / "s.sps").write_text(text)
+        (tmp_path / "d.csv").write_text("x\n1\n")
+        return str(tmp_path / "s.sps")
+
+    def test_roundtrip_and_change_detection(self, tmp_path):
+        out = tmp_path / "out"
+        source = self._source(tmp_path)
+        config = {"model": "m", "code": False}
+
+        manifest = BuildManifest(str(out))
+        fp = manifest.fingerprint(source, ["d.csv"], config)
+        manifest.record("s.sps", fp)
+        manifest.save()
+        assert (out / MANIFEST_NAME).exists()
+
+        reloaded = BuildManifest.load(str(out))
+        assert reloaded.is_current("s.sps", reloaded.fingerprint(source, ["d.csv"], config))
+        # Config, script and data changes all invalidate the entry
+        changed = reloaded.fingerprint(source, ["d.csv"], {"model": "n", "code": False})
+        assert not reloaded.is_current("s.sps", changed)
+        (tmp_path / "d.csv").write_text("x\n2\n")
+        assert not reloaded.is_current("s.sps", reloaded.fingerprint(source, ["d.csv"], config))
+
+    def test_missing_outputs_are_stale(self, tmp_path):
+        source = self._source(tmp_path)
+        manifest = BuildManifest(str(tmp_path))
+        fp = manifest.fingerprint(source, [], {})
+        manifest.record("s.sps", fp)
+        assert manifest.is_current("s.sps", fp, outputs=[source])
+        assert not manifest.is_current("s.sps", fp, outputs=[str(tmp_path / "gone.md")])
+
+    def test_digest_reused_when_size_and_mtime_match(self, tmp_path, monkeypatch):
+        source = self._source(tmp_path)
+        manifest = BuildManifest(str(tmp_path))
+        first = manifest.file_digest(source)
+
+        import common.manifest as module
+        monkeypatch.setattr(module, "_sha256_file",
+                            lambda path: (_ for _ in ()).throw(AssertionError("re-hashed")))
+        assert manifest.file_digest(source) == first
+        assert manifest.file_digest(str(tmp_path / "missing.csv")) is None
+
+    def test_corrupt_manifest_starts_fresh(self, tmp_path):
+        (tmp_path / MANIFEST_NAME).write_text("{not json")
+        assert BuildManifest.load(str(tmp_path)).entries == {}
+
+    def test_unchanged_check_uses_recorded_inputs(self, tmp_path):
+        source = self._source(tmp_path)
+        manifest = BuildManifest(str(tmp_path))
+        assert not manifest.is_unchanged("s.sps", source, {})
+        manifest.record("s.sps", manifest.fingerprint(source, ["d.csv"], {}))
+
+        assert manifest.is_unchanged("s.sps", source, {})
+        (tmp_path / "d.csv").write_text("x\n2\n")
+        assert not manifest.is_unchanged("s.sps", source, {})
@@ -32,4 +32,29 @@ class TestSpssParser:
     def test_identify_match_files(self):
         cmd = "MATCH FILES /TABLE='x.sav'."
         parsed = self.parser.parse_command(cmd)
-        assert parsed.type == TokenType.FILE_MATCH
\ No newline at end of file
+        assert parsed.type == TokenType.FILE_MATCH
+
+    def test_multi_word_keyword_prefers_longest(self):
+        parsed = self.parser.parse_command("SAVE TRANSLATE /OUTFILE='x.csv' /TYPE=CSV.")
+        assert parsed.type == TokenType.FILE_SAVE
+        assert parsed.keyword == "SAVE TRANSLATE"
+
+    def test_leading_tokens_only(self):
+        """Classification looks at the leading words, across line breaks and case."""
+        assert self.parser.parse_command("  sort\n   cases BY id.").type == TokenType.CONTROL_FLOW
+        assert self.parser.parse_command("IF(x > 1) y = 2.").type == TokenType.CONDITIONAL
+        assert self.parser.parse_command("DO IF (x > 1).").type == TokenType.BLOCK
+
+    def test_extended_vocabulary(self):
+        assert self.parser.parse_command("FREQUENCIES VARIABLES=x.").type == TokenType.PROCEDURE
+        assert self.parser.parse_command("VALUE LABELS x 1 'Yes'.").type == TokenType.DECLARATION
+        assert self.parser.parse_command("SELECT IF (x > 1).").type == TokenType.CASE_SELECTION
+        assert self.parser.parse_command("* A comment.").type == TokenType.COMMENT
+        assert self.parser.parse_command("FOOBAR x.").type == TokenType.UNKNOWN
+
+    def test_other_readers_and_writers_keep_legacy_categories_free(self):
+        """GET SAS, IMPORT, XSAVE... are not treated as GET DATA / SAVE."""
+        for cmd in ("GET SAS DATA='in.sas7bdat'.", "GET STATA FILE='in.dta'.",
+                    "GET TRANSLATE FILE='in.xls' /TYPE=XLS.", "IMPORT FILE='in.por'.",
+                    "XSAVE OUTFILE='out.sav'.", "EXPORT OUTFILE='out.por'."):
+            assert self.parser.parse_command(cmd).type == TokenType.FILE_IO
@@ -0,0 +1,79 @@
+import pytest
+
+from spss_engine.probe import NUMERIC, STRING, ColumnarProbe
+
+
+def _write(path, rows, header="id,score,name"):
+    path.write_text(header + "\n" + "\n".join(rows) + "\n", encoding="utf-8")
+    return str(path)
+
+
+class TestColumnarProbe:
+
+    def test_types_and_missing_values_across_chunks(self, tmp_path):
+        # PSPP writes SYSMIS as a blank field; kinds come from the first chunk
+        csv = _write(tmp_path / "out.csv", ["1,10.50,Ann", "2, ,Bob", "3,oops,", "4,2.00,Dee"])
+        probe = ColumnarProbe(chunk_rows=2)
+
+        chunks = list(probe.iter_chunks(csv))
+        assert [list(c.index) for c in chunks] == [[0, 1], [2, 3]]
+
+        result = probe.profile(csv)
+        assert result.row_count == 4
+        assert list(result.columns) == ["ID", "SCORE", "NAME"]
+        score = result.columns["SCORE"]
+        assert score.kind == NUMERIC
+        assert (score.count, score.missing) == (2, 2)  # Blank and 'oops'
+        assert (score.minimum, score.maximum) == (2.0, 10.5)
+        assert result.columns["NAME"].kind == STRING
+        assert result.columns["NAME"].missing == 1
+
+    def test_hashes_ignore_chunking_and_number_formatting(self, tmp_path):
+        a = _write(tmp_path / "a.csv", [f"{i},{i / 4:.2f},n{i}" for i in range(50)])
+        b = _write(tmp_path / "b.csv", [f"{i},{i / 4},n{i}" for i in range(50)])
+        c = _write(tmp_path / "c.csv", [f"{i},{i / 4},n{i}" for i in range(49)] + ["49,0,n49"])
+
+        first = ColumnarProbe(chunk_rows=7).profile(a).digests()
+        second = ColumnarProbe(chunk_rows=1000).profile(b).digests()
+        third = ColumnarProbe(chunk_rows=7).profile(c).digests()
+
+        assert first == second
+        assert third["SCORE"] != first["SCORE"]
+        assert third["ID"] == first["ID"] and third["NAME"] == first["NAME"]
+
+    def test_sampling_is_bounded(self, tmp_path):
+        csv = _write(tmp_path / "big.csv", [f"{i},{i}.5,x" for i in range(1000)])
+
+        head_result = ColumnarProbe(chunk_rows=64, sample_rows=10).profile(csv)
+        assert list(head_result.sample.index) == list(range(10))
+        assert head_result.first_values() == {"ID": "0", "SCORE": "0.5", "NAME": "x"}
+
+        uniform = ColumnarProbe(chunk_rows=64, sample_rows=10, sample="uniform", seed=3)
+        sample = uniform.profile(csv).sample
+        assert len(sample) == 10
+        assert list(sample.columns) == ["ID", "SCORE", "NAME"]
+        assert sample.index.is_monotonic_increasing
+        assert sample.index.max() > 64  # Drawn from the whole file, not the first chunk
+        # Same seed, same sample
+        assert list(uniform.profile(csv).sample.index) == list(sample.index)
+
+        assert ColumnarProbe(sample_rows=0).profile(csv).sample is None
+
+    def test_load_and_empty_files(self, tmp_path):
+        csv = _write(tmp_path / "out.csv", ["1,1.5,a", "2,2.5,b", "3,3.5,c"])
+        frame = ColumnarProbe(chunk_rows=2).load(csv)
+        assert frame["SCORE"].dtype == "float64"
+        assert frame["SCORE"].tolist() == [1.5, 2.5, 3.5]
+
+        empty = tmp_path / "empty.csv"
+        empty.write_text("")
+        assert ColumnarProbe().profile(str(empty)).row_count == 0
+        assert ColumnarProbe().load(str(empty)).empty
+
+        header_only = _write(tmp_path / "header.csv", [])
+        result = ColumnarProbe().profile(header_only)
+        assert result.row_count == 0
+
+    def test_rejects_unknown_sampling_mode(self):
+        with pytest.raises(ValueError):
+            ColumnarProbe(sample="every_other")
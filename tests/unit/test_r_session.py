@@ -0,0 +1,186 @@
+import os
+import shutil
+import sys
+import time
+
+import pytest
+
+from code_forge.R_runner import RRunner
+from code_forge.optimizer import CodeOptimizer
+from code_forge.r_session import RSession
+
+# Stand-in for scripts/worker.R, speaking the same line protocol. 'run'
+# jobs understand a few directives instead of R: PRINT <text>, PRINTN
+# <text> (no trailing newline, like cat()), CWD, FAIL <message>, HANG,
+# CHATTY (prints forever), CRASH; an R harness gets its CSV fallback written.
+FAKE_WORKER = r'''
+import os, re, sys, time
+with open(os.environ["FAKE_R_LOG"], "a") as log:
+    log.write(f"{os.getpid()} {' '.join(sys.argv[1:])}\n")
+
+def run(path):
+    with open(path) as f:
+        text = f.read()
+    harness = re.search(r'write_csv\(result, "(.*?)"', text)
+    if harness:
+        with open(harness.group(1), "w") as out:
+            out.write("id,net\n1,10.5\n2,20\n")
+        return
+    for line in text.splitlines():
+        word, _, rest = line.partition(" ")
+        if word == "PRINT": print(rest)
+        elif word == "PRINTN": print(rest, end="")
+        elif word == "CWD": print(os.getcwd())
+        elif word == "FAIL": raise RuntimeError(rest)
+        elif word == "HANG": time.sleep(30)
+        elif word == "CHATTY":
+            while True:
+                print("working", flush=True)
+                time.sleep(0.1)
+        elif word == "CRASH": os._exit(4)
+
+for line in sys.stdin:
+    token, kind, cwd, path = line.rstrip("\n").split("\t")
+    try:
+        os.chdir(cwd)
+        if kind == "run": run(path)
+        elif kind == "lint": print(f"{os.path.basename(path)}:1:1: style: fake lint")
+        elif kind == "style":
+            with open(path, "a") as f: f.write("# styled\n")
+        status = "OK"
+    except Exception as e:
+        status = f"ERROR\t{e}"
+    print(f"{token}\t{status}", flush=True)
+'''
+
+
+@pytest.fixture
+def fake_worker(tmp_path, monkeypatch):
+    script = tmp_path / "fake_worker.py"
+    script.write_text(FAKE_WORKER)
+    log = tmp_path / "starts.log"
+    log.write_text("")
+    monkeypatch.setenv("FAKE_R_LOG", str(log))
+
+    def make(**kwargs):
+        return RSession(executable=sys.executable, worker_script=str(script),
+                        libraries=["dplyr"], **kwargs)
+    return make, log
+
+
+def _script(folder, name, body):
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / name
+    path.write_text(body)
+    return str(path)
+
+
+class TestRSession:
+
+    def test_jobs_share_one_worker(self, fake_worker, tmp_path):
+        make, log = fake_worker
+        with make(timeout=10) as session:
+            first = session.run("run", _script(tmp_path / "a", "one.R", "PRINT hello\nCWD\n"))
+            second = session.run("run", _script(tmp_path / "b", "two.R", "CWD\n"),
+                                 cwd=str(tmp_path))
+
+        assert first.ok and first.output == ["hello", str(tmp_path / "a")]
+        assert second.output == [str(tmp_path)]
+        starts = log.read_text().splitlines()
+        assert len(starts) == 1
+        assert starts[0].endswith("dplyr")  # Libraries are handed over once
+
+    def test_script_errors_keep_the_worker(self, fake_worker, tmp_path):
+        make, log = fake_worker
+        with make(timeout=10) as session:
+            failed = session.run("run", _script(tmp_path, "bad.R",
+                                                "PRINT before\nFAIL object 'x' not found\n"))
+            ok = session.run("run", _script(tmp_path, "good.R", "PRINT fine\n"))
+
+        assert not failed.ok
+        assert failed.output == ["before"]
+        assert failed.error == "object 'x' not found"
+        assert ok.ok and ok.output == ["fine"]
+        assert len(log.read_text().splitlines()) == 1
+
+    def test_timeout_and_crash_restart(self, fake_worker, tmp_path):
+        make, log = fake_worker
+        with make(timeout=1, max_retries=1) as session:
+            with pytest.raises(TimeoutError):
+                session.run("run", _script(tmp_path, "hang.R", "HANG\n"))
+            with pytest.raises(RuntimeError, match="exited with code 4"):
+                session.run("run", _script(tmp_path, "crash.R", "CRASH\n"))
+            good = session.run("run", _script(tmp_path, "good.R", "PRINT back\n"))
+            assert good.output == ["back"]
+
+        # Killed on timeout, replacement crashes, retry crashes, fresh worker
+        assert len(log.read_text().splitlines()) == 4
+
+    def test_output_without_trailing_newline(self, fake_worker, tmp_path):
+        make, _ = fake_worker
+        with make(timeout=5) as session:
+            done = session.run("run", _script(tmp_path, "cat.R", "PRINT start\nPRINTN done\n"))
+            failed = session.run("run", _script(tmp_path, "bad.R", "PRINTN half\nFAIL boom\n"))
+
+        assert done.ok and done.output == ["start", "done"]
+        assert not failed.ok and failed.output == ["half"] and failed.error == "boom"
+
+    def test_timeout_covers_whole_job(self, fake_worker, tmp_path):
+        make, log = fake_worker
+        with make(timeout=1, max_retries=0) as session:
+            started = time.monotonic()
+            with pytest.raises(TimeoutError):
+                session.run("run", _script(tmp_path, "chatty.R", "CHATTY\n"))
+            # Steady output does not extend the deadline
+            assert time.monotonic() - started < 5
+            assert session.run("run", _script(tmp_path, "good.R", "PRINT back\n")).ok
+
+        assert len(log.read_text().splitlines()) == 2  # The chatty worker was replaced
+
+    def test_rejects_unknown_jobs(self, fake_worker, tmp_path):
+        make, _ = fake_worker
+        with pytest.raises(ValueError):
+            make().run("knit", str(tmp_path / "x.R"))
+
+    def test_runner_and_optimizer_use_the_session(self, fake_worker, tmp_path):
+        make, log = fake_worker
+        project = tmp_path / "project"
+        r_script = _script(project, "logic.R", "logic_pipeline <- function(df) df\n")
+
+        with make(timeout=10) as session:
+            runner = RRunner(r_script, session=session)
+            table = runner.run_and_load(loader_code="df <- read_csv('in.csv')")
+            optimizer = CodeOptimizer(str(project), session=session)
+            lints = optimizer.optimize_file("logic.R")
+
+        assert table["NET"].tolist() == [10.5, 20.0]
+        assert not os.path.exists(project / "wrapper.R")
+        assert lints == ["logic.R:1:1: style: fake lint"]
+        assert (project / "logic.R").read_text().endswith("# styled\n")
+        assert len(log.read_text().splitlines()) == 1
+
+    def test_harness_sources_logic_into_the_job(self, tmp_path):
+        r_script = _script(tmp_path, "logic.R", "logic_pipeline <- function(df) df\n")
+        wrapper = RRunner(r_script)._generate_wrapper("out.json", None, "df <- data.frame()")
+        assert 'source("logic.R", local = TRUE)' in wrapper
+
+
+@pytest.mark.skipif(shutil.which("Rscript") is None, reason="R is not installed")
+def test_worker_jobs_do_not_share_globals(tmp_path):
+    """Helpers and pipelines one job defines are gone when the next one runs."""
+    first = _script(tmp_path / "a", "first.R", (
+        "helper <- function(x) x * 2\n"
+        "logic_pipeline <- function(df) helper(df)\n"
+        "counter <<- 1\n"
+        "source('logic.R')\n"))
+    _script(tmp_path / "a", "logic.R", "extra <- 'from first'\n")
+    second = _script(tmp_path / "b", "second.R", (
+        "leaked <- intersect(c('helper', 'logic_pipeline', 'counter', 'extra'), ls(globalenv()))\n"
+        "if (length(leaked)) stop(paste('leaked:', paste(leaked, collapse = ', ')))\n"
+        "logic_pipeline <- function(df) df + 1\n"
+        "if (logic_pipeline(1) != 2) stop('wrong pipeline')\n"))
+
+    with RSession(timeout=60) as session:
+        assert session.run("run", first).ok
+        result = session.run("run", second)
+    assert result.ok, result.error
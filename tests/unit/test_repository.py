@@ -76,4 +76,104 @@ class TestRepository:
         Repo should handle non-existent roots gracefully (or raise error).
         """
         with pytest.raises(FileNotFoundError):
-            Repository("/path/to/nowhere")
\ No newline at end of file
+            Repository("/path/to/nowhere")
+
+    def test_lazy_scan_indexes_without_reading(self, repo_structure):
+        repo = Repository(repo_structure, lazy=True)
+        repo.scan()
+
+        assert repo.list_files() == ["main.spss", "subdir/module.sps"]
+        info = repo.get_file_info("subdir/module.sps")
+        assert info.size == len("COMPUTE Y=2.")
+        assert info.full_path == repo.get_full_path("subdir/module.sps")
+        assert repo._files == {}
+
+        assert repo.get_content("main.spss") == "COMPUTE X=1."
+        assert repo.get_content("ghost.spss") is None
+        repo.save_spec("subdir/module.sps", "# Spec")  # Known without being loaded
+
+    def test_lazy_lru_budget(self, repo_structure):
+        root = os.path.join(repo_structure, "big")
+        os.makedirs(root)
+        for name in ("a", "b", "c"):
+            with open(os.path.join(root, f"{name}.sps"), "w") as f:
+                f.write(name * 100)
+
+        repo = Repository(repo_structure, lazy=True, cache_bytes=250)
+        repo.scan()
+        repo.get_content("big/a.sps")
+        repo.get_content("big/b.sps")
+        repo.get_content("big/a.sps")  # a is now the most recently used
+        repo.get_content("big/c.sps")
+
+        assert list(repo._files) == ["big/a.sps", "big/c.sps"]
+        assert repo._cached_bytes == 200
+        assert repo.get_content("big/b.sps") == "b" * 100  # Re-read from disk
+
+    def test_lazy_encoding_fallback(self, tmp_path):
+        (tmp_path / "legacy.sps").write_bytes("COMPUTE caf\xe9 = 1.".encode("latin-1"))
+        repo = Repository(str(tmp_path), lazy=True)
+        repo.scan()
+        assert repo.get_content("legacy.sps") == "COMPUTE caf\xe9 = 1."
+
+
+class TestConcurrentWalk:
+
+    @pytest.fixture
+    def wide_tree(self, tmp_path):
+        root = tmp_path / "share"
+        expected = []
+        for d in range(12):
+            sub = root / f"dept_{d:02d}" / "jobs"
+            sub.mkdir(parents=True)
+            for f in range(3):
+                (sub / f"job_{f}.sps").write_text(f"COMPUTE x = {f}.")
+                expected.append(f"dept_{d:02d}/jobs/job_{f}.sps")
+            (sub / "notes.txt").write_text("not code")
+            (sub / "LEGACY.SPS").write_text("COMPUTE y = 1.")
+            expected.append(f"dept_{d:02d}/jobs/LEGACY.SPS")
+        archive = root / "archive"
+        archive.mkdir()
+        (archive / "old.sps").write_text("COMPUTE z = 1.")
+        return str(root), sorted(expected + ["archive/old.sps"])
+
+    def test_matches_sequential_walk(self, wide_tree):
+        root, expected = wide_tree
+        sequential = Repository(root, lazy=True)
+        sequential.scan()
+        concurrent = Repository(root, lazy=True, walk_workers=4)
+        concurrent.scan()
+
+        assert sequential.list_files() == expected
+        assert concurrent.list_files() == expected
+
+    def test_streams_while_walking(self, wide_tree, monkeypatch):
+        root, expected = wide_tree
+        monkeypatch.setattr(Repository, "WALK_QUEUE_SIZE", 2)  # Force back-pressure
+        repo = Repository(root, walk_workers=3)
+
+        seen = []
+        for rel_path in repo.iter_scan():
+            seen.append(rel_path)
+            assert repo.get_content(rel_path) is not None  # Usable immediately
+
+        assert sorted(seen) == expected == repo.list_files()
+
+    def test_abandoned_stream_stops_workers(self, wide_tree, monkeypatch):
+        root, _ = wide_tree
+        monkeypatch.setattr(Repository, "WALK_QUEUE_SIZE", 1)
+        stream = Repository(root, lazy=True, walk_workers=4).iter_scan()
+        next(stream)
+        stream.close()  # Must not hang on blocked producers
+
+    def test_include_exclude_globs(self, wide_tree):
+        root, _ = wide_tree
+        repo = Repository(root, lazy=True, include=["*.sps", "*.txt"],
+                          exclude=["archive", "dept_0[1-9]/*", "dept_1*", "LEGACY.*"],
+                          walk_workers=2)
+        repo.scan()
+
+        assert repo.list_files() == [
+            "dept_00/jobs/job_0.sps", "dept_00/jobs/job_1.sps",
+            "dept_00/jobs/job_2.sps", "dept_00/jobs/notes.txt",
+        ]
@@ -53,4 +53,10 @@ class TestRosettaStone:
 
     def test_number_conversion(self):
         """Test parsing NUMBER(var, format)."""
-        assert RosettaStone.translate_expression("NUMBER(str_var, F8.0)") == "as.numeric(str_var)"
\ No newline at end of file
+        assert RosettaStone.translate_expression("NUMBER(str_var, F8.0)") == "as.numeric(str_var)"
+
+    def test_operators(self):
+        """Comparison and logical operators are translated from the AST."""
+        assert RosettaStone.translate_expression("x = 1 AND y ~= 2") == "x == 1 & y != 2"
+        assert RosettaStone.translate_expression("a >= b OR NOT c") == "a >= b | !c"
+        assert RosettaStone.translate_expression("a ** 2") == "a^2"
@@ -1,7 +1,9 @@
 import pytest
 import os
 import subprocess
+import time
 from unittest.mock import patch, MagicMock
+from spss_engine.probe import ColumnarProbe
 from spss_engine.spss_runner import PsppRunner
 
 
@@ -55,3 +57,181 @@ class TestPSPPRunner:
             runner.run_and_probe(str(spss_file), str(tmp_path))
         
         assert "PSPP execution failed" in str(exc.value)
+
+    @patch("subprocess.run")
+    def test_pspp_profile_reads_every_row(self, mock_run, tmp_path):
+        spss_file = tmp_path / "script.spss"
+        spss_file.write_text("DATA LIST LIST /x.", encoding="utf-8")
+        rows = "\n".join(f"{i},{i * 2}.00" for i in range(500))
+        (tmp_path / "script_probe.csv").write_text(f"x,y\n{rows}\n", encoding="utf-8")
+        mock_run.return_value = MagicMock(returncode=0, stdout="Success")
+
+        result = PsppRunner().run_and_profile(
+            str(spss_file), str(tmp_path), probe=ColumnarProbe(chunk_rows=64, sample_rows=5)
+        )
+
+        assert result.row_count == 500
+        assert result.columns["Y"].maximum == 998.0
+        assert len(result.sample) == 5
+
+    @patch("subprocess.run")
+    def test_pspp_load_parses_output_once(self, mock_run, tmp_path):
+        spss_file = tmp_path / "script.spss"
+        spss_file.write_text("DATA LIST LIST /x.", encoding="utf-8")
+        (tmp_path / "script_probe.csv").write_text("x,y\n1,a\n2,b\n", encoding="utf-8")
+        mock_run.return_value = MagicMock(returncode=0, stdout="Success")
+
+        probe = ColumnarProbe()
+        with patch.object(probe, "iter_chunks", wraps=probe.iter_chunks) as read:
+            table, result = PsppRunner().run_and_load(str(spss_file), str(tmp_path), probe=probe)
+
+        assert read.call_count == 1
+        assert table["X"].tolist() == [1.0, 2.0]
+        assert result.row_count == 2 and result.first_values() == {"X": "1", "Y": "a"}
+
+
+# Stand-in for 'pspp' reading syntax on stdin. It understands just enough:
+# CD '...' changes directory, INSERT FILE='...' runs the file (writing the
+# probe CSV with the value of 'COMPUTE x = N.' and its working directory),
+# ECHO prints text. Scripts containing CRASH kill the process; HANG blocks
+# forever and CHATTY prints a line every 0.1s forever. Every line received is appended to $FAKE_PSPP_LOG.in.
+FAKE_PSPP = r"""#!/bin/sh
+echo "$$" >> "$FAKE_PSPP_LOG"
+while IFS= read -r line; do
+  printf '%s\n' "$line" >> "$FAKE_PSPP_LOG.in"
+  case "$line" in
+    CD*)
+      cd "$(printf '%s\n' "$line" | sed -n "s/^CD '\(.*\)'\./\1/p")" || exit 9
+      ;;
+    INSERT*)
+      file=$(printf '%s\n' "$line" | sed -n "s/.*FILE='\([^']*\)'.*/\1/p")
+      if grep -q CRASH "$file"; then exit 3; fi
+      if grep -q HANG "$file"; then sleep 30; fi
+      if grep -q CHATTY "$file"; then while :; do echo working; sleep 0.1; done; fi
+      out=$(sed -n "s/.*SAVE TRANSLATE \/OUTFILE='\([^']*\)'.*/\1/p" "$file")
+      value=$(sed -n 's/^COMPUTE x = \([0-9]*\)\./\1/p' "$file")
+      if [ -n "$value" ]; then printf 'x,cwd\n%s,%s\n' "$value" "$(pwd)" > "$out"; fi
+      ;;
+    ECHO*)
+      printf '%s\n' "$line" | sed -n "s/^ECHO '\(.*\)'\./\1/p"
+      ;;
+  esac
+done
+"""
+
+
+class TestPooledPsppRunner:
+
+    @pytest.fixture
+    def fake_pspp(self, tmp_path, monkeypatch):
+        exe = tmp_path / "fake_pspp.sh"
+        exe.write_text(FAKE_PSPP)
+        exe.chmod(0o755)
+        log = tmp_path / "starts.log"
+        log.write_text("")
+        monkeypatch.setenv("FAKE_PSPP_LOG", str(log))
+        return str(exe), log
+
+    def _script(self, folder, name, body):
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{name}.sps"
+        path.write_text(body)
+        return str(path)
+
+    def test_reuses_processes_across_jobs(self, fake_pspp, tmp_path):
+        exe, log = fake_pspp
+        out = tmp_path / "out"
+        out.mkdir()
+        jobs = [
+            (self._script(tmp_path / f"src{i % 2}", f"job{i}", f"COMPUTE x = {i}.\n"), str(out))
+            for i in range(6)
+        ]
+
+        with PsppRunner(exe, pool_size=2, timeout=10) as runner:
+            results = runner.run_batch(jobs)
+
+        assert [r["X"] for r in results] == [str(i) for i in range(6)]
+        # Each job ran in its own script folder
+        assert all(r["CWD"].endswith(f"src{i % 2}") for i, r in enumerate(results))
+        assert len(log.read_text().split()) <= 2  # No per-job process start
+        # Temporary copies go to the output folder and are cleaned up
+        assert not list((tmp_path / "src0").glob(".*_probe.sps"))
+        assert not list(out.glob(".*_probe.sps"))
+
+    def test_read_only_source_and_session_reset(self, fake_pspp, tmp_path):
+        exe, log = fake_pspp
+        src = tmp_path / "src"
+        script = self._script(src, "job", (
+            "FILE HANDLE raw /NAME='raw.dat'.\n"
+            "file handle Lookup /NAME='lookup.dat'.\n"
+            "DATASET NAME people.\n"
+            "SET DECIMAL=COMMA.\n"
+            "COMPUTE x = 4.\n"))
+        src.chmod(0o555)  # Legacy share: nothing may be written next to the script
+        try:
+            with PsppRunner(exe, pool_size=1, timeout=10) as runner:
+                result = runner.run_and_probe(script, str(tmp_path))
+        finally:
+            src.chmod(0o755)
+
+        assert result == {"X": "4", "CWD": str(src)}
+        sent = (tmp_path / "starts.log.in").read_text().splitlines()
+        insert = next(i for i, line in enumerate(sent) if line.startswith("INSERT"))
+        assert sent[insert - 2:insert] == ["PRESERVE.", f"CD '{src}'."]
+        # SET options, datasets and file handles do not reach the next job;
+        # macros are not reset (PSPP cannot undefine them)
+        assert sent[insert + 1:insert + 6] == [
+            "RESTORE.", "DATASET CLOSE ALL.",
+            "CLOSE FILE HANDLE LOOKUP.", "CLOSE FILE HANDLE RAW.", "NEW FILE.",
+        ]
+
+    def test_timeout_and_crash_recovery(self, fake_pspp, tmp_path):
+        exe, log = fake_pspp
+        src = tmp_path / "src"
+        hang = self._script(src, "hang", "HANG\nCOMPUTE x = 1.\n")
+        crash = self._script(src, "crash", "CRASH\n")
+        good = self._script(src, "good", "COMPUTE x = 7.\n")
+
+        with PsppRunner(exe, pool_size=1, timeout=1, max_retries=1) as runner:
+            with pytest.raises(TimeoutError):
+                runner.run_and_probe(hang, str(tmp_path))
+            with pytest.raises(RuntimeError, match="exited with code 3"):
+                runner.run_and_probe(crash, str(tmp_path))
+            # The pool recovers with a fresh process
+            assert runner.run_and_probe(good, str(tmp_path)) == {"X": "7", "CWD": str(src)}
+
+        # Initial process (killed on timeout), its replacement (crashes),
+        # the retry's process (crashes again) and the one serving 'good'
+        assert len(log.read_text().split()) == 4
+
+    def test_timeout_covers_whole_job(self, fake_pspp, tmp_path):
+        exe, log = fake_pspp
+        src = tmp_path / "src"
+        chatty = self._script(src, "chatty", "CHATTY\nCOMPUTE x = 1.\n")
+        good = self._script(src, "good", "COMPUTE x = 7.\n")
+
+        with PsppRunner(exe, pool_size=1, timeout=1, max_retries=0) as runner:
+            started = time.monotonic()
+            with pytest.raises(TimeoutError):
+                runner.run_and_probe(chatty, str(tmp_path))
+            # Steady output does not extend the deadline
+            assert time.monotonic() - started < 5
+            assert runner.run_and_probe(good, str(tmp_path)) == {"X": "7", "CWD": str(src)}
+
+        assert len(log.read_text().split()) == 2  # The chatty process was replaced
+
+    def test_batch_profiles(self, fake_pspp, tmp_path):
+        exe, _ = fake_pspp
+        jobs = [(self._script(tmp_path / "src", f"job{i}", f"COMPUTE x = {i}.\n"), str(tmp_path))
+                for i in range(3)]
+        with PsppRunner(exe, pool_size=2, timeout=10) as runner:
+            results = runner.run_batch(jobs, probe=ColumnarProbe())
+        assert [r.row_count for r in results] == [1, 1, 1]
+        assert [r.columns["X"].maximum for r in results] == [0.0, 1.0, 2.0]
+
+    def test_missing_probe_is_a_failure(self, fake_pspp, tmp_path):
+        exe, _ = fake_pspp
+        script = self._script(tmp_path / "src", "empty", "DATA LIST LIST /y.\n")
+        with PsppRunner(exe, pool_size=1, timeout=5) as runner:
+            with pytest.raises(RuntimeError, match="PSPP execution failed"):
+                runner.run_and_probe(script, str(tmp_path))
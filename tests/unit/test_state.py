@@ -36,4 +36,80 @@ class TestStateMachine:
         v1 = sm.register_assignment("A", source="...", dependencies=[])
         v2 = sm.register_assignment("A", source="...", dependencies=[])
         
-        assert sm.get_current_version("A") == v2
\ No newline at end of file
+        assert sm.get_current_version("A") == v2
+
+    def test_id_and_cluster_indexes(self):
+        sm = StateMachine()
+        a0 = sm.register_assignment("A", source="COMPUTE A = 1.", dependencies=[])
+        a1 = sm.register_assignment("A", source="COMPUTE A = 2.", dependencies=[a0])
+        sm.register_output_file("out.sav")
+        sm.reset_scope()
+        x0 = sm.register_assignment("X", source="COMPUTE X = 1.", dependencies=[])
+
+        assert sm.get_node("A_1") is a1
+        assert sm.get_node("X_0") is x0
+        assert sm.get_node("MISSING_0") is None
+        assert sm.get_cluster_nodes(0) == [a0, a1]
+        assert sm.get_cluster_nodes(1) == [x0]
+        assert sm.get_cluster_nodes(5) == []
+
+    def test_index_keeps_first_node_for_repeated_ids(self):
+        # The ledger resets per scope, so ids can repeat across clusters
+        sm = StateMachine()
+        first = sm.register_assignment("A", source="COMPUTE A = 1.", dependencies=[])
+        sm.register_output_file("out.sav")
+        sm.reset_scope()
+        sm.register_assignment("A", source="COMPUTE A = 9.", dependencies=[])
+
+        assert sm.get_node("A_0") is first
+
+    def test_liveness_in_both_storages(self):
+        def build(compact):
+            sm = StateMachine(compact=compact)
+            a0 = sm.register_assignment("A", source="COMPUTE A = 1.")
+            sm.register_assignment("B", source="COMPUTE B = A.", dependencies=[a0])
+            sm.register_assignment("B", source="COMPUTE B = 2.")
+            sm.register_assignment("A", source="COMPUTE A = 3.")
+            sm.register_assignment("###SYS_JOIN_1###", source="MATCH FILES.")
+            sm.register_assignment("###SYS_JOIN_1###", source="MATCH FILES.")
+            return sm
+
+        for sm in (build(False), build(True)):
+            assert sm.find_dead_versions() == ["B_0", "###SYS_JOIN_1###_0"]
+            assert sm.live_roots() == [2, 3]
+            assert sm.find_dead_versions(include_system=False) == ["B_0"]
+            assert sm.find_unreachable_versions() == ["A_0", "B_0"]
+
+
+class TestCompactStateMachine:
+    def test_matches_default_storage(self):
+        from spss_engine.pipeline import CompilerPipeline
+        from tests.corpus import COMPREHENSIVE_SCOPE_CORPUS
+
+        default, compact = CompilerPipeline(), CompilerPipeline(compact=True)
+        default.process(COMPREHENSIVE_SCOPE_CORPUS)
+        compact.process(COMPREHENSIVE_SCOPE_CORPUS)
+
+        def shape(sm):
+            return [(n.id, n.source, n.cluster_index, [d.id for d in n.dependencies])
+                    for n in sm.nodes]
+
+        assert shape(compact.state) == shape(default.state)
+        assert compact.state.find_dead_versions() == default.state.find_dead_versions()
+        assert compact.analyze_dead_code() == default.analyze_dead_code()
+
+    def test_compact_nodes(self):
+        sm = StateMachine(compact=True)
+        a0 = sm.register_assignment("a", source="COMPUTE a = 1.")
+        b0 = sm.register_assignment("b", source="COMPUTE b = a + 1.", dependencies=[a0, "RAW_0"])
+        a1 = sm.register_assignment("a", source="COMPUTE a = 1.")
+
+        assert isinstance(b0, VariableVersion)
+        assert not hasattr(b0, "__dict__")
+        assert (a0.index, b0.index, a1.index) == (0, 1, 2)
+        assert b0.dependencies == [a0, "RAW_0"]
+        assert a0.source is a1.source  # Interned
+        assert b0.id is b0.id  # Cached
+        assert b0.get_ast().dependencies() == ["A"]
+        assert sm.get_node("B_0") is b0
+        assert sm.find_dead_versions() == []
@@ -1,6 +1,6 @@
 import pytest
 from spss_engine.transformer import CommandTransformer
-from spss_engine.parser import ParsedCommand, TokenType
+from spss_engine.parser import ParsedCommand, SpssParser, TokenType
 from spss_engine.events import (
     FileReadEvent, FileMatchEvent, FileSaveEvent, 
     AssignmentEvent, ScopeResetEvent
@@ -25,6 +25,12 @@ class TestCommandTransformer:
         assert isinstance(events[1], FileReadEvent)
         assert events[1].filename == "data.csv"
 
+    def test_other_readers_do_not_reset_scope(self, transformer):
+        """GET SAS / XSAVE are classified FILE_IO and produce no file events."""
+        parser = SpssParser()
+        for raw in ("GET SAS DATA='in.sas7bdat'.", "XSAVE OUTFILE='out.sav'."):
+            assert transformer.transform(parser.parse_command(raw)) == []
+
     def test_transform_get_file_standard(self, transformer):
         """
         Scenario: GET FILE='mydata.sav'. 
@@ -0,0 +1,89 @@
+"""
+Microbenchmark: single-pass AssignmentExtractor.extract vs. the legacy
+extract_target + extract_dependencies pair, over the test corpus.
+
+Usage: PYTHONPATH=src:. python tools/bench_extractor.py [repeats]
+"""
+import re
+import sys
+import time
+
+from spss_engine.extractor import AssignmentExtractor
+from spss_engine.lexer import SpssLexer
+from spss_engine.parser import SpssParser, TokenType
+from tests.corpus import COMPREHENSIVE_SCOPE_CORPUS
+
+
+def legacy_extract_target(command):
+    """The original recursive, inline-regex implementation."""
+    cmd = command.strip()
+    if_match = re.match(r"^\s*IF\s*\(.+?\)\s*(.+)", cmd, re.IGNORECASE | re.DOTALL)
+    if if_match:
+        return legacy_extract_target(if_match.group(1))
+    compute_match = re.match(r"^\s*COMPUTE\s+([A-Za-z0-9_#@$]+)\s*=", cmd, re.IGNORECASE)
+    if compute_match:
+        return compute_match.group(1).strip().upper()
+    if "INTO" in cmd.upper():
+        m = re.search(r"INTO\s+([A-Za-z0-9_#@$]+)", cmd, re.IGNORECASE)
+        if m:
+            return m.group(1).strip().upper()
+    if cmd.upper().startswith("RECODE") and "INTO" not in cmd.upper():
+        m = re.match(r"^\s*RECODE\s+([A-Za-z0-9_#@$]+)", cmd, re.IGNORECASE)
+        if m:
+            return m.group(1).strip().upper()
+    m = re.match(r"^\s*(STRING|NUMERIC)\s+([A-Za-z0-9_#@$]+)", cmd, re.IGNORECASE)
+    if m:
+        return m.group(2).strip().upper()
+    return None
+
+
+def legacy_extract_dependencies(expression):
+    clean_expr = re.sub(r"('|\").*?('|\")", "", expression)
+    tokens = re.findall(r"[A-Za-z@#$][A-Za-z0-9@#$_]*", clean_expr)
+    KEYWORDS = {
+        "COMPUTE", "IF", "SQRT", "MEAN", "SUM", "AND", "OR", "NOT", "EQ", "NE",
+        "LT", "GT", "TO", "RECODE", "INTO", "STRING", "NUMERIC", "EXECUTE",
+    }
+    return list({t.upper() for t in tokens if t.upper() not in KEYWORDS})
+
+
+def legacy(command):
+    target = legacy_extract_target(command)
+    if target:
+        deps = [d for d in legacy_extract_dependencies(command) if d != target]
+        return target, deps
+    return None, []
+
+
+def _time(fn, commands) -> float:
+    start = time.perf_counter()
+    for cmd in commands:
+        fn(cmd)
+    return time.perf_counter() - start
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    lexer = SpssLexer()
+    parser = SpssParser()
+    base = [lexer.normalize_command(c) for c in lexer.split_commands(COMPREHENSIVE_SCOPE_CORPUS)]
+    commands = base * repeats
+
+    # Targets must agree on everything the transformer hands to the extractor
+    assignment_types = (TokenType.ASSIGNMENT, TokenType.RECODE, TokenType.CONDITIONAL)
+    for cmd in base:
+        if parser.parse_command(cmd).type not in assignment_types:
+            continue
+        assert legacy(cmd)[0] == AssignmentExtractor.extract(cmd)[0], cmd
+
+    legacy_s = _time(legacy, commands)
+    new_s = _time(AssignmentExtractor.extract, commands)
+
+    print(f"Commands:     {len(commands):,}")
+    print(f"Legacy (2x):  {legacy_s:.3f}s")
+    print(f"Single pass:  {new_s:.3f}s")
+    print(f"Speed-up:     {legacy_s / new_s:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
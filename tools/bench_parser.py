@@ -0,0 +1,80 @@
+"""
+Benchmark: keyword-dispatch classifier vs. the legacy startswith chain.
+
+Usage: PYTHONPATH=src python tools/bench_parser.py [n_commands]
+"""
+import sys
+import time
+
+from spss_engine.parser import SpssParser, ParsedCommand, TokenType
+
+
+def legacy_parse_command(command: str) -> ParsedCommand:
+    """The original SpssParser.parse_command, kept verbatim for comparison."""
+    cmd_upper = command.strip().upper()
+    if cmd_upper.startswith("RECODE"):
+        return ParsedCommand(TokenType.RECODE, command)
+    if cmd_upper.startswith("COMPUTE") or cmd_upper.startswith("STRING"):
+        return ParsedCommand(TokenType.ASSIGNMENT, command)
+    if cmd_upper.startswith("IF"):
+        return ParsedCommand(TokenType.CONDITIONAL, command)
+    if any(cmd_upper.startswith(x) for x in ["GET DATA", "GET FILE"]):
+        return ParsedCommand(TokenType.FILE_READ, command)
+    if cmd_upper.startswith("MATCH FILES") or cmd_upper.startswith("ADD FILES"):
+        return ParsedCommand(TokenType.FILE_MATCH, command)
+    if cmd_upper.startswith("SAVE") or cmd_upper.startswith("SAVE TRANSLATE"):
+        return ParsedCommand(TokenType.FILE_SAVE, command)
+    if cmd_upper.startswith("AGGREGATE"):
+        return ParsedCommand(TokenType.AGGREGATE, command)
+    if any(cmd_upper.startswith(x) for x in ["SORT CASES", "EXECUTE", "DATASET"]):
+        return ParsedCommand(TokenType.CONTROL_FLOW, command)
+    return ParsedCommand(TokenType.UNKNOWN, command)
+
+
+VARIABLES_BLOCK = "GET DATA /TYPE=TXT /FILE='big.csv' /VARIABLES=" + " ".join(
+    f"v{i} F8.2" for i in range(400)
+) + "."
+
+SAMPLE = [
+    "COMPUTE x = y + 1.",
+    "IF (a > 1) b = 2.",
+    "RECODE age (0 thru 17=1) (ELSE=0) INTO minor.",
+    "SAVE OUTFILE='out.sav'.",
+    "MATCH FILES /FILE=* /TABLE='lookup.sav' /BY id.",
+    "AGGREGATE /OUTFILE=* /BREAK=region /total=SUM(sales).",
+    "FREQUENCIES VARIABLES=x /ORDER=ANALYSIS.",
+    "EXECUTE.",
+    VARIABLES_BLOCK,
+]
+
+
+def _time(fn, commands) -> float:
+    start = time.perf_counter()
+    for cmd in commands:
+        fn(cmd)
+    return time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    commands = [SAMPLE[i % len(SAMPLE)] for i in range(n)]
+    parser = SpssParser()
+
+    # Sanity: the legacy vocabulary must classify identically.
+    for cmd in SAMPLE:
+        legacy = legacy_parse_command(cmd).type
+        new = parser.parse_command(cmd).type
+        if legacy != TokenType.UNKNOWN:
+            assert legacy == new, (cmd, legacy, new)
+
+    legacy_s = _time(legacy_parse_command, commands)
+    new_s = _time(parser.parse_command, commands)
+
+    print(f"Commands:          {n:,}")
+    print(f"Legacy startswith: {legacy_s:.3f}s")
+    print(f"Keyword dispatch:  {new_s:.3f}s")
+    print(f"Speed-up:          {legacy_s / new_s:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Memory benchmark: default vs. compact StateMachine storage on a synthetic
+chain of assignments (each node reads the previous two variables).
+
+Usage: PYTHONPATH=src:. python tools/bench_state_memory.py [nodes]
+"""
+import sys
+import time
+import tracemalloc
+
+from spss_engine.state import StateMachine
+
+
+def build(n, compact):
+    sm = StateMachine(compact=compact)
+    names = [f"VAR_{i % 500}" for i in range(n)]
+    for i, name in enumerate(names):
+        deps = []
+        if i >= 2:
+            deps = [sm.get_current_version(names[i - 1]), sm.get_current_version(names[i - 2])]
+        # Merged corpora repeat the same handful of command texts a lot
+        sm.register_assignment(name, f"COMPUTE {name} = {names[i - 1]} + 1.", dependencies=deps)
+    return sm
+
+
+def measure(n, compact):
+    tracemalloc.start()
+    start = time.perf_counter()
+    sm = build(n, compact)
+    build_time = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    dead = sm.find_dead_versions()
+    dead_time = time.perf_counter() - start
+    return peak, build_time, dead_time, len(dead)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    results = {}
+    for compact in (False, True):
+        results[compact] = measure(n, compact)
+        peak, build_time, dead_time, dead = results[compact]
+        label = "compact" if compact else "default"
+        print(f"{label:8s} peak={peak / 2**20:8.1f} MiB  build={build_time:6.2f}s  "
+              f"dead_code={dead_time:6.3f}s  dead={dead}")
+
+    assert results[False][3] == results[True][3], "Dead-code results differ"
+    print(f"memory ratio: {results[False][0] / results[True][0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()